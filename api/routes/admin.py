@@ -1,3 +1,4 @@
+import asyncio
 import os
 from typing import Optional
 
@@ -5,8 +6,10 @@ from fastapi import APIRouter, Header, HTTPException
 from pydantic import BaseModel, EmailStr
 
 from lib import db as db_lib
+from lib import db_async
 from lib.auth import require_api_key
 from lib.email import send_email
+from lib.metrics_cache import get_metrics_cache
 
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -154,7 +157,13 @@ def send_outbox(
         record.get("subject"),
         record.get("body"),
     )
-    db_lib.mark_outbox_sent(db, outbox_id, payload.send_provider or "sendgrid", response)
+    db_lib.mark_outbox_sent(
+        db,
+        outbox_id,
+        payload.send_provider or "sendgrid",
+        response,
+        client_id=record.get("client_id"),
+    )
     db_lib.record_email_sent(
         db,
         client_id,
@@ -231,7 +240,7 @@ def resume_automation(
 
 
 @router.get("/metrics")
-def get_metrics(
+async def get_metrics(
     x_client_id: Optional[str] = Header(default=None),
     x_api_key: Optional[str] = Header(default=None),
 ):
@@ -239,10 +248,20 @@ def get_metrics(
     client_id = x_client_id or os.getenv("DEFAULT_CLIENT_ID")
     if not client_id:
         raise HTTPException(status_code=500, detail="DEFAULT_CLIENT_ID is not set")
-    db = db_lib.get_supabase_client()
-    return {
-        "queue": db_lib.get_queue_counts(db),
-        "outbox": db_lib.get_outbox_counts(db, client_id),
-        "runs": db_lib.get_run_counts(db, client_id),
-        "recent_runs": db_lib.list_recent_runs(db, client_id, limit=15),
-    }
+
+    async def _load():
+        db = await db_async.get_async_supabase_client()
+        queue, outbox, runs, recent_runs = await asyncio.gather(
+            db_async.get_queue_counts(db),
+            db_async.get_outbox_counts(db, client_id),
+            db_async.get_run_counts(db, client_id),
+            db_async.list_recent_runs(db, client_id, limit=15),
+        )
+        return {
+            "queue": queue,
+            "outbox": outbox,
+            "runs": runs,
+            "recent_runs": recent_runs,
+        }
+
+    return await get_metrics_cache().get_or_load_async(("admin_metrics", client_id), _load)
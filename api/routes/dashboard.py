@@ -6,6 +6,7 @@ from fastapi.responses import HTMLResponse
 
 from lib import db as db_lib
 from lib.auth import require_api_key
+from lib.metrics_cache import get_metrics_cache
 
 
 router = APIRouter(tags=["dashboard"])
@@ -135,15 +136,19 @@ def dashboard_stats(
     if not client_id:
         raise HTTPException(status_code=500, detail="DEFAULT_CLIENT_ID is not set")
     db = db_lib.get_supabase_client()
-    costs = db_lib.list_cost_events(db, client_id, limit=200)
-    total_cost = sum(float(item.get("cost_usd") or 0) for item in costs)
-    return {
-        "queue": db_lib.get_queue_counts(db),
-        "outbox": db_lib.get_outbox_counts(db, client_id),
-        "runs": db_lib.get_run_counts(db, client_id),
-        "recent_runs": db_lib.list_recent_runs(db, client_id, limit=15),
-        "costs": {"total_usd": total_cost, "count": len(costs)},
-    }
+
+    def _load() -> dict:
+        costs = db_lib.list_cost_events(db, client_id, limit=200)
+        total_cost = sum(float(item.get("cost_usd") or 0) for item in costs)
+        return {
+            "queue": db_lib.get_queue_counts(db),
+            "outbox": db_lib.get_outbox_counts(db, client_id),
+            "runs": db_lib.get_run_counts(db, client_id),
+            "recent_runs": db_lib.list_recent_runs(db, client_id, limit=15),
+            "costs": {"total_usd": total_cost, "count": len(costs)},
+        }
+
+    return get_metrics_cache().get_or_load(("dashboard_stats", client_id), _load)
 
 
 @router.get("/api/pipeline")
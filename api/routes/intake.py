@@ -1,11 +1,15 @@
 import os
+import json
 from typing import Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Header, HTTPException
-from pydantic import BaseModel, EmailStr
+from fastapi import APIRouter, Header, HTTPException, Request
+from pydantic import BaseModel, EmailStr, ValidationError
 
 from lib import db as db_lib
+from lib import db_async
+from lib.idempotency_cache import get_recent_keys
+from lib.prefilter import get_prefilter
 from lib.auth import require_api_key
 
 
@@ -22,63 +26,186 @@ class LeadIntakeRequest(BaseModel):
     timestamp: Optional[str] = None
 
 
+def _resolve_client_id(x_client_id: Optional[str]) -> str:
+    client_id = x_client_id or os.getenv("DEFAULT_CLIENT_ID")
+    if not client_id:
+        raise HTTPException(status_code=500, detail="DEFAULT_CLIENT_ID is not set")
+    return client_id
+
+
+def _job_payload(payload: LeadIntakeRequest, email: str, timestamp: str, idempotency_key: str) -> dict:
+    job_payload = payload.dict()
+    job_payload["email"] = email
+    job_payload["timestamp"] = timestamp
+    job_payload["idempotency_key"] = idempotency_key
+    return job_payload
+
+
 @router.post("/lead", status_code=202)
-def intake_lead(
+async def intake_lead(
     payload: LeadIntakeRequest,
     x_client_id: Optional[str] = Header(default=None),
     x_api_key: Optional[str] = Header(default=None),
 ):
     require_api_key(x_api_key)
-    client_id = x_client_id or os.getenv("DEFAULT_CLIENT_ID")
-    if not client_id:
-        raise HTTPException(status_code=500, detail="DEFAULT_CLIENT_ID is not set")
+    client_id = _resolve_client_id(x_client_id)
 
     email = db_lib.normalize_email(payload.email)
     timestamp = payload.timestamp or datetime.utcnow().isoformat()
 
-    blocked_domains = os.getenv("PREFILTER_BLOCKED_DOMAINS", "")
-    if blocked_domains:
-        domain = email.split("@")[-1]
-        blocked = [d.strip().lower() for d in blocked_domains.split(",") if d.strip()]
-        if domain in blocked:
-            return {"status": "filtered", "reason": "blocked_domain"}
+    reason = get_prefilter().check(email, client_id)
+    if reason:
+        return {"status": "filtered", "reason": reason}
 
     idempotency_key = db_lib.compute_idempotency_key(email, timestamp, payload.source)
 
-    db = db_lib.get_supabase_client()
-    existing = db_lib.get_run_by_idempotency(db, idempotency_key)
-    if existing:
+    recent_keys = get_recent_keys()
+    cached_run_id = recent_keys.get(idempotency_key)
+    if cached_run_id:
         return {
             "status": "duplicate",
-            "run_id": existing.get("id"),
+            "run_id": cached_run_id,
             "idempotency_key": idempotency_key,
         }
 
-    run = db_lib.create_run(
+    db = await db_async.get_async_supabase_client()
+    result = await db_async.intake_lead(
         db,
         client_id=client_id,
         idempotency_key=idempotency_key,
         lead_email=email,
         trigger_payload=payload.dict(),
-        status="queued",
-    )
-
-    job_payload = payload.dict()
-    job_payload["email"] = email
-    job_payload["timestamp"] = timestamp
-    job_payload["run_id"] = run.get("id")
-    job_payload["idempotency_key"] = idempotency_key
-
-    job = db_lib.enqueue_job(
-        db,
-        client_id=client_id,
-        lead_email=email,
-        payload=job_payload,
+        job_payload=_job_payload(payload, email, timestamp, idempotency_key),
     )
+    recent_keys.add(idempotency_key, result.get("run_id"))
 
-    return {
-        "status": "queued",
-        "run_id": run.get("id"),
-        "job_id": job.get("id"),
+    response = {
+        "status": result.get("status"),
+        "run_id": result.get("run_id"),
         "idempotency_key": idempotency_key,
     }
+    if result.get("job_id"):
+        response["job_id"] = result["job_id"]
+    return response
+
+
+def _parse_bulk_body(body: bytes, content_type: str) -> list:
+    """Accept a JSON array (or {"leads": [...]}) or newline-delimited JSON."""
+    text = body.decode("utf-8")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as exc:
+                raise HTTPException(status_code=400, detail=f"Invalid JSON on line {line_number}: {exc.msg}")
+        return items
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {exc.msg}")
+    if isinstance(data, dict) and isinstance(data.get("leads"), list):
+        data = data["leads"]
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of leads")
+    return data
+
+
+async def _intake_bulk(items: list, client_id: str) -> dict:
+    results: list[dict] = [{} for _ in items]
+    prefilter = get_prefilter()
+    recent_keys = get_recent_keys()
+    # idempotency_key -> (index, email, request, job payload) for items still to insert
+    candidates: dict[str, tuple[int, str, LeadIntakeRequest, dict]] = {}
+    # idempotency_key -> indexes of later copies of a candidate in this request
+    repeats: dict[str, list[int]] = {}
+
+    for index, item in enumerate(items):
+        try:
+            payload = LeadIntakeRequest.parse_obj(item)
+        except ValidationError as exc:
+            errors = [{"loc": list(e["loc"]), "msg": e["msg"]} for e in exc.errors()]
+            results[index] = {"index": index, "status": "invalid", "errors": errors}
+            continue
+
+        email = db_lib.normalize_email(payload.email)
+        reason = prefilter.check(email, client_id)
+        if reason:
+            results[index] = {"index": index, "status": "filtered", "reason": reason}
+            continue
+
+        timestamp = payload.timestamp or datetime.utcnow().isoformat()
+        idempotency_key = db_lib.compute_idempotency_key(email, timestamp, payload.source)
+        results[index] = {"index": index, "idempotency_key": idempotency_key}
+        if idempotency_key in candidates:
+            results[index]["status"] = "duplicate"
+            repeats.setdefault(idempotency_key, []).append(index)
+            continue
+        cached_run_id = recent_keys.get(idempotency_key)
+        if cached_run_id:
+            results[index].update(status="duplicate", run_id=cached_run_id)
+            continue
+        candidates[idempotency_key] = (
+            index,
+            email,
+            payload,
+            _job_payload(payload, email, timestamp, idempotency_key),
+        )
+
+    if candidates:
+        db = await db_async.get_async_supabase_client()
+        # Runs and jobs are written in one transaction; keys are cached only once both exist
+        intake_results = await db_async.intake_leads(
+            db,
+            client_id,
+            [
+                {
+                    "idempotency_key": key,
+                    "email": email,
+                    "trigger_payload": payload.dict(),
+                    "job_payload": job_payload,
+                }
+                for key, (_, email, payload, job_payload) in candidates.items()
+            ],
+        )
+        for result in intake_results:
+            key = result.get("idempotency_key")
+            if key not in candidates:
+                continue
+            index = candidates[key][0]
+            results[index].update(status=result.get("status"), run_id=result.get("run_id"))
+            if result.get("job_id"):
+                results[index]["job_id"] = result["job_id"]
+            recent_keys.add(key, result.get("run_id"))
+            for repeat in repeats.get(key, []):
+                results[repeat]["run_id"] = result.get("run_id")
+
+    counts: dict[str, int] = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {"total": len(results), "counts": counts, "items": results}
+
+
+@router.post("/leads/bulk", status_code=202)
+async def intake_leads_bulk(
+    request: Request,
+    x_client_id: Optional[str] = Header(default=None),
+    x_api_key: Optional[str] = Header(default=None),
+):
+    """
+    Intake many leads in one request.
+    All new runs and their jobs are created by a single intake_leads RPC (one
+    transaction, one round trip) instead of an intake_lead call per lead.
+    """
+    require_api_key(x_api_key)
+    client_id = _resolve_client_id(x_client_id)
+
+    items = _parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    max_items = int(os.getenv("INTAKE_BULK_MAX_ITEMS", "1000"))
+    if len(items) > max_items:
+        raise HTTPException(status_code=413, detail=f"At most {max_items} leads per request")
+
+    return await _intake_bulk(items, client_id)
@@ -1,3 +1,4 @@
+import asyncio
 import importlib
 import importlib.machinery
 import importlib.util
@@ -8,7 +9,9 @@ from typing import Optional
 from fastapi import APIRouter, Header, HTTPException
 from pydantic import BaseModel
 
+from lib import db as db_lib
 from lib.auth import require_auth
+from lib.cost_tracker import get_cost_tracker
 
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 OUTREACH_ROOT = os.path.join(ROOT_DIR, "automations", "outreach-agent")
@@ -26,12 +29,20 @@ def _load_agent_module(package_name: str, package_path: str, module_name: str):
 
 
 _outreach_module = _load_agent_module("outreach_agent", OUTREACH_AGENT_DIR, "cold_emailer")
-draft_cold_email = _outreach_module.draft_cold_email
+draft_cold_email_async = _outreach_module.draft_cold_email_async
 
 
 router = APIRouter(prefix="/outreach", tags=["outreach"])
 
 
+def _cost_tracker():
+    """Shared cost tracker; without Supabase configured, spend is tracked in memory only."""
+    db = None
+    if os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY"):
+        db = db_lib.get_supabase_client()
+    return get_cost_tracker(db)
+
+
 class OutreachDraftRequest(BaseModel):
     name: str
     role: Optional[str] = None
@@ -42,13 +53,19 @@ class OutreachDraftRequest(BaseModel):
 
 
 @router.post("/draft")
-def draft_outreach(
+async def draft_outreach(
     payload: OutreachDraftRequest,
+    x_client_id: Optional[str] = Header(default=None),
     x_api_key: Optional[str] = Header(default=None),
     x_password: Optional[str] = Header(default=None),
 ):
     require_auth(api_key=x_api_key, password=x_password)
-    draft = draft_cold_email(
+    client_id = x_client_id or os.getenv("DEFAULT_CLIENT_ID")
+    # Building the Supabase client and tracker blocks, so keep it off the event loop
+    tracker = await asyncio.to_thread(_cost_tracker)
+    if tracker.ledger is not None and not await asyncio.to_thread(tracker.ledger.allows, client_id):
+        raise HTTPException(status_code=402, detail="Monthly LLM budget exhausted")
+    draft = await draft_cold_email_async(
         name=payload.name,
         role=payload.role,
         company=payload.company,
@@ -56,6 +73,15 @@ def draft_outreach(
         pain_points=payload.pain_points,
         notes=payload.notes,
     )
+    if client_id and draft.model_name:
+        await asyncio.to_thread(
+            tracker.record_usage,
+            automation="outreach-agent",
+            client_id=client_id,
+            model=draft.model_name,
+            tokens_in=draft.tokens_in,
+            tokens_out=draft.tokens_out,
+        )
     return {
         "email_subject": draft.subject,
         "email_body": draft.body,
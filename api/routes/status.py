@@ -1,6 +1,9 @@
 from fastapi import APIRouter
 
-from lib import db as db_lib
+from lib import db_async
+from lib.idempotency_cache import get_recent_keys
+from lib.metrics_cache import get_metrics_cache
+from lib.structured_output import get_retry_counter
 
 
 router = APIRouter(tags=["status"])
@@ -12,9 +15,14 @@ def health():
 
 
 @router.get("/status")
-def status():
-    db = db_lib.get_supabase_client()
-    queue_counts = db_lib.get_queue_counts(db)
+async def status():
+    async def _load():
+        db = await db_async.get_async_supabase_client()
+        return await db_async.get_queue_counts(db)
+
+    queue_counts = await get_metrics_cache().get_or_load_async(("queue_counts", None), _load)
     return {
         "queue": queue_counts,
+        "intake_recent_keys": get_recent_keys().stats(),
+        "llm_retries": get_retry_counter().snapshot(),
     }
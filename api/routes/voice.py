@@ -27,9 +27,9 @@ def _load_agent_module(package_name: str, package_path: str, module_name: str):
 
 
 _voice_module = _load_agent_module("voice_agent", VOICE_AGENT_DIR, "main")
-place_call = _voice_module.place_call
+place_call_async = _voice_module.place_call_async
 create_session = _voice_module.create_session
-handle_turn = _voice_module.handle_turn
+handle_turn_async = _voice_module.handle_turn_async
 
 
 router = APIRouter(prefix="/voice", tags=["voice"])
@@ -52,13 +52,13 @@ class VoiceTurnRequest(BaseModel):
 
 
 @router.post("/call")
-def place_voice_call(
+async def place_voice_call(
     payload: VoiceCallRequest,
     x_api_key: Optional[str] = Header(default=None),
     x_password: Optional[str] = Header(default=None),
 ):
     require_auth(api_key=x_api_key, password=x_password, admin=True)
-    result = place_call(payload.phone_number, payload.script, payload.metadata)
+    result = await place_call_async(payload.phone_number, payload.script, payload.metadata)
     return {
         "status": result.status,
         "call_id": result.call_id,
@@ -86,14 +86,14 @@ def create_voice_session(
 
 
 @router.post("/sessions/{session_id}/turn")
-def create_voice_turn(
+async def create_voice_turn(
     session_id: str,
     payload: VoiceTurnRequest,
     x_api_key: Optional[str] = Header(default=None),
     x_password: Optional[str] = Header(default=None),
 ):
     require_auth(api_key=x_api_key, password=x_password, admin=True)
-    result = handle_turn(session_id, payload.transcript, payload.context)
+    result = await handle_turn_async(session_id, payload.transcript, payload.context)
     return result
 
 
@@ -5,9 +5,11 @@ All hard limits and prompts are defined here for easy auditing.
 """
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Optional
 
+from lib.cost_tracker import MODEL_PRICING
+
 # =============================================================================
 # HARD LIMITS (Never exceed these)
 # =============================================================================
@@ -55,6 +57,19 @@ DRAFTING_MODEL = ModelConfig(
     cost_per_1k_output=0.0006,
 )
 
+
+def model_config(name: str, base: ModelConfig) -> ModelConfig:
+    """base's step settings (max tokens, temperature) for another MODEL_PRICING model."""
+    if name == base.name:
+        return base
+    pricing = MODEL_PRICING.get(name, MODEL_PRICING["default"])
+    return replace(
+        base,
+        name=name,
+        cost_per_1k_input=pricing.input_per_million / 1000,
+        cost_per_1k_output=pricing.output_per_million / 1000,
+    )
+
 # =============================================================================
 # QUALIFICATION RUBRIC
 # =============================================================================
@@ -7,12 +7,18 @@ This module handles personalized email generation for qualified leads.
 import json
 import logging
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+
+from lib.llm_cache import get_llm_cache
+from lib.llm_stream import stream_completion, streaming_enabled
+from lib.structured_output import call_with_schema_fallback, get_retry_counter, with_response_format
 
 from .config import (
     DRAFTING_MODEL,
+    ModelConfig,
     EMAIL_DRAFT_PROMPT,
     DEFAULT_OFFER,
+    EMAIL_OUTPUT_SCHEMA,
     MAX_RETRIES_PER_STEP,
 )
 from .qualifier import QualificationResult
@@ -31,6 +37,8 @@ class EmailDraft:
     tokens_out: int = 0
     model_name: Optional[str] = None
     raw_response: Optional[str] = None
+    cache_hit: bool = False
+    retries: int = 0
 
 
 def draft_email(
@@ -41,6 +49,7 @@ def draft_email(
     enrichment_data: Optional[dict] = None,
     offer_description: Optional[str] = None,
     llm_client = None,
+    model: Optional[ModelConfig] = None,
 ) -> EmailDraft:
     """
     Draft a personalized email for a qualified lead.
@@ -53,6 +62,8 @@ def draft_email(
         enrichment_data: Dict of enrichment info
         offer_description: Custom offer description
         llm_client: OpenAI client instance
+        model: Model to use instead of DRAFTING_MODEL (e.g. chosen by the
+            model router)
     
     Returns:
         EmailDraft with subject, body, and follow-up task
@@ -61,32 +72,42 @@ def draft_email(
         ValueError: If LLM returns invalid response after retries
     """
     
-    # Format personalization points
-    points_formatted = "\n".join(
-        f"- {point}" for point in qualification.personalization_points
-    ) or "- General interest in automation"
-    
-    # Build prompt
-    prompt = EMAIL_DRAFT_PROMPT.format(
-        offer_description=offer_description or DEFAULT_OFFER,
-        name=name or "there",
-        company=company or "your company",
-        message=message or "(No message provided)",
-        score=qualification.score,
-        key_reason=qualification.key_reason,
-        personalization_points=points_formatted,
-        enrichment_data=_format_enrichment(enrichment_data),
+    prompt = build_email_prompt(
+        name=name,
+        company=company,
+        message=message,
+        qualification=qualification,
+        enrichment_data=enrichment_data,
+        offer_description=offer_description,
     )
     
+    model = model or DRAFTING_MODEL
+    
+    # Drafts are personalized, so only exact (normalized) prompts are reused
+    cache = get_llm_cache()
+    cache_key = cache.key(model.name, model.temperature, prompt)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        try:
+            draft = _parse_email_response(cached, 0, 0, model.name)
+            draft = replace(_personalize_draft(draft, name), cache_hit=True)
+            logger.info(f"Email drafted from cache: subject='{draft.subject[:50]}...'")
+            return draft
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            logger.warning(f"Discarding unparseable cached draft: {e}")
+            cache.discard(cache_key)
+
     # Call LLM with retries
     last_error = None
     for attempt in range(MAX_RETRIES_PER_STEP + 1):
         try:
-            response, tokens_in, tokens_out = _call_llm(prompt, llm_client)
-            draft = _parse_email_response(response, tokens_in, tokens_out)
+            response, tokens_in, tokens_out = _call_llm(prompt, llm_client, model)
+            draft = _parse_email_response(response, tokens_in, tokens_out, model.name)
+            get_retry_counter().record(model.name, retries=attempt)
+            cache.set(cache_key, response)
             
             # Post-process: ensure name is in email
-            draft = _personalize_draft(draft, name)
+            draft = replace(_personalize_draft(draft, name), retries=attempt)
             
             logger.info(f"Email drafted: subject='{draft.subject[:50]}...'")
             return draft
@@ -99,24 +120,61 @@ def draft_email(
                 prompt += "\n\nIMPORTANT: Your previous response was not valid JSON. Respond ONLY with the JSON object."
     
     # All retries failed
+    get_retry_counter().record(model.name, retries=MAX_RETRIES_PER_STEP, failed=True)
     raise ValueError(f"Failed to draft email after {MAX_RETRIES_PER_STEP + 1} attempts: {last_error}")
 
 
-def _call_llm(prompt: str, client = None) -> tuple[str, int, int]:
-    """Call the LLM and return response + token count."""
-    if client is None:
-        from openai import OpenAI
-        client = OpenAI()
+def build_email_prompt(
+    name: str,
+    company: Optional[str],
+    message: Optional[str],
+    qualification: QualificationResult,
+    enrichment_data: Optional[dict] = None,
+    offer_description: Optional[str] = None,
+) -> str:
+    """Render EMAIL_DRAFT_PROMPT for one lead."""
+    points_formatted = "\n".join(
+        f"- {point}" for point in qualification.personalization_points
+    ) or "- General interest in automation"
     
-    response = client.chat.completions.create(
-        model=DRAFTING_MODEL.name,
-        messages=[
+    return EMAIL_DRAFT_PROMPT.format(
+        offer_description=offer_description or DEFAULT_OFFER,
+        name=name or "there",
+        company=company or "your company",
+        message=message or "(No message provided)",
+        score=qualification.score,
+        key_reason=qualification.key_reason,
+        personalization_points=points_formatted,
+        enrichment_data=_format_enrichment(enrichment_data),
+    )
+
+
+def draft_request(prompt: str, model: Optional[ModelConfig] = None) -> dict:
+    """Chat completion arguments for an email draft prompt."""
+    model = model or DRAFTING_MODEL
+    request = {
+        "model": model.name,
+        "messages": [
             {"role": "system", "content": "You are an expert at writing personalized, engaging outreach emails. Respond only with valid JSON."},
             {"role": "user", "content": prompt}
         ],
-        max_tokens=DRAFTING_MODEL.max_tokens,
-        temperature=DRAFTING_MODEL.temperature,
-    )
+        "max_tokens": model.max_tokens,
+        "temperature": model.temperature,
+    }
+    return with_response_format(request, "email_draft", EMAIL_OUTPUT_SCHEMA)
+
+
+def _call_llm(prompt: str, client = None, model: Optional[ModelConfig] = None) -> tuple[str, int, int]:
+    """Call the LLM and return response + token count (streamed when LLM_STREAMING is on)."""
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI()
+    
+    request = draft_request(prompt, model)
+    if streaming_enabled():
+        return call_with_schema_fallback(lambda req: stream_completion(client, req), request)
+    
+    response = call_with_schema_fallback(lambda req: client.chat.completions.create(**req), request)
     
     content = response.choices[0].message.content or ""
     tokens_in = response.usage.prompt_tokens if response.usage else 0
@@ -125,7 +183,12 @@ def _call_llm(prompt: str, client = None) -> tuple[str, int, int]:
     return content, tokens_in, tokens_out
 
 
-def _parse_email_response(response: str, tokens_in: int, tokens_out: int) -> EmailDraft:
+def _parse_email_response(
+    response: str,
+    tokens_in: int,
+    tokens_out: int,
+    model_name: Optional[str] = None,
+) -> EmailDraft:
     """Parse and validate the LLM response."""
     
     # Strip any markdown code blocks
@@ -156,7 +219,7 @@ def _parse_email_response(response: str, tokens_in: int, tokens_out: int) -> Ema
         tokens_used=tokens_in + tokens_out,
         tokens_in=tokens_in,
         tokens_out=tokens_out,
-        model_name=DRAFTING_MODEL.name,
+        model_name=model_name or DRAFTING_MODEL.name,
         raw_response=response,
     )
 
@@ -176,13 +239,7 @@ def _personalize_draft(draft: EmailDraft, name: str) -> EmailDraft:
     if name and "Hi there" in body:
         body = body.replace("Hi there", f"Hi {name}")
     
-    return EmailDraft(
-        subject=draft.subject,
-        body=body,
-        follow_up_task=draft.follow_up_task,
-        tokens_used=draft.tokens_used,
-        raw_response=draft.raw_response,
-    )
+    return replace(draft, body=body)
 
 
 def _format_enrichment(data: Optional[dict]) -> str:
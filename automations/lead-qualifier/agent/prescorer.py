@@ -0,0 +1,241 @@
+"""
+Lead Qualifier - Deterministic Pre-Scoring
+
+Cheap rule/feature scoring that runs before the LLM. Obvious junk is
+disqualified and unmistakably strong leads are qualified outright; everything
+in between goes to qualify_lead.
+"""
+
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+FREE_MAIL_DOMAINS = frozenset({
+    "aol.com",
+    "gmail.com",
+    "gmx.com",
+    "googlemail.com",
+    "hotmail.com",
+    "icloud.com",
+    "live.com",
+    "mail.com",
+    "me.com",
+    "msn.com",
+    "outlook.com",
+    "proton.me",
+    "protonmail.com",
+    "yahoo.com",
+    "yandex.com",
+    "zoho.com",
+})
+
+# Whole words like "test", "test123", "asdf", "xxxx"
+_TEST_WORD_RE = re.compile(r"^(?:test|testing|asdf|qwerty|sample|dummy|fake|x{3,})\d*$")
+TEST_DOMAINS = frozenset({"example.com", "example.org", "example.net", "test.com"})
+
+INTENT_KEYWORDS = (
+    "asap",
+    "automate",
+    "automation",
+    "budget",
+    "demo",
+    "hire",
+    "looking for",
+    "need help",
+    "pricing",
+    "proposal",
+    "quote",
+    "timeline",
+)
+
+LARGE_COMPANY_SIZES = frozenset({"50-199", "200-999", "1000+"})
+
+# Points added to a neutral 50 for each signal.
+DEFAULT_WEIGHTS = {
+    "test_lead": -100,
+    "free_mail": -20,
+    "no_company": -15,
+    "no_website": -5,
+    "empty_message": -15,
+    "short_message": -5,
+    "business_email": 5,
+    "company_given": 5,
+    "email_matches_website": 10,
+    "intent_keywords": 15,
+    "detailed_message": 10,
+    "known_industry": 5,
+    "large_company": 10,
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class PrescoreConfig:
+    """Thresholds and weights; overridable per client."""
+    enabled: bool = True
+    disqualify_below: int = 15
+    qualify_at: int = 95
+    weights: dict = field(default_factory=lambda: dict(DEFAULT_WEIGHTS))
+    free_mail_domains: frozenset = FREE_MAIL_DOMAINS
+
+    @classmethod
+    def from_env(cls, overrides: Optional[dict] = None) -> "PrescoreConfig":
+        """
+        Build config from PRESCORE_* env vars, then apply a client's
+        automation_status.config["prescore"] overrides, e.g.
+        {"qualify_at": 101, "weights": {"free_mail": -5}, "free_mail_domains": ["web.de"]}
+        """
+        config = cls(
+            enabled=os.getenv("PRESCORE_ENABLED", "true").lower() == "true",
+            disqualify_below=int(os.getenv("PRESCORE_DISQUALIFY_BELOW", "15")),
+            qualify_at=int(os.getenv("PRESCORE_QUALIFY_AT", "95")),
+        )
+        overrides = overrides or {}
+        if "enabled" in overrides:
+            config.enabled = bool(overrides["enabled"])
+        if "disqualify_below" in overrides:
+            config.disqualify_below = int(overrides["disqualify_below"])
+        if "qualify_at" in overrides:
+            config.qualify_at = int(overrides["qualify_at"])
+        config.weights.update(overrides.get("weights") or {})
+        if overrides.get("free_mail_domains"):
+            config.free_mail_domains = FREE_MAIL_DOMAINS | {
+                domain.lower() for domain in overrides["free_mail_domains"]
+            }
+        return config
+
+
+@dataclass
+class PrescoreResult:
+    """Outcome of the pre-LLM stage. label is None when the LLM should decide."""
+    score: int
+    label: Optional[str]
+    signals: list[str]
+
+    @property
+    def decided(self) -> bool:
+        return self.label is not None
+
+    @property
+    def key_reason(self) -> str:
+        return "Pre-score: " + (", ".join(self.signals) or "no signals")
+
+
+def prescore_lead(
+    email: str,
+    name: Optional[str] = None,
+    company: Optional[str] = None,
+    website: Optional[str] = None,
+    message: Optional[str] = None,
+    enrichment_data: Optional[dict] = None,
+    config: Optional[PrescoreConfig] = None,
+) -> PrescoreResult:
+    """
+    Score a lead from form fields and enrichment without calling a model.
+
+    Returns a PrescoreResult whose label is "disqualified" below
+    config.disqualify_below (unless only the short_message penalty put it
+    there), "qualified" at or above config.qualify_at, and None otherwise.
+    """
+    config = config or PrescoreConfig.from_env()
+    signals = _signals(email, name, company, website, message, enrichment_data or {}, config)
+    raw_score = 50 + sum(config.weights.get(signal, 0) for signal in signals)
+    score = max(0, min(100, raw_score))
+
+    # A short message alone is weak evidence; it must not be what disqualifies a lead
+    short_penalty = config.weights.get("short_message", 0) if "short_message" in signals else 0
+
+    label = None
+    if config.enabled:
+        if score < config.disqualify_below and raw_score - short_penalty < config.disqualify_below:
+            label = "disqualified"
+        elif score >= config.qualify_at:
+            label = "qualified"
+
+    if label:
+        logger.info(f"Lead pre-scored: {email} -> {label} ({score})")
+    return PrescoreResult(score=score, label=label, signals=signals)
+
+
+def _signals(
+    email: str,
+    name: Optional[str],
+    company: Optional[str],
+    website: Optional[str],
+    message: Optional[str],
+    enrichment: dict,
+    config: PrescoreConfig,
+) -> list[str]:
+    signals: list[str] = []
+    local_part, _, domain = (email or "").lower().rpartition("@")
+    message_text = (message or "").strip().lower()
+
+    if _looks_like_test(local_part, domain, name, company, message_text):
+        signals.append("test_lead")
+
+    if domain in config.free_mail_domains:
+        signals.append("free_mail")
+    elif domain:
+        signals.append("business_email")
+
+    if company and company.strip():
+        signals.append("company_given")
+    else:
+        signals.append("no_company")
+
+    website_domain = _website_domain(website)
+    if not website_domain:
+        signals.append("no_website")
+    elif domain and (domain == website_domain or domain.endswith("." + website_domain)):
+        signals.append("email_matches_website")
+
+    if not message_text:
+        signals.append("empty_message")
+    else:
+        if len(message_text) < 20:
+            signals.append("short_message")
+        elif len(message_text) >= 200:
+            signals.append("detailed_message")
+        # Terse messages ("Need a quote") often carry the clearest intent
+        if any(keyword in message_text for keyword in INTENT_KEYWORDS):
+            signals.append("intent_keywords")
+
+    if enrichment.get("industry") not in (None, "", "Unknown"):
+        signals.append("known_industry")
+    if enrichment.get("company_size") in LARGE_COMPANY_SIZES:
+        signals.append("large_company")
+    return signals
+
+
+def _looks_like_test(
+    local_part: str,
+    domain: str,
+    name: Optional[str],
+    company: Optional[str],
+    message_text: str,
+) -> bool:
+    if domain in TEST_DOMAINS:
+        return True
+    for value in (local_part, (name or "").lower(), (company or "").lower()):
+        words = _WORD_RE.findall(value)
+        if words and all(_TEST_WORD_RE.match(word) for word in words):
+            return True
+    return "lorem ipsum" in message_text or bool(_TEST_WORD_RE.match(message_text))
+
+
+def _website_domain(website: Optional[str]) -> Optional[str]:
+    if not website or not website.strip():
+        return None
+    url = website.strip()
+    if "://" not in url:
+        url = "https://" + url
+    host = (urlparse(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host or None
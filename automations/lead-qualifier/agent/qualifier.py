@@ -6,10 +6,15 @@ This module handles the LLM-powered lead qualification.
 
 import json
 import logging
-from typing import Optional
+from typing import Callable, Optional
 from dataclasses import dataclass
 
+from lib.llm_cache import fingerprint, get_llm_cache
+from lib.llm_stream import stream_completion, streaming_enabled
+from lib.structured_output import call_with_schema_fallback, get_retry_counter, with_response_format
+
 from .config import (
+    ModelConfig,
     REASONING_MODEL,
     QUALIFICATION_PROMPT,
     QUALIFICATION_RUBRIC,
@@ -37,6 +42,8 @@ class QualificationResult:
     tokens_out: int = 0
     model_name: Optional[str] = None
     raw_response: Optional[str] = None
+    cache_hit: bool = False
+    retries: int = 0
 
 
 def qualify_lead(
@@ -49,6 +56,8 @@ def qualify_lead(
     enrichment_data: Optional[dict] = None,
     offer_description: Optional[str] = None,
     llm_client = None,
+    on_decision: Optional[Callable[[int, str], None]] = None,
+    model: Optional[ModelConfig] = None,
 ) -> QualificationResult:
     """
     Qualify a lead using LLM reasoning.
@@ -63,6 +72,10 @@ def qualify_lead(
         enrichment_data: Dict of enrichment info (optional)
         offer_description: Custom offer description (optional)
         llm_client: OpenAI client instance (will create if not provided)
+        on_decision: Called with (score, label) as soon as both stream in,
+            before the rest of the response (streaming only)
+        model: Model to use instead of REASONING_MODEL (e.g. an admission
+            control downgrade)
     
     Returns:
         QualificationResult with score, label, and personalization points
@@ -71,25 +84,55 @@ def qualify_lead(
         ValueError: If LLM returns invalid response after retries
     """
     
-    # Build prompt
-    prompt = QUALIFICATION_PROMPT.format(
-        offer_description=offer_description or DEFAULT_OFFER,
-        rubric=QUALIFICATION_RUBRIC,
-        name=name or "Unknown",
+    prompt = build_qualification_prompt(
+        name=name,
         email=email,
-        company=company or "Not provided",
-        website=website or "Not provided",
-        message=message or "No message",
-        source=source or "Unknown",
-        enrichment_data=_format_enrichment(enrichment_data),
+        company=company,
+        website=website,
+        message=message,
+        source=source,
+        enrichment_data=enrichment_data,
+        offer_description=offer_description,
     )
     
+    model = model or REASONING_MODEL
+    
+    # Serve identical (or, with LLM_CACHE_FIELD_KEYS, same domain + message) leads from cache
+    cache = get_llm_cache()
+    cache_key = cache.key(
+        model.name,
+        model.temperature,
+        prompt,
+        fields={
+            "step": "qualify",
+            "domain": (email or "").rpartition("@")[2].lower(),
+            "company": fingerprint(company),
+            "message": fingerprint(message),
+            "offer": fingerprint(offer_description),
+        },
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        try:
+            result = _parse_qualification_response(cached, 0, 0, model.name)
+            result.cache_hit = True
+            logger.info(
+                f"Lead qualified from cache: {email} -> {result.label} ({result.score})"
+            )
+            return result
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            logger.warning(f"Discarding unparseable cached qualification: {e}")
+            cache.discard(cache_key)
+
     # Call LLM with retries
     last_error = None
     for attempt in range(MAX_RETRIES_PER_STEP + 1):
         try:
-            response, tokens_in, tokens_out = _call_llm(prompt, llm_client)
-            result = _parse_qualification_response(response, tokens_in, tokens_out)
+            response, tokens_in, tokens_out = _call_llm(prompt, llm_client, on_decision, model)
+            result = _parse_qualification_response(response, tokens_in, tokens_out, model.name)
+            result.retries = attempt
+            get_retry_counter().record(model.name, retries=attempt)
+            cache.set(cache_key, response)
             
             logger.info(
                 f"Lead qualified: {email} -> {result.label} ({result.score})"
@@ -107,29 +150,92 @@ def qualify_lead(
                 prompt += "\n\nIMPORTANT: Your previous response was not valid JSON. Respond ONLY with the JSON object."
     
     # All retries failed
+    get_retry_counter().record(model.name, retries=MAX_RETRIES_PER_STEP, failed=True)
     raise ValueError(f"Failed to qualify lead after {MAX_RETRIES_PER_STEP + 1} attempts: {last_error}")
 
 
-def _call_llm(prompt: str, client = None) -> tuple[str, int, int]:
+def build_qualification_prompt(
+    name: str,
+    email: str,
+    company: Optional[str] = None,
+    website: Optional[str] = None,
+    message: Optional[str] = None,
+    source: Optional[str] = None,
+    enrichment_data: Optional[dict] = None,
+    offer_description: Optional[str] = None,
+) -> str:
+    """Render QUALIFICATION_PROMPT for one lead."""
+    return QUALIFICATION_PROMPT.format(
+        offer_description=offer_description or DEFAULT_OFFER,
+        rubric=QUALIFICATION_RUBRIC,
+        name=name or "Unknown",
+        email=email,
+        company=company or "Not provided",
+        website=website or "Not provided",
+        message=message or "No message",
+        source=source or "Unknown",
+        enrichment_data=_format_enrichment(enrichment_data),
+    )
+
+
+def qualification_request(prompt: str, model: Optional[ModelConfig] = None) -> dict:
+    """Chat completion arguments for a qualification prompt (interactive or batch)."""
+    model = model or REASONING_MODEL
+    request = {
+        "model": model.name,
+        "messages": [
+            {"role": "system", "content": "You are a lead qualification specialist. Respond only with valid JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": model.max_tokens,
+        "temperature": model.temperature,
+    }
+    return with_response_format(request, "lead_qualification", QUALIFICATION_OUTPUT_SCHEMA)
+
+
+def parse_qualification_response(response: str, tokens_in: int = 0, tokens_out: int = 0) -> QualificationResult:
+    """Parse a raw completion (e.g. from a batch result) into a QualificationResult."""
+    return _parse_qualification_response(response, tokens_in, tokens_out)
+
+
+def _call_llm(
+    prompt: str,
+    client = None,
+    on_decision: Optional[Callable[[int, str], None]] = None,
+    model: Optional[ModelConfig] = None,
+) -> tuple[str, int, int]:
     """
     Call the LLM and return response + token count.
     
+    With LLM_STREAMING enabled the response is streamed and validated as it
+    arrives, so malformed output raises before the completion finishes.
+    
     Returns:
-        Tuple of (response_text, total_tokens)
+        Tuple of (response_text, tokens_in, tokens_out)
     """
     if client is None:
         # Import here to avoid dependency issues if not using OpenAI
         from openai import OpenAI
         client = OpenAI()
     
-    response = client.chat.completions.create(
-        model=REASONING_MODEL.name,
-        messages=[
-            {"role": "system", "content": "You are a lead qualification specialist. Respond only with valid JSON."},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=REASONING_MODEL.max_tokens,
-        temperature=REASONING_MODEL.temperature,
+    if streaming_enabled():
+        on_fields = None
+        if on_decision is not None:
+            def on_fields(fields: dict) -> None:
+                on_decision(fields["qualification_score"], fields["qualification_label"])
+        return call_with_schema_fallback(
+            lambda request: stream_completion(
+                client,
+                request,
+                watch=("qualification_score", "qualification_label"),
+                on_fields=on_fields,
+            ),
+            qualification_request(prompt, model),
+        )
+    
+    response = call_with_schema_fallback(
+        lambda request: client.chat.completions.create(**request),
+        qualification_request(prompt, model),
     )
     
     content = response.choices[0].message.content or ""
@@ -139,7 +245,12 @@ def _call_llm(prompt: str, client = None) -> tuple[str, int, int]:
     return content, tokens_in, tokens_out
 
 
-def _parse_qualification_response(response: str, tokens_in: int, tokens_out: int) -> QualificationResult:
+def _parse_qualification_response(
+    response: str,
+    tokens_in: int,
+    tokens_out: int,
+    model_name: Optional[str] = None,
+) -> QualificationResult:
     """
     Parse and validate the LLM response.
     
@@ -185,14 +296,14 @@ def _parse_qualification_response(response: str, tokens_in: int, tokens_out: int
         label=label,
         key_reason=data["key_reason"],
         personalization_points=data.get("personalization_points", []),
-        company_fit_score=data.get("company_fit_score", 0),
-        intent_score=data.get("intent_score", 0),
-        engagement_score=data.get("engagement_score", 0),
-        timing_score=data.get("timing_score", 0),
+        company_fit_score=data.get("company_fit_score") or 0,
+        intent_score=data.get("intent_score") or 0,
+        engagement_score=data.get("engagement_score") or 0,
+        timing_score=data.get("timing_score") or 0,
         tokens_used=tokens_in + tokens_out,
         tokens_in=tokens_in,
         tokens_out=tokens_out,
-        model_name=REASONING_MODEL.name,
+        model_name=model_name or REASONING_MODEL.name,
         raw_response=response,
     )
 
@@ -242,6 +242,115 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Batch variant: leases up to max_jobs in one round trip.
+
+CREATE OR REPLACE FUNCTION claim_jobs(worker_id TEXT, lease_seconds INT, max_jobs INT)
+RETURNS SETOF jobs_queue AS $$
+BEGIN
+  RETURN QUERY
+  WITH next_jobs AS (
+    SELECT id
+    FROM jobs_queue
+    WHERE status = 'queued'
+      AND next_run_at <= NOW()
+      AND (locked_until IS NULL OR locked_until < NOW())
+    ORDER BY created_at ASC
+    FOR UPDATE SKIP LOCKED
+    LIMIT max_jobs
+  )
+  UPDATE jobs_queue
+  SET status = 'processing',
+      locked_until = NOW() + make_interval(secs => lease_seconds),
+      locked_by = worker_id,
+      attempts = attempts + 1,
+      updated_at = NOW()
+  WHERE id IN (SELECT id FROM next_jobs)
+  RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Wakes LISTENing workers when a job becomes claimable (insert or requeue).
+
+CREATE OR REPLACE FUNCTION notify_jobs_queue()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM pg_notify('jobs_queue', NEW.id::text);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notify_jobs_queue ON jobs_queue;
+CREATE TRIGGER notify_jobs_queue
+    AFTER INSERT OR UPDATE OF status ON jobs_queue
+    FOR EACH ROW
+    WHEN (NEW.status = 'queued')
+    EXECUTE FUNCTION notify_jobs_queue();
+
+-- Atomic intake: dedupe on idempotency_key, create the run and enqueue its
+-- job in one transaction. Concurrent webhooks with the same key wait on the
+-- unique index and the loser gets 'duplicate'.
+
+CREATE OR REPLACE FUNCTION intake_lead(
+  intake_client_id UUID,
+  intake_idempotency_key TEXT,
+  intake_email TEXT,
+  intake_trigger_payload JSONB,
+  intake_job_payload JSONB
+)
+RETURNS JSONB AS $$
+DECLARE
+  new_run_id UUID;
+  new_job_id UUID;
+BEGIN
+  INSERT INTO runs (client_id, idempotency_key, lead_email, automation_name, trigger_type, trigger_payload, status)
+  VALUES (intake_client_id, intake_idempotency_key, intake_email, 'lead-qualifier', 'webhook', intake_trigger_payload, 'queued')
+  ON CONFLICT (idempotency_key) DO NOTHING
+  RETURNING id INTO new_run_id;
+
+  IF new_run_id IS NULL THEN
+    SELECT id INTO new_run_id FROM runs WHERE idempotency_key = intake_idempotency_key;
+    RETURN jsonb_build_object('status', 'duplicate', 'run_id', new_run_id);
+  END IF;
+
+  INSERT INTO jobs_queue (client_id, lead_email, payload, status, job_type)
+  VALUES (
+    intake_client_id,
+    intake_email,
+    intake_job_payload || jsonb_build_object('run_id', new_run_id),
+    'queued',
+    'lead_qualify'
+  )
+  RETURNING id INTO new_job_id;
+
+  RETURN jsonb_build_object('status', 'queued', 'run_id', new_run_id, 'job_id', new_job_id);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Bulk intake: intake_lead for every item in one transaction, so a batch
+-- never leaves runs without jobs. Items: [{idempotency_key, email,
+-- trigger_payload, job_payload}]; returns intake_lead's result per item, in
+-- order, with its idempotency_key.
+CREATE OR REPLACE FUNCTION intake_leads(intake_client_id UUID, intake_items JSONB)
+RETURNS JSONB AS $$
+DECLARE
+  item JSONB;
+  results JSONB := '[]'::jsonb;
+BEGIN
+  FOR item IN SELECT value FROM jsonb_array_elements(intake_items) LOOP
+    results := results || jsonb_build_array(
+      intake_lead(
+        intake_client_id,
+        item->>'idempotency_key',
+        item->>'email',
+        item->'trigger_payload',
+        item->'job_payload'
+      ) || jsonb_build_object('idempotency_key', item->>'idempotency_key')
+    );
+  END LOOP;
+  RETURN results;
+END;
+$$ LANGUAGE plpgsql;
+
 -- =============================================================================
 -- SUPPRESSION_LIST TABLE
 -- =============================================================================
@@ -274,6 +383,9 @@ CREATE TABLE IF NOT EXISTS automation_status (
     paused_by TEXT,
     pause_reason TEXT,
     
+    -- Per-client settings, e.g. {"prescore": {"qualify_at": 101}}
+    config JSONB,
+    
     -- Timestamps
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW(),
@@ -281,6 +393,8 @@ CREATE TABLE IF NOT EXISTS automation_status (
     UNIQUE(client_id, automation_name)
 );
 
+ALTER TABLE automation_status ADD COLUMN IF NOT EXISTS config JSONB;
+
 -- =============================================================================
 -- HELPER FUNCTIONS
 -- =============================================================================
@@ -489,6 +603,62 @@ CREATE INDEX IF NOT EXISTS idx_cost_events_client ON cost_events(client_id, crea
 CREATE INDEX IF NOT EXISTS idx_cost_events_category ON cost_events(category);
 CREATE INDEX IF NOT EXISTS idx_cost_events_automation ON cost_events(automation_name);
 
+-- =============================================================================
+-- BUDGET_LEDGER TABLE
+-- =============================================================================
+-- Shared monthly spend counters ('global' plus one row per client) so every
+-- worker and API process enforces the same budget. Processes reserve spend in
+-- small chunks through budget_add and release what they did not use.
+
+CREATE TABLE IF NOT EXISTS budget_ledger (
+    period TEXT NOT NULL,  -- YYYY-MM (UTC)
+    scope TEXT NOT NULL,   -- 'global' or a client_id
+    spent_usd NUMERIC(14, 6) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (period, scope)
+);
+
+CREATE OR REPLACE FUNCTION budget_add(ledger_period TEXT, ledger_client_id TEXT, amount_usd NUMERIC)
+RETURNS JSONB AS $$
+DECLARE
+  global_total NUMERIC;
+  client_total NUMERIC;
+BEGIN
+  INSERT INTO budget_ledger (period, scope, spent_usd)
+  VALUES (ledger_period, 'global', amount_usd)
+  ON CONFLICT (period, scope)
+  DO UPDATE SET spent_usd = budget_ledger.spent_usd + EXCLUDED.spent_usd, updated_at = NOW()
+  RETURNING spent_usd INTO global_total;
+
+  INSERT INTO budget_ledger (period, scope, spent_usd)
+  VALUES (ledger_period, ledger_client_id, amount_usd)
+  ON CONFLICT (period, scope)
+  DO UPDATE SET spent_usd = budget_ledger.spent_usd + EXCLUDED.spent_usd, updated_at = NOW()
+  RETURNING spent_usd INTO client_total;
+
+  RETURN jsonb_build_object('global', global_total, 'client', client_total);
+END;
+$$ LANGUAGE plpgsql;
+
+-- =============================================================================
+-- STATUS COUNTS FUNCTION
+-- =============================================================================
+-- Per-status row counts in one GROUP BY (dashboard + KPI snapshots).
+-- target_client_id NULL counts across all clients.
+
+CREATE OR REPLACE FUNCTION status_counts(target_table TEXT, target_client_id UUID DEFAULT NULL)
+RETURNS TABLE(status TEXT, count BIGINT) AS $$
+BEGIN
+  IF target_table NOT IN ('jobs_queue', 'runs', 'outbox_emails') THEN
+    RAISE EXCEPTION 'status_counts: unsupported table %', target_table;
+  END IF;
+  RETURN QUERY EXECUTE format(
+    'SELECT status, COUNT(*) FROM %I WHERE $1 IS NULL OR client_id = $1 GROUP BY status',
+    target_table
+  ) USING target_client_id;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
 -- =============================================================================
 -- ROW LEVEL SECURITY (Optional but recommended)
 -- =============================================================================
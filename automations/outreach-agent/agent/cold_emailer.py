@@ -3,7 +3,15 @@ import logging
 from dataclasses import dataclass
 from typing import Optional
 
-from .config import OUTREACH_MODEL, COLD_EMAIL_PROMPT
+from lib.llm_stream import astream_completion, stream_completion, streaming_enabled
+from lib.structured_output import (
+    acall_with_schema_fallback,
+    call_with_schema_fallback,
+    get_retry_counter,
+    with_response_format,
+)
+
+from .config import OUTREACH_MODEL, COLD_EMAIL_PROMPT, EMAIL_OUTPUT_SCHEMA, MAX_RETRIES_PER_STEP
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +36,61 @@ def draft_cold_email(
     notes: Optional[str] = None,
     llm_client=None,
 ) -> ColdEmailDraft:
-    prompt = COLD_EMAIL_PROMPT.format(
+    prompt = _build_prompt(name, role, company, website, pain_points, notes)
+    last_error = None
+    for attempt in range(MAX_RETRIES_PER_STEP + 1):
+        try:
+            response, tokens_in, tokens_out = _call_llm(prompt, llm_client)
+            draft = _build_draft(response, tokens_in, tokens_out)
+            get_retry_counter().record(OUTREACH_MODEL.name, retries=attempt)
+            return draft
+        except (json.JSONDecodeError, KeyError, ValueError) as exc:
+            last_error = exc
+            logger.warning("Cold email attempt %s failed: %s", attempt + 1, exc)
+            prompt = _retry_prompt(prompt)
+    get_retry_counter().record(OUTREACH_MODEL.name, retries=MAX_RETRIES_PER_STEP, failed=True)
+    raise ValueError(f"Failed to draft cold email after {MAX_RETRIES_PER_STEP + 1} attempts: {last_error}")
+
+
+async def draft_cold_email_async(
+    name: str,
+    role: Optional[str],
+    company: Optional[str],
+    website: Optional[str],
+    pain_points: Optional[str],
+    notes: Optional[str] = None,
+    llm_client=None,
+) -> ColdEmailDraft:
+    """Same as draft_cold_email, but awaits an AsyncOpenAI-compatible client."""
+    prompt = _build_prompt(name, role, company, website, pain_points, notes)
+    last_error = None
+    for attempt in range(MAX_RETRIES_PER_STEP + 1):
+        try:
+            response, tokens_in, tokens_out = await _call_llm_async(prompt, llm_client)
+            draft = _build_draft(response, tokens_in, tokens_out)
+            get_retry_counter().record(OUTREACH_MODEL.name, retries=attempt)
+            return draft
+        except (json.JSONDecodeError, KeyError, ValueError) as exc:
+            last_error = exc
+            logger.warning("Cold email attempt %s failed: %s", attempt + 1, exc)
+            prompt = _retry_prompt(prompt)
+    get_retry_counter().record(OUTREACH_MODEL.name, retries=MAX_RETRIES_PER_STEP, failed=True)
+    raise ValueError(f"Failed to draft cold email after {MAX_RETRIES_PER_STEP + 1} attempts: {last_error}")
+
+
+def _retry_prompt(prompt: str) -> str:
+    return prompt + "\n\nIMPORTANT: Your previous response was not valid JSON. Respond ONLY with the JSON object."
+
+
+def _build_prompt(
+    name: str,
+    role: Optional[str],
+    company: Optional[str],
+    website: Optional[str],
+    pain_points: Optional[str],
+    notes: Optional[str],
+) -> str:
+    return COLD_EMAIL_PROMPT.format(
         name=name or "there",
         role=role or "unknown",
         company=company or "your company",
@@ -37,7 +99,8 @@ def draft_cold_email(
         notes=notes or "n/a",
     )
 
-    response, tokens_in, tokens_out = _call_llm(prompt, llm_client)
+
+def _build_draft(response: str, tokens_in: int, tokens_out: int) -> ColdEmailDraft:
     draft = _parse_response(response)
     return ColdEmailDraft(
         subject=draft["email_subject"],
@@ -50,28 +113,59 @@ def draft_cold_email(
     )
 
 
-def _call_llm(prompt: str, client=None) -> tuple[str, int, int]:
-    if client is None:
-        from openai import OpenAI
-
-        client = OpenAI()
-
-    response = client.chat.completions.create(
-        model=OUTREACH_MODEL.name,
-        messages=[
+def _completion_kwargs(prompt: str) -> dict:
+    request = {
+        "model": OUTREACH_MODEL.name,
+        "messages": [
             {"role": "system", "content": "Respond only with valid JSON."},
             {"role": "user", "content": prompt},
         ],
-        max_tokens=OUTREACH_MODEL.max_tokens,
-        temperature=OUTREACH_MODEL.temperature,
-    )
+        "max_tokens": OUTREACH_MODEL.max_tokens,
+        "temperature": OUTREACH_MODEL.temperature,
+    }
+    return with_response_format(request, "cold_email", EMAIL_OUTPUT_SCHEMA)
 
+
+def _read_completion(response) -> tuple[str, int, int]:
     content = response.choices[0].message.content or ""
     tokens_in = response.usage.prompt_tokens if response.usage else 0
     tokens_out = response.usage.completion_tokens if response.usage else 0
     return content, tokens_in, tokens_out
 
 
+def _call_llm(prompt: str, client=None) -> tuple[str, int, int]:
+    if client is None:
+        from openai import OpenAI
+
+        client = OpenAI()
+
+    if streaming_enabled():
+        return call_with_schema_fallback(
+            lambda request: stream_completion(client, request), _completion_kwargs(prompt)
+        )
+    response = call_with_schema_fallback(
+        lambda request: client.chat.completions.create(**request), _completion_kwargs(prompt)
+    )
+    return _read_completion(response)
+
+
+async def _call_llm_async(prompt: str, client=None) -> tuple[str, int, int]:
+    if client is None:
+        from openai import AsyncOpenAI
+
+        async with AsyncOpenAI() as owned_client:
+            return await _call_llm_async(prompt, owned_client)
+
+    if streaming_enabled():
+        return await acall_with_schema_fallback(
+            lambda request: astream_completion(client, request), _completion_kwargs(prompt)
+        )
+    response = await acall_with_schema_fallback(
+        lambda request: client.chat.completions.create(**request), _completion_kwargs(prompt)
+    )
+    return _read_completion(response)
+
+
 def _parse_response(response: str) -> dict:
     clean_response = response.strip()
     if clean_response.startswith("```"):
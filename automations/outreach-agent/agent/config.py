@@ -9,6 +9,9 @@ class ModelConfig:
     temperature: float
 
 
+MAX_RETRIES_PER_STEP = int(os.getenv("MAX_RETRIES_PER_STEP", "2"))
+
+
 OUTREACH_MODEL = ModelConfig(
     name=os.getenv("OUTREACH_MODEL", "gpt-4o-mini"),
     max_tokens=1200,
@@ -42,3 +45,14 @@ Respond with ONLY valid JSON:
   "follow_up_task": "<optional follow-up>"
 }}
 """
+
+
+EMAIL_OUTPUT_SCHEMA = {
+    "type": "object",
+    "required": ["email_subject", "email_body"],
+    "properties": {
+        "email_subject": {"type": "string", "maxLength": 100},
+        "email_body": {"type": "string", "maxLength": 2000},
+        "follow_up_task": {"type": "string", "maxLength": 200},
+    },
+}
@@ -3,9 +3,11 @@ import logging
 from dataclasses import dataclass
 from typing import Optional
 
+import httpx
 import requests
 
 from lib import db as db_lib
+from lib import db_async
 from lib.training import build_sales_prompt
 from .scripts import build_call_script
 
@@ -37,28 +39,124 @@ def place_call(phone_number: str, script: str, metadata: Optional[dict] = None)
         session = create_session(client_id=client_id, crm_lead_id=metadata.get("lead_id"), metadata=metadata)
         session_id = session.get("id")
 
-    api_url = None
-    api_key = None
     provider = provider.lower()
-    if provider == "vapi":
-        api_url = os.getenv("VAPI_API_URL")
-        api_key = os.getenv("VAPI_API_KEY")
-    elif provider == "bland":
-        api_url = os.getenv("BLAND_API_URL")
-        api_key = os.getenv("BLAND_API_KEY")
-    else:
-        api_url = os.getenv("VOICE_API_URL")
-        api_key = os.getenv("VOICE_API_KEY")
-    if not api_url or not api_key:
+    request = _call_request(provider, phone_number, script, metadata, session_id)
+    if request is None:
         return CallResult(status="error", summary="Voice provider API not configured")
 
+    api_url, payload, headers = request
+    try:
+        response = requests.post(api_url, json=payload, headers=headers, timeout=10)
+        result, turn = _call_queued(provider, response)
+    except Exception as exc:
+        result, turn = _call_failed(exc)
+    if session_id:
+        db_lib.add_voice_turn(db_lib.get_supabase_client(), session_id, **turn)
+    return result
+
+
+async def place_call_async(
+    phone_number: str,
+    script: str,
+    metadata: Optional[dict] = None,
+    http_client: Optional[httpx.AsyncClient] = None,
+) -> CallResult:
+    """Non-blocking place_call for the API: async DB writes and provider POST."""
+    provider = os.getenv("VOICE_PROVIDER")
+    if not provider:
+        return CallResult(status="skipped", summary="VOICE_PROVIDER not configured")
+
+    metadata = metadata or {}
+    script = script or build_call_script(metadata.get("name"), metadata.get("company"))
+
+    client_id = metadata.get("client_id")
+    session_id = None
+    db = None
+    if client_id:
+        db = await db_async.get_async_supabase_client()
+        session = await db_async.create_voice_session(
+            db,
+            client_id=client_id,
+            crm_lead_id=metadata.get("lead_id"),
+            metadata=metadata,
+            channel="web",
+        )
+        session_id = session.get("id")
+
+    provider = provider.lower()
+    request = _call_request(provider, phone_number, script, metadata, session_id)
+    if request is None:
+        return CallResult(status="error", summary="Voice provider API not configured")
+
+    api_url, payload, headers = request
+    try:
+        if http_client is None:
+            async with httpx.AsyncClient(timeout=10) as owned_client:
+                response = await owned_client.post(api_url, json=payload, headers=headers)
+        else:
+            response = await http_client.post(api_url, json=payload, headers=headers, timeout=10)
+        result, turn = _call_queued(provider, response)
+    except Exception as exc:
+        result, turn = _call_failed(exc)
+    if session_id:
+        await db_async.add_voice_turn(db, session_id, **turn)
+    return result
+
+
+def _call_request(
+    provider: str,
+    phone_number: str,
+    script: str,
+    metadata: dict,
+    session_id: Optional[str],
+) -> Optional[tuple[str, dict, dict]]:
+    """URL, JSON body and headers for the provider call; None if its API is not configured."""
+    api_url, api_key = _provider_config(provider)
+    if not api_url or not api_key:
+        return None
     if session_id:
         metadata["session_id"] = session_id
+    payload = _provider_payload(provider, phone_number, script, metadata)
+    return api_url, payload, {"Authorization": f"Bearer {api_key}"}
+
+
+def _call_queued(provider: str, response) -> tuple[CallResult, dict]:
+    """Result and session turn for a provider response (requests or httpx); raises on HTTP errors."""
+    response.raise_for_status()
+    data = response.json() if response.content else {}
+    call_id = data.get("call_id") or data.get("id") or "voice-call"
+    turn = {
+        "role": "system",
+        "content": f"Call queued via {provider}",
+        "action": "call_queued",
+        "confidence": 1.0,
+    }
+    return CallResult(status="queued", call_id=call_id, summary="Call queued"), turn
+
+
+def _call_failed(exc: Exception) -> tuple[CallResult, dict]:
+    logger.error("Voice provider call failed: %s", exc)
+    turn = {
+        "role": "system",
+        "content": f"Call failed: {exc}",
+        "action": "call_failed",
+        "confidence": 0.2,
+    }
+    return CallResult(status="error", summary=str(exc)), turn
+
 
-    # Build provider-specific payload
+def _provider_config(provider: str) -> tuple[Optional[str], Optional[str]]:
+    if provider == "vapi":
+        return os.getenv("VAPI_API_URL"), os.getenv("VAPI_API_KEY")
+    if provider == "bland":
+        return os.getenv("BLAND_API_URL"), os.getenv("BLAND_API_KEY")
+    return os.getenv("VOICE_API_URL"), os.getenv("VOICE_API_KEY")
+
+
+def _provider_payload(provider: str, phone_number: str, script: str, metadata: dict) -> dict:
     if provider == "vapi":
         # Vapi expects: phoneNumberId, customer.number, and assistant config
-        payload = {
+        return {
             "customer": {
                 "number": phone_number,
             },
@@ -81,46 +179,12 @@ def place_call(phone_number: str, script: str, metadata: Optional[dict] = None)
             },
             "metadata": metadata,
         }
-    else:
-        payload = {
-            "to": phone_number,
-            "script": script,
-            "metadata": metadata,
-            "provider": provider,
-        }
-
-    try:
-        response = requests.post(
-            api_url,
-            json=payload,
-            headers={"Authorization": f"Bearer {api_key}"},
-            timeout=10,
-        )
-        response.raise_for_status()
-        data = response.json() if response.content else {}
-        call_id = data.get("call_id") or data.get("id") or "voice-call"
-        if session_id:
-            db_lib.add_voice_turn(
-                db_lib.get_supabase_client(),
-                session_id,
-                role="system",
-                content=f"Call queued via {provider}",
-                action="call_queued",
-                confidence=1.0,
-            )
-        return CallResult(status="queued", call_id=call_id, summary="Call queued")
-    except Exception as exc:
-        logger.error("Voice provider call failed: %s", exc)
-        if session_id:
-            db_lib.add_voice_turn(
-                db_lib.get_supabase_client(),
-                session_id,
-                role="system",
-                content=f"Call failed: {exc}",
-                action="call_failed",
-                confidence=0.2,
-            )
-        return CallResult(status="error", summary=str(exc))
+    return {
+        "to": phone_number,
+        "script": script,
+        "metadata": metadata,
+        "provider": provider,
+    }
 
 
 def create_session(
@@ -146,6 +210,38 @@ def handle_turn(session_id: str, transcript: str, context: Optional[dict] = None
         return {"status": "error", "error": "session_not_found"}
 
     db_lib.add_voice_turn(db, session_id, role="user", content=transcript)
+    result = _turn_reply(transcript, context)
+    db_lib.add_voice_turn(
+        db,
+        session_id,
+        role="assistant",
+        content=result["response"],
+        action=result["action"],
+        confidence=0.75,
+    )
+    return result
+
+
+async def handle_turn_async(session_id: str, transcript: str, context: Optional[dict] = None) -> dict:
+    db = await db_async.get_async_supabase_client()
+    session = await db_async.get_voice_session(db, session_id)
+    if not session:
+        return {"status": "error", "error": "session_not_found"}
+
+    await db_async.add_voice_turn(db, session_id, role="user", content=transcript)
+    result = _turn_reply(transcript, context)
+    await db_async.add_voice_turn(
+        db,
+        session_id,
+        role="assistant",
+        content=result["response"],
+        action=result["action"],
+        confidence=0.75,
+    )
+    return result
+
+
+def _turn_reply(transcript: str, context: Optional[dict]) -> dict:
     prompt = build_sales_prompt(
         role="voice_sales",
         product_summary=(context or {}).get("product_summary", "AI automation services"),
@@ -156,15 +252,6 @@ def handle_turn(session_id: str, transcript: str, context: Optional[dict] = None
         "Thanks for sharing. I can give a quick overview and then we can decide "
         "if a short follow-up makes sense. What would be the best next step for you?"
     )
-    db_lib.add_voice_turn(
-        db,
-        session_id,
-        role="assistant",
-        content=response_text,
-        action="ask_next_step",
-        confidence=0.75,
-    )
-
     return {
         "status": "ok",
         "response": response_text,
@@ -0,0 +1,122 @@
+"""
+Admission control for LLM calls.
+Projects the cost of each candidate request before it is sent and picks the
+best one that fits the run's remaining allowance and the monthly budget.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from lib.token_estimator import TokenEstimator, get_token_estimator
+
+
+@dataclass
+class AdmissionOption:
+    """One way to make the call, in order of preference."""
+    model: str
+    messages: list[dict]
+    max_output_tokens: int
+    truncated: bool = False
+    context: Any = None  # caller data needed to make the call (model config, enrichment, ...)
+
+
+@dataclass
+class AdmissionDecision:
+    action: str  # allow, downgrade, truncate, refuse
+    option: Optional[AdmissionOption]
+    projected_cost_usd: float
+    limit_usd: Optional[float]
+    reason: str = ""
+    projections: dict = field(default_factory=dict)
+
+    @property
+    def admitted(self) -> bool:
+        return self.option is not None
+
+    def as_step(self, stage: str) -> dict:
+        return {
+            "step": "admission",
+            "stage": stage,
+            "status": self.action,
+            "model": self.option.model if self.option else None,
+            "truncated": bool(self.option and self.option.truncated),
+            "projected_cost_usd": round(self.projected_cost_usd, 6),
+            "limit_usd": None if self.limit_usd is None else round(self.limit_usd, 6),
+        }
+
+
+def admission_enabled() -> bool:
+    return os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+
+
+def admit(
+    options: list[AdmissionOption],
+    spent_usd: float = 0.0,
+    max_cost_usd: Optional[float] = None,
+    budget_remaining_usd: Optional[float] = None,
+    estimator: Optional[TokenEstimator] = None,
+) -> AdmissionDecision:
+    """
+    Return the first option whose projected cost fits both the per-run
+    allowance (max_cost_usd - spent_usd) and budget_remaining_usd.
+
+    Options after the first are fallbacks: a different model is reported as
+    "downgrade", the same model with truncated context as "truncate". When
+    nothing fits the decision is "refuse" with the cheapest projection.
+    """
+    estimator = estimator or get_token_estimator()
+    limits = []
+    if max_cost_usd is not None:
+        limits.append(max_cost_usd - spent_usd)
+    if budget_remaining_usd is not None:
+        limits.append(budget_remaining_usd)
+    limit = min(limits) if limits else None
+
+    projections: dict[str, float] = {}
+    cheapest = None
+    for index, option in enumerate(options):
+        cost = estimator.estimate_cost(option.model, option.messages, option.max_output_tokens)
+        projections[f"{option.model}{' (truncated)' if option.truncated else ''}"] = round(cost, 6)
+        if cheapest is None or cost < cheapest:
+            cheapest = cost
+        if limit is None or cost <= limit:
+            if index == 0:
+                action = "allow"
+            elif option.model != options[0].model:
+                action = "downgrade"
+            else:
+                action = "truncate"
+            return AdmissionDecision(action, option, cost, limit, projections=projections)
+
+    return AdmissionDecision(
+        "refuse",
+        None,
+        cheapest or 0.0,
+        limit,
+        reason=f"projected ${cheapest or 0.0:.4f} exceeds remaining ${limit:.4f}",
+        projections=projections,
+    )
+
+
+def truncate_enrichment(data: Optional[dict], max_chars: Optional[int] = None) -> Optional[dict]:
+    """Shorten free-text enrichment values (and drop URLs) to cut prompt size."""
+    if not data:
+        return data
+    max_chars = (
+        max_chars
+        if max_chars is not None
+        else int(os.getenv("ADMISSION_ENRICHMENT_MAX_CHARS", "160"))
+    )
+    truncated = {}
+    for key, value in data.items():
+        if key.endswith("_url"):
+            continue
+        if isinstance(value, str) and len(value) > max_chars:
+            value = value[:max_chars].rstrip() + "..."
+        elif isinstance(value, list):
+            value = value[:3]
+        truncated[key] = value
+    return truncated
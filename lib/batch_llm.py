@@ -0,0 +1,184 @@
+"""
+Batch LLM backends.
+Submit many chat-completion requests at once and collect the results later,
+via the OpenAI Batch API or a local file-based stand-in for development and
+tests.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from typing import Callable, Optional
+
+# Batch API pricing relative to interactive calls.
+BATCH_PRICE_MULTIPLIER = float(os.getenv("LLM_BATCH_PRICE_MULTIPLIER", "0.5"))
+
+PENDING_STATUSES = frozenset({"validating", "in_progress", "finalizing"})
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+
+
+def _request_lines(requests: list[dict]) -> str:
+    """requests: [{"custom_id": ..., "body": chat completion kwargs}]"""
+    return "\n".join(
+        json.dumps(
+            {
+                "custom_id": request["custom_id"],
+                "method": "POST",
+                "url": CHAT_COMPLETIONS_URL,
+                "body": request["body"],
+            }
+        )
+        for request in requests
+    )
+
+
+def parse_output_lines(text: str) -> dict[str, dict]:
+    """
+    Parse batch output JSONL into
+    {custom_id: {"content", "tokens_in", "tokens_out", "error"}}.
+    """
+    results: dict[str, dict] = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        error = record.get("error")
+        if not error and response.get("status_code", 200) >= 400:
+            error = body.get("error") or f"status {response.get('status_code')}"
+        choices = body.get("choices") or [{}]
+        usage = body.get("usage") or {}
+        results[record["custom_id"]] = {
+            "content": (choices[0].get("message") or {}).get("content") or "",
+            "tokens_in": usage.get("prompt_tokens", 0),
+            "tokens_out": usage.get("completion_tokens", 0),
+            "error": error,
+        }
+    return results
+
+
+class OpenAIBatchBackend:
+    """
+    OpenAI Batch API (24h completion window, discounted pricing).
+
+    Usage:
+        backend = OpenAIBatchBackend()
+        batch_id = backend.submit([{"custom_id": "lead-0", "body": {...}}])
+        if backend.status(batch_id) == "completed":
+            results = backend.results(batch_id)
+    """
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI()
+        return self._client
+
+    def submit(self, requests: list[dict]) -> str:
+        upload = self.client.files.create(
+            file=("batch.jsonl", _request_lines(requests).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint=CHAT_COMPLETIONS_URL,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> dict[str, dict]:
+        batch = self.client.batches.retrieve(batch_id)
+        results: dict[str, dict] = {}
+        for file_id in (batch.error_file_id, batch.output_file_id):
+            if file_id:
+                results.update(parse_output_lines(self.client.files.content(file_id).text))
+        return results
+
+
+class FileBatchBackend:
+    """
+    Local stand-in that mirrors the Batch API file formats.
+
+    submit() writes <batch_id>.input.jsonl; the batch counts as completed once
+    <batch_id>.output.jsonl exists. With a responder(body) -> content callable
+    the output is written immediately, which is what tests use.
+    """
+
+    def __init__(self, directory: str, responder: Optional[Callable[[dict], str]] = None):
+        self.directory = directory
+        self.responder = responder
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, batch_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}.{kind}.jsonl")
+
+    def submit(self, requests: list[dict]) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        with open(self._path(batch_id, "input"), "w", encoding="utf-8") as handle:
+            handle.write(_request_lines(requests))
+        if self.responder is not None:
+            self.complete(batch_id)
+        return batch_id
+
+    def complete(self, batch_id: str) -> None:
+        """Answer every request in a submitted batch with the responder."""
+        lines = []
+        with open(self._path(batch_id, "input"), encoding="utf-8") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                content = self.responder(request["body"])
+                prompt_chars = sum(len(m.get("content") or "") for m in request["body"].get("messages", []))
+                lines.append(
+                    json.dumps(
+                        {
+                            "id": f"req_{uuid.uuid4().hex[:12]}",
+                            "custom_id": request["custom_id"],
+                            "response": {
+                                "status_code": 200,
+                                "body": {
+                                    "choices": [{"message": {"role": "assistant", "content": content}}],
+                                    "usage": {
+                                        "prompt_tokens": prompt_chars // 4,
+                                        "completion_tokens": len(content) // 4,
+                                    },
+                                },
+                            },
+                            "error": None,
+                        }
+                    )
+                )
+        with open(self._path(batch_id, "output"), "w", encoding="utf-8") as handle:
+            handle.write("\n".join(lines))
+
+    def status(self, batch_id: str) -> str:
+        if os.path.exists(self._path(batch_id, "output")):
+            return "completed"
+        if os.path.exists(self._path(batch_id, "input")):
+            return "in_progress"
+        return "failed"
+
+    def results(self, batch_id: str) -> dict[str, dict]:
+        with open(self._path(batch_id, "output"), encoding="utf-8") as handle:
+            return parse_output_lines(handle.read())
+
+
+def get_batch_backend():
+    """Backend selected by LLM_BATCH_BACKEND (openai | file)."""
+    backend = os.getenv("LLM_BATCH_BACKEND", "openai").lower()
+    if backend == "file":
+        return FileBatchBackend(os.getenv("LLM_BATCH_DIR", ".llm_batches"))
+    return OpenAIBatchBackend()
@@ -0,0 +1,275 @@
+"""
+Shared monthly budget ledger.
+Global and per-client spend counters that every worker and API process
+updates, so MONTHLY_BUDGET_USD holds across processes. Spend is reserved in
+chunks so most charges are checked against a local lease without a round
+trip.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_SCOPE = "global"
+
+
+def current_period() -> str:
+    return datetime.utcnow().strftime("%Y-%m")
+
+
+class SupabaseLedgerStore:
+    """budget_ledger table via the budget_add RPC."""
+
+    def __init__(self, db_client):
+        self.db_client = db_client
+
+    def add(self, period: str, client_id: str, amount_usd: float) -> tuple[float, float]:
+        from lib import db as db_lib
+
+        return db_lib.budget_add(self.db_client, period, client_id, amount_usd)
+
+    def get(self, period: str, client_id: str) -> tuple[float, float]:
+        from lib import db as db_lib
+
+        return db_lib.budget_totals(self.db_client, period, client_id)
+
+
+class SQLiteLedgerStore:
+    """Same contract as the RPC, for processes sharing a host (and for tests)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS budget_ledger ("
+                "period TEXT NOT NULL, scope TEXT NOT NULL, spent_usd REAL NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (period, scope))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def add(self, period: str, client_id: str, amount_usd: float) -> tuple[float, float]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            totals = []
+            for scope in (GLOBAL_SCOPE, client_id):
+                conn.execute(
+                    "INSERT INTO budget_ledger (period, scope, spent_usd) VALUES (?, ?, ?) "
+                    "ON CONFLICT (period, scope) DO UPDATE SET spent_usd = spent_usd + excluded.spent_usd",
+                    (period, scope, amount_usd),
+                )
+                row = conn.execute(
+                    "SELECT spent_usd FROM budget_ledger WHERE period = ? AND scope = ?",
+                    (period, scope),
+                ).fetchone()
+                totals.append(float(row[0]))
+            conn.execute("COMMIT")
+            return totals[0], totals[1]
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def get(self, period: str, client_id: str) -> tuple[float, float]:
+        conn = self._connect()
+        try:
+            rows = dict(
+                conn.execute(
+                    "SELECT scope, spent_usd FROM budget_ledger WHERE period = ? AND scope IN (?, ?)",
+                    (period, GLOBAL_SCOPE, client_id),
+                ).fetchall()
+            )
+        finally:
+            conn.close()
+        return float(rows.get(GLOBAL_SCOPE, 0.0)), float(rows.get(client_id, 0.0))
+
+
+class MemoryLedgerStore:
+    """Single-process fallback when no shared store is configured."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: dict[tuple[str, str], float] = {}
+
+    def add(self, period: str, client_id: str, amount_usd: float) -> tuple[float, float]:
+        with self._lock:
+            for scope in (GLOBAL_SCOPE, client_id):
+                self._totals[(period, scope)] = self._totals.get((period, scope), 0.0) + amount_usd
+            return self._totals[(period, GLOBAL_SCOPE)], self._totals[(period, client_id)]
+
+    def get(self, period: str, client_id: str) -> tuple[float, float]:
+        with self._lock:
+            return (
+                self._totals.get((period, GLOBAL_SCOPE), 0.0),
+                self._totals.get((period, client_id), 0.0),
+            )
+
+
+class BudgetLedger:
+    """
+    Cross-process budget counters with a local reservation cache.
+
+    Usage:
+        ledger = get_budget_ledger(db)
+        if not ledger.allows(client_id):
+            raise KillSwitchTriggered("budget_exceeded")
+        ledger.charge(client_id, cost_usd)
+
+    charge() draws from a per-client lease reserved in the shared store in
+    BUDGET_RESERVATION_USD chunks, so the store is only hit when a lease runs
+    out. Reserved-but-unspent amounts count as spent until release() (called
+    at shutdown) returns them, which keeps enforcement conservative: total
+    overshoot is bounded by one chunk per process. Totals seen by allows()
+    are refreshed at most every BUDGET_SYNC_SECONDS.
+    """
+
+    def __init__(
+        self,
+        store,
+        global_limit_usd: Optional[float] = None,
+        client_limit_usd: Optional[float] = None,
+        reservation_usd: Optional[float] = None,
+        sync_seconds: Optional[float] = None,
+    ):
+        self.store = store
+        self.global_limit_usd = (
+            global_limit_usd
+            if global_limit_usd is not None
+            else float(os.getenv("MONTHLY_BUDGET_USD", "1000"))
+        )
+        self.client_limit_usd = (
+            client_limit_usd
+            if client_limit_usd is not None
+            else float(os.getenv("CLIENT_MONTHLY_BUDGET_USD", "0"))
+        )
+        self.reservation_usd = (
+            reservation_usd
+            if reservation_usd is not None
+            else float(os.getenv("BUDGET_RESERVATION_USD", "0.25"))
+        )
+        self.sync_seconds = (
+            sync_seconds
+            if sync_seconds is not None
+            else float(os.getenv("BUDGET_SYNC_SECONDS", "30"))
+        )
+        self._lock = threading.Lock()
+        self._period = current_period()
+        self._leases: dict[str, float] = {}
+        self._global_total = 0.0
+        self._client_totals: dict[str, float] = {}
+        self._synced_at: dict[str, float] = {}
+
+    def charge(self, client_id: str, amount_usd: float) -> None:
+        """Record spend, reserving another chunk from the shared store when the lease runs out."""
+        if amount_usd <= 0:
+            return
+        with self._lock:
+            self._roll_period()
+            lease = self._leases.get(client_id, 0.0)
+            if amount_usd <= lease:
+                self._leases[client_id] = lease - amount_usd
+                return
+            reserve = max(self.reservation_usd, amount_usd - lease)
+            try:
+                self._sync(client_id, reserve)
+            except Exception as exc:
+                # Carry the spend as a negative lease; the next reservation covers it
+                logger.warning("Budget ledger reservation failed: %s", exc)
+                self._leases[client_id] = lease - amount_usd
+                return
+            self._leases[client_id] = lease + reserve - amount_usd
+
+    def allows(self, client_id: Optional[str] = None) -> bool:
+        """False once the global (or this client's) monthly budget is used up."""
+        global_total, client_total = self.totals(client_id)
+        if self.global_limit_usd > 0 and global_total >= self.global_limit_usd:
+            return False
+        if client_id and self.client_limit_usd > 0 and client_total >= self.client_limit_usd:
+            return False
+        return True
+
+    def remaining(self, client_id: Optional[str] = None) -> Optional[float]:
+        """Budget left under the tightest applicable limit, or None when unlimited."""
+        global_total, client_total = self.totals(client_id)
+        left = []
+        if self.global_limit_usd > 0:
+            left.append(self.global_limit_usd - global_total)
+        if client_id and self.client_limit_usd > 0:
+            left.append(self.client_limit_usd - client_total)
+        return max(0.0, min(left)) if left else None
+
+    def totals(self, client_id: Optional[str] = None) -> tuple[float, float]:
+        """(global, client) spend including reservations, refreshed every sync_seconds."""
+        scope = client_id or GLOBAL_SCOPE
+        with self._lock:
+            self._roll_period()
+            if time.monotonic() - self._synced_at.get(scope, float("-inf")) >= self.sync_seconds:
+                try:
+                    self._refresh(scope)
+                except Exception as exc:
+                    logger.warning("Budget ledger refresh failed (%s); using cached totals", exc)
+            return self._global_total, self._client_totals.get(scope, 0.0)
+
+    def release(self) -> None:
+        """Return unspent reservations to the shared store."""
+        with self._lock:
+            for client_id, lease in list(self._leases.items()):
+                if lease > 0:
+                    try:
+                        self._sync(client_id, -lease)
+                    except Exception as exc:
+                        logger.warning("Budget ledger release failed for %s: %s", client_id, exc)
+            self._leases.clear()
+
+    def _sync(self, scope: str, amount_usd: float) -> None:
+        self._global_total, self._client_totals[scope] = self.store.add(self._period, scope, amount_usd)
+        self._synced_at[scope] = time.monotonic()
+
+    def _refresh(self, scope: str) -> None:
+        """Read-only refresh: a SELECT, so reads never write the hot global row."""
+        self._global_total, self._client_totals[scope] = self.store.get(self._period, scope)
+        self._synced_at[scope] = time.monotonic()
+
+    def _roll_period(self) -> None:
+        period = current_period()
+        if period != self._period:
+            self._period = period
+            self._leases.clear()
+            self._client_totals.clear()
+            self._synced_at.clear()
+            self._global_total = 0.0
+
+
+def create_ledger_store(db_client=None):
+    """Store selected by BUDGET_LEDGER_BACKEND (supabase | sqlite | memory)."""
+    backend = os.getenv("BUDGET_LEDGER_BACKEND", "supabase" if db_client else "memory").lower()
+    if backend == "supabase" and db_client is not None:
+        return SupabaseLedgerStore(db_client)
+    if backend == "sqlite":
+        return SQLiteLedgerStore(os.getenv("BUDGET_LEDGER_PATH", ".budget_ledger.db"))
+    return MemoryLedgerStore()
+
+
+# Singleton instance
+_ledger: Optional[BudgetLedger] = None
+
+
+def get_budget_ledger(db_client=None) -> BudgetLedger:
+    """Get the global budget ledger; db_client on first use selects the Supabase store."""
+    global _ledger
+    if _ledger is None:
+        _ledger = BudgetLedger(create_ledger_store(db_client))
+        atexit.register(_ledger.release)
+    return _ledger
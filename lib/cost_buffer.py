@@ -0,0 +1,161 @@
+"""
+Write-behind buffer for cost_events.
+Rows are queued in memory and inserted in multi-row batches by a background
+thread; batches that fail are spooled to disk and retried on the next flush.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CostEventBuffer:
+    """
+    Coalesce cost_events inserts.
+
+    Usage:
+        buffer = CostEventBuffer(db)
+        buffer.add(db_lib.cost_event_row(client_id, "llm", 0.002, ...))
+        ...
+        buffer.close()  # on shutdown: stop the flusher and write what is left
+
+    A flush happens every COST_BUFFER_FLUSH_SECONDS or as soon as
+    COST_BUFFER_MAX_EVENTS rows are waiting. If the insert fails, rows are
+    appended to COST_SPOOL_PATH (JSONL, capped at COST_SPOOL_MAX_EVENTS,
+    oldest dropped first) and sent ahead of new rows on the next flush.
+    """
+
+    def __init__(
+        self,
+        db_client,
+        max_events: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        spool_path: Optional[str] = None,
+        spool_max_events: Optional[int] = None,
+        start: bool = True,
+    ):
+        self.db_client = db_client
+        self.max_events = (
+            max_events
+            if max_events is not None
+            else int(os.getenv("COST_BUFFER_MAX_EVENTS", "100"))
+        )
+        self.flush_seconds = (
+            flush_seconds
+            if flush_seconds is not None
+            else float(os.getenv("COST_BUFFER_FLUSH_SECONDS", "5"))
+        )
+        self.spool_path = (
+            spool_path
+            if spool_path is not None
+            else os.getenv("COST_SPOOL_PATH", ".cost_events_spool.jsonl")
+        )
+        self.spool_max_events = (
+            spool_max_events
+            if spool_max_events is not None
+            else int(os.getenv("COST_SPOOL_MAX_EVENTS", "10000"))
+        )
+        self._rows: list[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if start:
+            self._thread = threading.Thread(target=self._run, name="cost-buffer", daemon=True)
+            self._thread.start()
+
+    def add(self, row: dict) -> None:
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.max_events
+        if full:
+            if self._thread is None:
+                self.flush()
+            else:
+                self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def flush(self) -> int:
+        """Insert spooled and buffered rows; return how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            rows = self._read_spool() + rows
+            if not rows:
+                return 0
+            from lib import db as db_lib
+
+            written = 0
+            for start in range(0, len(rows), self.max_events):
+                chunk = rows[start:start + self.max_events]
+                try:
+                    db_lib.record_cost_events(self.db_client, chunk)
+                except Exception as exc:
+                    logger.warning("Cost event flush failed (%s); spooling %d rows", exc, len(rows) - start)
+                    self._write_spool(rows[start:])
+                    return written
+                written += len(chunk)
+            self._write_spool([])
+            return written
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds + 5)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Cost event flusher error")
+
+    def _read_spool(self) -> list[dict]:
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return []
+        rows = []
+        try:
+            with open(self.spool_path, encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        rows.append(json.loads(line))
+        except (OSError, ValueError) as exc:
+            logger.warning("Cost spool %s unreadable: %s", self.spool_path, exc)
+        return rows
+
+    def _write_spool(self, rows: list[dict]) -> None:
+        """Replace the spool with rows (keeping the newest spool_max_events)."""
+        if not self.spool_path:
+            if rows:
+                logger.error("No cost spool configured; dropping %d cost events", len(rows))
+            return
+        if not rows:
+            if os.path.exists(self.spool_path):
+                os.remove(self.spool_path)
+            return
+        if len(rows) > self.spool_max_events:
+            logger.error("Cost spool full; dropping %d oldest events", len(rows) - self.spool_max_events)
+            rows = rows[-self.spool_max_events:]
+        tmp_path = f"{self.spool_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                for row in rows:
+                    handle.write(json.dumps(row, default=str) + "\n")
+            os.replace(tmp_path, self.spool_path)
+        except OSError as exc:
+            logger.error("Cost spool %s unwritable (%s); dropping %d events", self.spool_path, exc, len(rows))
@@ -5,11 +5,14 @@ Track token usage and costs across all automations.
 Essential for pricing, budgeting, and client billing.
 """
 
+import atexit
 import os
 import logging
+import threading
+from collections import deque
 from typing import Optional
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import date as date_type, datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -95,6 +98,17 @@ class CostSummary:
     def add_cost_only(self, cost: float):
         self.total_cost_usd += cost
 
+    def merge(self, other: "CostSummary"):
+        self.total_tokens_in += other.total_tokens_in
+        self.total_tokens_out += other.total_tokens_out
+        self.total_cost_usd += other.total_cost_usd
+        self.run_count += other.run_count
+        self.avg_cost_per_run = self.total_cost_usd / self.run_count if self.run_count > 0 else 0
+
+
+# (client_id, automation_name, model) within a day; non-LLM events use model ""
+RollupKey = tuple[str, str, str]
+
 
 class CostTracker:
     """
@@ -113,13 +127,48 @@ class CostTracker:
         # Get summaries
         daily = tracker.get_daily_summary()
         client = tracker.get_client_summary("abc123")
+    
+    Summaries are served from per-day rollups keyed by (client_id,
+    automation, model), updated as usage is recorded, so their cost depends
+    on the window rather than on history. Only the most recent raw records
+    (COST_TRACKER_MAX_RECORDS) and rollup days (COST_ROLLUP_RETENTION_DAYS)
+    are kept.
+    
+    With a BudgetLedger attached, spend is also charged to the shared
+    cross-process counters and budget alerts use the shared monthly total.
     """
     
-    def __init__(self, db_client=None, budget_limit_usd: Optional[float] = None):
+    def __init__(
+        self,
+        db_client=None,
+        budget_limit_usd: Optional[float] = None,
+        max_records: Optional[int] = None,
+        retention_days: Optional[int] = None,
+        ledger=None,
+    ):
         self.db_client = db_client
+        self.ledger = ledger
         self.budget_limit_usd = budget_limit_usd or float(os.getenv("MONTHLY_BUDGET_USD", "1000"))
-        self._records: list[UsageRecord] = []
-        self._events: list[CostEvent] = []
+        max_records = (
+            max_records
+            if max_records is not None
+            else int(os.getenv("COST_TRACKER_MAX_RECORDS", "10000"))
+        )
+        self.retention_days = (
+            retention_days
+            if retention_days is not None
+            else int(os.getenv("COST_ROLLUP_RETENTION_DAYS", "400"))
+        )
+        self._records: deque[UsageRecord] = deque(maxlen=max_records)
+        self._events: deque[CostEvent] = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._daily: dict[date_type, dict[RollupKey, CostSummary]] = {}
+        self._monthly: dict[tuple[int, int], float] = {}
+        self._oldest_day: Optional[date_type] = None
+        self._buffer = None
+        if db_client and os.getenv("COST_BUFFER_ENABLED", "true").lower() == "true":
+            from lib.cost_buffer import CostEventBuffer
+            self._buffer = CostEventBuffer(db_client)
     
     def get_pricing(self, model: str) -> ModelPricing:
         """Get pricing for a model."""
@@ -138,14 +187,17 @@ class CostTracker:
         tokens_in: int,
         tokens_out: int,
         run_id: Optional[str] = None,
+        price_multiplier: float = 1.0,
     ) -> float:
         """
         Record token usage and return calculated cost.
         
+        price_multiplier scales list pricing (e.g. 0.5 for Batch API calls).
+        
         Returns:
             Cost in USD
         """
-        cost = self.calculate_cost(model, tokens_in, tokens_out)
+        cost = self.calculate_cost(model, tokens_in, tokens_out) * price_multiplier
         
         record = UsageRecord(
             timestamp=datetime.utcnow(),
@@ -159,20 +211,21 @@ class CostTracker:
         )
         
         self._records.append(record)
-        if self.db_client:
-            from lib import db as db_lib
-            db_lib.record_cost_event(
-                self.db_client,
-                client_id=client_id,
-                category="llm",
-                cost_usd=cost,
-                quantity=float(tokens_in + tokens_out),
-                unit_cost_usd=0.0,
-                provider=model,
-                automation_name=automation,
-                run_id=run_id,
-                metadata={"tokens_in": tokens_in, "tokens_out": tokens_out},
-            )
+        self._roll_up(record.timestamp, client_id, automation, model, cost, tokens_in, tokens_out)
+        if self.ledger is not None:
+            self.ledger.charge(client_id, cost)
+        self._persist(
+            record.timestamp,
+            client_id=client_id,
+            category="llm",
+            cost_usd=cost,
+            quantity=float(tokens_in + tokens_out),
+            unit_cost_usd=0.0,
+            provider=model,
+            automation_name=automation,
+            run_id=run_id,
+            metadata={"tokens_in": tokens_in, "tokens_out": tokens_out},
+        )
         
         # Check budget
         self._check_budget_alert()
@@ -211,86 +264,125 @@ class CostTracker:
             metadata=metadata or {},
         )
         self._events.append(event)
-        if self.db_client:
-            from lib import db as db_lib
-            db_lib.record_cost_event(
-                self.db_client,
-                client_id=client_id,
-                category=category,
-                cost_usd=cost_usd,
-                quantity=quantity,
-                unit_cost_usd=unit_cost_usd,
-                provider=provider,
-                automation_name=automation_name,
-                run_id=run_id,
-                task_id=task_id,
-                metadata=metadata or {},
-            )
+        self._roll_up(event.timestamp, client_id, automation_name or "", "", cost_usd)
+        if self.ledger is not None:
+            self.ledger.charge(client_id, cost_usd)
+        self._persist(
+            event.timestamp,
+            client_id=client_id,
+            category=category,
+            cost_usd=cost_usd,
+            quantity=quantity,
+            unit_cost_usd=unit_cost_usd,
+            provider=provider,
+            automation_name=automation_name,
+            run_id=run_id,
+            task_id=task_id,
+            metadata=metadata or {},
+        )
         self._check_budget_alert()
         return cost_usd
     
-    def get_daily_summary(self, date: Optional[datetime] = None) -> CostSummary:
-        """Get cost summary for a day."""
-        date = date or datetime.utcnow()
-        start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end = start + timedelta(days=1)
-        
+    def _persist(self, timestamp: datetime, **fields):
+        """Write a cost_events row: buffered when available, otherwise inline."""
+        if not self.db_client:
+            return
+        from lib import db as db_lib
+        if self._buffer is not None:
+            self._buffer.add(db_lib.cost_event_row(created_at=timestamp.isoformat(), **fields))
+        else:
+            db_lib.record_cost_event(self.db_client, **fields)
+
+    def flush(self):
+        """Write any buffered cost events now."""
+        if self._buffer is not None:
+            self._buffer.flush()
+
+    def close(self):
+        """Stop the background flusher after writing buffered cost events."""
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+
+    def _roll_up(
+        self,
+        timestamp: datetime,
+        client_id: str,
+        automation: str,
+        model: str,
+        cost: float,
+        tokens_in: Optional[int] = None,
+        tokens_out: Optional[int] = None,
+    ):
+        """Fold one usage record (tokens given) or cost event into the rollups."""
+        day = timestamp.date()
+        with self._lock:
+            buckets = self._daily.get(day)
+            if buckets is None:
+                buckets = self._daily[day] = {}
+                self._prune(day)
+            bucket = buckets.get((client_id, automation, model))
+            if bucket is None:
+                bucket = buckets[(client_id, automation, model)] = CostSummary()
+            if tokens_in is None:
+                bucket.add_cost_only(cost)
+            else:
+                bucket.add(tokens_in, tokens_out or 0, cost)
+            month = (day.year, day.month)
+            self._monthly[month] = self._monthly.get(month, 0.0) + cost
+
+    def _prune(self, newest_day: date_type):
+        """Drop rollup days (and their months) past the retention window. Caller holds the lock."""
+        cutoff = newest_day - timedelta(days=self.retention_days)
+        if self._oldest_day is not None and self._oldest_day >= cutoff:
+            return
+        for day in [day for day in self._daily if day < cutoff]:
+            del self._daily[day]
+        for month in [month for month in self._monthly if month < (cutoff.year, cutoff.month)]:
+            del self._monthly[month]
+        self._oldest_day = min(self._daily, default=None)
+
+    def _summarize(self, start: date_type, end: date_type, client_id=None, automation=None) -> CostSummary:
+        """Merge rollups for days in [start, end], optionally filtered."""
         summary = CostSummary()
-        for record in self._records:
-            if start <= record.timestamp < end:
-                summary.add(record.tokens_in, record.tokens_out, record.cost_usd)
-        for event in self._events:
-            if start <= event.timestamp < end:
-                summary.add_cost_only(event.cost_usd)
-        
+        with self._lock:
+            day = start
+            while day <= end:
+                for (bucket_client, bucket_automation, _model), bucket in self._daily.get(day, {}).items():
+                    if client_id is not None and bucket_client != client_id:
+                        continue
+                    if automation is not None and bucket_automation != automation:
+                        continue
+                    summary.merge(bucket)
+                day += timedelta(days=1)
         return summary
+
+    def get_daily_summary(self, date: Optional[datetime] = None) -> CostSummary:
+        """Get cost summary for a day."""
+        day = (date or datetime.utcnow()).date()
+        return self._summarize(day, day)
     
     def get_client_summary(self, client_id: str, days: int = 30) -> CostSummary:
-        """Get cost summary for a client."""
-        cutoff = datetime.utcnow() - timedelta(days=days)
-        
-        summary = CostSummary()
-        for record in self._records:
-            if record.client_id == client_id and record.timestamp >= cutoff:
-                summary.add(record.tokens_in, record.tokens_out, record.cost_usd)
-        for event in self._events:
-            if event.client_id == client_id and event.timestamp >= cutoff:
-                summary.add_cost_only(event.cost_usd)
-        
-        return summary
+        """Get cost summary for a client (whole days, starting days ago)."""
+        today = datetime.utcnow().date()
+        return self._summarize(today - timedelta(days=days), today, client_id=client_id)
     
     def get_automation_summary(self, automation: str, days: int = 30) -> CostSummary:
-        """Get cost summary for an automation."""
-        cutoff = datetime.utcnow() - timedelta(days=days)
-        
-        summary = CostSummary()
-        for record in self._records:
-            if record.automation_name == automation and record.timestamp >= cutoff:
-                summary.add(record.tokens_in, record.tokens_out, record.cost_usd)
-        for event in self._events:
-            if event.automation_name == automation and event.timestamp >= cutoff:
-                summary.add_cost_only(event.cost_usd)
-        
-        return summary
+        """Get cost summary for an automation (whole days, starting days ago)."""
+        today = datetime.utcnow().date()
+        return self._summarize(today - timedelta(days=days), today, automation=automation)
     
     def get_monthly_total(self) -> float:
         """Get total cost for current month."""
         now = datetime.utcnow()
-        start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        total = 0.0
-        for record in self._records:
-            if record.timestamp >= start:
-                total += record.cost_usd
-        for event in self._events:
-            if event.timestamp >= start:
-                total += event.cost_usd
-        
-        return total
+        return self._monthly.get((now.year, now.month), 0.0)
     
     def _check_budget_alert(self):
         """Check if approaching budget limit."""
-        monthly = self.get_monthly_total()
+        if self.ledger is not None:
+            monthly, _ = self.ledger.totals()
+        else:
+            monthly = self.get_monthly_total()
         
         if monthly >= self.budget_limit_usd:
             logger.critical(f"BUDGET EXCEEDED: ${monthly:.2f} >= ${self.budget_limit_usd:.2f}")
@@ -334,9 +426,17 @@ class CostTracker:
 _tracker: Optional[CostTracker] = None
 
 
-def get_cost_tracker() -> CostTracker:
-    """Get the global cost tracker instance."""
+def get_cost_tracker(db_client=None) -> CostTracker:
+    """
+    Get the global cost tracker instance.
+    
+    Passing db_client on first use persists cost events to cost_events and
+    charges spend to the shared budget ledger.
+    """
     global _tracker
     if _tracker is None:
-        _tracker = CostTracker()
+        from lib.budget_ledger import get_budget_ledger
+        _tracker = CostTracker(db_client=db_client, ledger=get_budget_ledger(db_client))
+        if _tracker._buffer is not None:
+            atexit.register(_tracker.close)
     return _tracker
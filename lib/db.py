@@ -5,18 +5,62 @@ Centralizes all DB operations for intake + worker.
 
 import os
 import hashlib
+import threading
 from typing import Optional, Any
 from datetime import datetime, timedelta
 
+import httpx
+from postgrest.utils import SyncClient
 from supabase import create_client, Client
 
+from lib.metrics_cache import invalidate_metrics
 
-def get_supabase_client() -> Client:
+_client: Optional[Client] = None
+_client_lock = threading.Lock()
+
+
+def _create_supabase_client() -> Client:
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_KEY")
     if not url or not key:
         raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
-    return create_client(url, key)
+    client = create_client(url, key)
+
+    # Swap the PostgREST session for one with an explicit keep-alive pool.
+    pool_size = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+    postgrest = client.postgrest
+    session = postgrest.session
+    postgrest.session = SyncClient(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=session.timeout,
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+        ),
+        follow_redirects=True,
+        http2=True,
+    )
+    session.close()
+    return client
+
+
+def get_supabase_client() -> Client:
+    """Return the process-wide Supabase client, creating it on first use."""
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            _client = _create_supabase_client()
+    return _client
+
+
+def reset_supabase_client() -> None:
+    """Drop the shared client (e.g. after fork or a credentials change)."""
+    global _client
+    with _client_lock:
+        _client = None
 
 
 def normalize_email(email: str) -> str:
@@ -57,6 +101,54 @@ def create_run(
     return response.data[0]
 
 
+def intake_lead(
+    db: Client,
+    client_id: str,
+    idempotency_key: str,
+    lead_email: str,
+    trigger_payload: dict,
+    job_payload: dict,
+) -> dict:
+    """
+    Dedupe, create the run and enqueue its job in one transaction.
+    Returns {"status": "queued" | "duplicate", "run_id": ..., "job_id": ...}.
+    """
+    response = db.rpc(
+        "intake_lead",
+        _intake_params(client_id, idempotency_key, lead_email, trigger_payload, job_payload),
+    ).execute()
+    return response.data or {}
+
+
+def intake_leads(db: Client, client_id: str, items: list[dict]) -> list[dict]:
+    """
+    Bulk intake_lead: every run and job for items is written in one
+    transaction (one round trip). items are dicts with idempotency_key,
+    email, trigger_payload and job_payload; results come back in order with
+    their idempotency_key.
+    """
+    if not items:
+        return []
+    response = db.rpc("intake_leads", {"intake_client_id": client_id, "intake_items": items}).execute()
+    return response.data or []
+
+
+def _intake_params(
+    client_id: str,
+    idempotency_key: str,
+    lead_email: str,
+    trigger_payload: dict,
+    job_payload: dict,
+) -> dict:
+    return {
+        "intake_client_id": client_id,
+        "intake_idempotency_key": idempotency_key,
+        "intake_email": lead_email,
+        "intake_trigger_payload": trigger_payload,
+        "intake_job_payload": job_payload,
+    }
+
+
 def update_run_status(db: Client, run_id: str, status: str, error_message: Optional[str] = None):
     payload = {"status": status}
     if error_message:
@@ -168,6 +260,17 @@ def create_voice_session(
     crm_lead_id: Optional[str] = None,
     metadata: Optional[dict] = None,
     channel: str = "web",
+) -> dict:
+    payload = _voice_session_row(client_id, crm_lead_id, metadata, channel)
+    response = db.table("voice_sessions").insert(payload).execute()
+    return response.data[0]
+
+
+def _voice_session_row(
+    client_id: str,
+    crm_lead_id: Optional[str],
+    metadata: Optional[dict],
+    channel: str,
 ) -> dict:
     payload = {
         "client_id": client_id,
@@ -176,8 +279,7 @@ def create_voice_session(
     }
     if crm_lead_id:
         payload["crm_lead_id"] = crm_lead_id
-    response = db.table("voice_sessions").insert(payload).execute()
-    return response.data[0]
+    return payload
 
 
 def get_voice_session(db: Client, session_id: str) -> Optional[dict]:
@@ -205,6 +307,18 @@ def add_voice_turn(
     content: str,
     action: Optional[str] = None,
     confidence: Optional[float] = None,
+) -> dict:
+    payload = _voice_turn_row(session_id, role, content, action, confidence)
+    response = db.table("voice_turns").insert(payload).execute()
+    return response.data[0]
+
+
+def _voice_turn_row(
+    session_id: str,
+    role: str,
+    content: str,
+    action: Optional[str],
+    confidence: Optional[float],
 ) -> dict:
     payload: dict[str, Any] = {
         "session_id": session_id,
@@ -215,8 +329,7 @@ def add_voice_turn(
         payload["action"] = action
     if confidence is not None:
         payload["confidence"] = confidence
-    response = db.table("voice_turns").insert(payload).execute()
-    return response.data[0]
+    return payload
 
 
 def create_kpi_snapshot(
@@ -249,24 +362,83 @@ def record_cost_event(
     task_id: Optional[str] = None,
     metadata: Optional[dict] = None,
 ) -> dict:
-    payload: dict[str, Any] = {
+    payload = cost_event_row(
+        client_id,
+        category,
+        cost_usd,
+        quantity=quantity,
+        unit_cost_usd=unit_cost_usd,
+        provider=provider,
+        automation_name=automation_name,
+        run_id=run_id,
+        task_id=task_id,
+        metadata=metadata,
+    )
+    response = db.table("cost_events").insert(payload).execute()
+    return response.data[0]
+
+
+def record_cost_events(db: Client, rows: list[dict]) -> list[dict]:
+    """Insert many cost_event_row() rows in one request."""
+    if not rows:
+        return []
+    response = db.table("cost_events").insert(rows).execute()
+    return response.data or []
+
+
+def cost_event_row(
+    client_id: str,
+    category: str,
+    cost_usd: float,
+    quantity: float = 0.0,
+    unit_cost_usd: float = 0.0,
+    provider: Optional[str] = None,
+    automation_name: Optional[str] = None,
+    run_id: Optional[str] = None,
+    task_id: Optional[str] = None,
+    metadata: Optional[dict] = None,
+    created_at: Optional[str] = None,
+) -> dict:
+    # Optional columns are always present (as null) so rows can share one
+    # multi-row insert; created_at is only set by buffered writers.
+    row = {
         "client_id": client_id,
         "category": category,
         "cost_usd": cost_usd,
         "quantity": quantity,
         "unit_cost_usd": unit_cost_usd,
         "metadata": metadata or {},
+        "provider": provider or None,
+        "automation_name": automation_name or None,
+        "run_id": run_id or None,
+        "task_id": task_id or None,
     }
-    if provider:
-        payload["provider"] = provider
-    if automation_name:
-        payload["automation_name"] = automation_name
-    if run_id:
-        payload["run_id"] = run_id
-    if task_id:
-        payload["task_id"] = task_id
-    response = db.table("cost_events").insert(payload).execute()
-    return response.data[0]
+    if created_at:
+        row["created_at"] = created_at
+    return row
+
+
+def budget_add(db: Client, period: str, client_id: str, amount_usd: float) -> tuple[float, float]:
+    """Atomically add to the shared monthly ledger; returns (global_total, client_total)."""
+    response = db.rpc(
+        "budget_add",
+        {"ledger_period": period, "ledger_client_id": client_id, "amount_usd": amount_usd},
+    ).execute()
+    totals = response.data or {}
+    return float(totals.get("global") or 0), float(totals.get("client") or 0)
+
+
+def budget_totals(db: Client, period: str, client_id: str) -> tuple[float, float]:
+    """Read the shared monthly ledger without touching it; returns (global_total, client_total)."""
+    response = (
+        db.table("budget_ledger")
+        .select("scope,spent_usd")
+        .eq("period", period)
+        .in_("scope", ["global", client_id])
+        .execute()
+    )
+    totals = {row["scope"]: float(row["spent_usd"] or 0) for row in response.data or []}
+    return totals.get("global", 0.0), totals.get(client_id, 0.0)
 
 
 def list_cost_events(
@@ -315,11 +487,39 @@ def claim_next_job(db: Client, worker_id: str, lease_seconds: int) -> Optional[d
     return None
 
 
-def mark_job_done(db: Client, job_id: str, status: str, error_message: Optional[str] = None):
+def claim_jobs(db: Client, worker_id: str, lease_seconds: int, limit: int) -> list[dict]:
+    if limit <= 0:
+        return []
+    response = db.rpc(
+        "claim_jobs",
+        {"worker_id": worker_id, "lease_seconds": lease_seconds, "max_jobs": limit},
+    ).execute()
+    return response.data or []
+
+
+def _invalidate_client_metrics(client_id: Optional[str], rows) -> None:
+    """Drop cached metrics for the client(s) owning the updated rows; everything if unknown."""
+    client_ids = {client_id} if client_id else {
+        row.get("client_id") for row in rows or [] if isinstance(row, dict) and row.get("client_id")
+    }
+    if not client_ids:
+        invalidate_metrics()
+    for owner in client_ids:
+        invalidate_metrics(str(owner))
+
+
+def mark_job_done(
+    db: Client,
+    job_id: str,
+    status: str,
+    error_message: Optional[str] = None,
+    client_id: Optional[str] = None,
+):
     payload = {"status": status, "locked_until": None, "locked_by": None}
     if error_message:
         payload["error_message"] = error_message
-    db.table("jobs_queue").update(payload).eq("id", job_id).execute()
+    response = db.table("jobs_queue").update(payload).eq("id", job_id).execute()
+    _invalidate_client_metrics(client_id, response.data)
 
 
 def requeue_job(db: Client, job_id: str, delay_seconds: int, error_message: Optional[str] = None):
@@ -335,6 +535,43 @@ def requeue_job(db: Client, job_id: str, delay_seconds: int, error_message: Opti
     db.table("jobs_queue").update(payload).eq("id", job_id).execute()
 
 
+def defer_job(db: Client, job_id: str, payload: dict, delay_seconds: int, attempts: int):
+    """
+    Release a job that is waiting on external work, with updated payload.
+    attempts should be the count before this claim, so polling is not
+    charged as a failed attempt but earlier failures still count.
+    """
+    next_run_at = (datetime.utcnow() + timedelta(seconds=delay_seconds)).isoformat()
+    db.table("jobs_queue").update(
+        {
+            "status": "queued",
+            "payload": payload,
+            "attempts": attempts,
+            "locked_until": None,
+            "locked_by": None,
+            "next_run_at": next_run_at,
+        }
+    ).eq("id", job_id).execute()
+
+
+def update_job_payload(db: Client, job_id: str, payload: dict):
+    """Persist progress on a job that is still leased, so a retry can resume."""
+    db.table("jobs_queue").update({"payload": payload}).eq("id", job_id).execute()
+
+
+def list_unscored_leads(db: Client, client_id: str, limit: int = 100) -> list[dict]:
+    response = (
+        db.table("leads")
+        .select("email,name,company,website,source,raw_form_data,enrichment_json")
+        .eq("client_id", client_id)
+        .is_("qualification_score", "null")
+        .order("created_at", desc=False)
+        .limit(limit)
+        .execute()
+    )
+    return response.data or []
+
+
 def is_email_suppressed(db: Client, client_id: str, email: str) -> bool:
     response = (
         db.table("suppression_list")
@@ -466,6 +703,7 @@ def mark_outbox_sent(
     outbox_id: str,
     send_provider: str,
     send_response: dict,
+    client_id: Optional[str] = None,
 ):
     payload = {
         "status": "sent",
@@ -473,7 +711,8 @@ def mark_outbox_sent(
         "send_provider": send_provider,
         "send_response": send_response,
     }
-    db.table("outbox_emails").update(payload).eq("id", outbox_id).execute()
+    response = db.table("outbox_emails").update(payload).eq("id", outbox_id).execute()
+    _invalidate_client_metrics(client_id, response.data)
 
 
 def update_lead_status(
@@ -528,40 +767,50 @@ def set_automation_status(
     db.table("automation_status").upsert(payload, on_conflict="client_id,automation_name").execute()
 
 
-def get_outbox_counts(db: Client, client_id: str) -> dict:
-    counts = {}
-    for status in ["queued", "approved", "sent", "rejected"]:
-        response = (
-            db.table("outbox_emails")
-            .select("id", count="exact")
-            .eq("client_id", client_id)
-            .eq("status", status)
-            .execute()
-        )
-        counts[status] = response.count or 0
+QUEUE_STATUSES = ("queued", "processing", "done", "failed", "dead")
+RUN_STATUSES = ("pending", "success", "failed", "killed", "skipped")
+OUTBOX_STATUSES = ("queued", "approved", "sent", "rejected")
+
+
+def get_status_counts(
+    db: Client,
+    table: str,
+    statuses: tuple[str, ...],
+    client_id: Optional[str] = None,
+) -> dict:
+    """Count rows per status with one GROUP BY round trip (status_counts RPC)."""
+    response = db.rpc(
+        "status_counts",
+        {"target_table": table, "target_client_id": client_id},
+    ).execute()
+    return _status_counts(response.data, statuses)
+
+
+def _status_counts(rows: Optional[list[dict]], statuses: tuple[str, ...]) -> dict:
+    counts = {status: 0 for status in statuses}
+    for row in rows or []:
+        if row.get("status") in counts:
+            counts[row["status"]] = int(row.get("count") or 0)
     return counts
 
 
+def get_outbox_counts(db: Client, client_id: str) -> dict:
+    return get_status_counts(db, "outbox_emails", OUTBOX_STATUSES, client_id)
+
+
 def get_run_counts(db: Client, client_id: str) -> dict:
-    counts = {}
-    for status in ["pending", "success", "failed", "killed", "skipped"]:
-        response = (
-            db.table("runs")
-            .select("id", count="exact")
-            .eq("client_id", client_id)
-            .eq("status", status)
-            .execute()
-        )
-        counts[status] = response.count or 0
-    return counts
+    return get_status_counts(db, "runs", RUN_STATUSES, client_id)
+
+
+RECENT_RUN_COLUMNS = (
+    "id, lead_email, status, cost_estimate_usd, error_message, started_at, completed_at"
+)
 
 
 def list_recent_runs(db: Client, client_id: str, limit: int = 20) -> list[dict]:
     response = (
         db.table("runs")
-        .select(
-            "id, lead_email, status, cost_estimate_usd, error_message, started_at, completed_at"
-        )
+        .select(RECENT_RUN_COLUMNS)
         .eq("client_id", client_id)
         .order("started_at", desc=True)
         .limit(limit)
@@ -601,11 +850,7 @@ def get_queue_depth(db: Client) -> int:
 
 
 def get_queue_counts(db: Client) -> dict:
-    counts = {}
-    for status in ["queued", "processing", "done", "failed", "dead"]:
-        response = db.table("jobs_queue").select("id", count="exact").eq("status", status).execute()
-        counts[status] = response.count or 0
-    return counts
+    return get_status_counts(db, "jobs_queue", QUEUE_STATUSES)
 
 
 def update_lead_qualification(
@@ -637,6 +882,7 @@ def update_run_details(
     llm_tokens_out: int = 0,
     cost_estimate_usd: float = 0.0,
     error_message: Optional[str] = None,
+    client_id: Optional[str] = None,
 ):
     payload = {
         "status": status,
@@ -648,4 +894,5 @@ def update_run_details(
     }
     if error_message:
         payload["error_message"] = error_message
-    db.table("runs").update(payload).eq("id", run_id).execute()
+    response = db.table("runs").update(payload).eq("id", run_id).execute()
+    _invalidate_client_metrics(client_id, response.data)
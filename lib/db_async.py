@@ -0,0 +1,189 @@
+"""
+Async Supabase access for the hot API routes.
+Mirrors the lib.db helpers those routes need so they can run on the event
+loop instead of Starlette's threadpool; everything else stays in lib.db.
+"""
+
+import asyncio
+import logging
+import os
+import weakref
+from typing import Optional
+
+import httpx
+from postgrest.utils import AsyncClient as AsyncSession
+from supabase import acreate_client, AClient as AsyncClient
+
+from lib import db as db_lib
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+# One creation lock per event loop (asyncio locks are loop-bound)
+_client_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def _create_async_supabase_client() -> AsyncClient:
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
+    client = await acreate_client(url, key)
+
+    # Same keep-alive pool as the sync client (see lib.db).
+    pool_size = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+    postgrest = client.postgrest
+    session = postgrest.session
+    postgrest.session = AsyncSession(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=session.timeout,
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+        ),
+        follow_redirects=True,
+        http2=True,
+    )
+    await session.aclose()
+    return client
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    """
+    Return the shared async client for the running event loop.
+    httpx async pools are bound to the loop that opened them, so a client is
+    rebuilt if the loop changes (e.g. between test clients) and the old one's
+    pool is closed. Concurrent first calls on a loop wait on one creation
+    instead of each building a client.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is not None and _client_loop is loop:
+        return _client
+    lock = _client_locks.get(loop)
+    if lock is None:
+        lock = _client_locks[loop] = asyncio.Lock()
+    async with lock:
+        if _client is None or _client_loop is not loop:
+            previous, previous_loop = _client, _client_loop
+            _client = await _create_async_supabase_client()
+            _client_loop = loop
+            if previous is not None:
+                await _close_client(previous, previous_loop)
+    return _client
+
+
+async def _close_client(client: AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Close a replaced client's pool, on its own loop if that loop is still running."""
+    session = client.postgrest.session
+    if loop is not None and loop.is_running() and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(session.aclose(), loop)
+        return
+    try:
+        await session.aclose()
+    except Exception as exc:
+        # Connections opened on a closed loop cannot be shut down cleanly; drop them
+        logger.debug("Closing replaced async Supabase client failed: %s", exc)
+
+
+def reset_async_supabase_client() -> None:
+    global _client, _client_loop
+    _client = None
+    _client_loop = None
+
+
+async def intake_lead(
+    db: AsyncClient,
+    client_id: str,
+    idempotency_key: str,
+    lead_email: str,
+    trigger_payload: dict,
+    job_payload: dict,
+) -> dict:
+    response = await db.rpc(
+        "intake_lead",
+        db_lib._intake_params(client_id, idempotency_key, lead_email, trigger_payload, job_payload),
+    ).execute()
+    return response.data or {}
+
+
+async def intake_leads(db: AsyncClient, client_id: str, items: list[dict]) -> list[dict]:
+    if not items:
+        return []
+    response = await db.rpc(
+        "intake_leads", {"intake_client_id": client_id, "intake_items": items}
+    ).execute()
+    return response.data or []
+
+
+async def create_voice_session(
+    db: AsyncClient,
+    client_id: str,
+    crm_lead_id: Optional[str] = None,
+    metadata: Optional[dict] = None,
+    channel: str = "web",
+) -> dict:
+    payload = db_lib._voice_session_row(client_id, crm_lead_id, metadata, channel)
+    response = await db.table("voice_sessions").insert(payload).execute()
+    return response.data[0]
+
+
+async def get_voice_session(db: AsyncClient, session_id: str) -> Optional[dict]:
+    response = await db.table("voice_sessions").select("*").eq("id", session_id).execute()
+    if response.data:
+        return response.data[0]
+    return None
+
+
+async def add_voice_turn(
+    db: AsyncClient,
+    session_id: str,
+    role: str,
+    content: str,
+    action: Optional[str] = None,
+    confidence: Optional[float] = None,
+) -> dict:
+    payload = db_lib._voice_turn_row(session_id, role, content, action, confidence)
+    response = await db.table("voice_turns").insert(payload).execute()
+    return response.data[0]
+
+
+async def get_status_counts(
+    db: AsyncClient,
+    table: str,
+    statuses: tuple[str, ...],
+    client_id: Optional[str] = None,
+) -> dict:
+    response = await db.rpc(
+        "status_counts",
+        {"target_table": table, "target_client_id": client_id},
+    ).execute()
+    return db_lib._status_counts(response.data, statuses)
+
+
+async def get_queue_counts(db: AsyncClient) -> dict:
+    return await get_status_counts(db, "jobs_queue", db_lib.QUEUE_STATUSES)
+
+
+async def get_outbox_counts(db: AsyncClient, client_id: str) -> dict:
+    return await get_status_counts(db, "outbox_emails", db_lib.OUTBOX_STATUSES, client_id)
+
+
+async def get_run_counts(db: AsyncClient, client_id: str) -> dict:
+    return await get_status_counts(db, "runs", db_lib.RUN_STATUSES, client_id)
+
+
+async def list_recent_runs(db: AsyncClient, client_id: str, limit: int = 20) -> list[dict]:
+    response = await (
+        db.table("runs")
+        .select(db_lib.RECENT_RUN_COLUMNS)
+        .eq("client_id", client_id)
+        .order("started_at", desc=True)
+        .limit(limit)
+        .execute()
+    )
+    return response.data or []
@@ -5,36 +5,54 @@ Only called by worker.
 
 from __future__ import annotations
 
-import re
+import asyncio
 import os
-import socket
-import time
-import urllib.request
+import re
 from html import unescape
 from typing import Optional
 
+import httpx
+
+from lib.enrichment_cache import get_enrichment_cache
+from lib.industry import IndustryClassifier, load_taxonomy
 
+
+# (keyword, industry[, weight]); extended by ENRICHMENT_TAXONOMY_PATH if set.
 _INDUSTRY_KEYWORDS = [
-    ("fintech", "Financial Services"),
+    ("fintech", "Financial Services", 2.0),
     ("bank", "Financial Services"),
+    ("banking", "Financial Services"),
     ("payment", "Financial Services"),
     ("health", "Healthcare"),
+    ("healthcare", "Healthcare", 2.0),
+    ("healthtech", "Healthcare", 2.0),
     ("medical", "Healthcare"),
     ("clinic", "Healthcare"),
-    ("ecommerce", "Ecommerce"),
-    ("e-commerce", "Ecommerce"),
+    ("ecommerce", "Ecommerce", 2.0),
+    ("e-commerce", "Ecommerce", 2.0),
+    ("online store", "Ecommerce"),
     ("retail", "Retail"),
-    ("saas", "Software"),
+    ("saas", "Software", 2.0),
     ("software", "Software"),
     ("ai", "Software"),
     ("agency", "Agency"),
+    ("agencies", "Agency"),
     ("marketing", "Marketing"),
     ("construction", "Construction"),
     ("logistics", "Logistics"),
     ("manufacturing", "Manufacturing"),
 ]
 
-_CACHE: dict[str, dict] = {}
+_MAX_HTML_BYTES = 200_000
+_HEADERS = {"User-Agent": "solo-ai-automation/1.0"}
+_FETCH_ERRORS = (httpx.HTTPError, httpx.InvalidURL, OSError, ValueError)
+# Fetch result for failures that may not last (timeout, 5xx, batch deadline):
+# enriched as "basic" but never cached. None means a definitive failure
+# (dead host, 4xx, bad URL), which is negatively cached.
+_UNAVAILABLE = object()
+
+_http_client: Optional[httpx.Client] = None
+_industry_classifier: Optional[IndustryClassifier] = None
 
 
 def _normalize_domain(website: str) -> str:
@@ -50,100 +68,181 @@ def _normalize_root_url(website: str) -> str:
 
 
 def _get_cached(key: str) -> Optional[dict]:
-    ttl_seconds = int(os.getenv("ENRICHMENT_CACHE_TTL_SECONDS", "3600"))
-    entry = _CACHE.get(key)
-    if not entry:
-        return None
-    if time.time() - entry["timestamp"] > ttl_seconds:
-        _CACHE.pop(key, None)
-        return None
-    return entry["data"]
+    return get_enrichment_cache().get(key)
 
 
 def _set_cached(key: str, data: dict) -> None:
-    _CACHE[key] = {"timestamp": time.time(), "data": data}
+    # "basic" means the fetch failed; cache it briefly so dead domains back off.
+    get_enrichment_cache().set(key, data, negative=data.get("source") == "basic")
 
 
-def _extract_title(html: str) -> Optional[str]:
-    match = re.search(r"<title[^>]*>(.*?)</title>", html, re.IGNORECASE | re.DOTALL)
-    if match:
-        return unescape(match.group(1)).strip()
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_META_TAG_RE = re.compile(r"<meta\s([^>]*)>", re.IGNORECASE)
+_META_ATTR_RE = re.compile(r"""([a-zA-Z:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+_LINKEDIN_MARKER = "linkedin.com/company/"
+_LINKEDIN_PREFIX_RE = re.compile(r"https?://(?:www\.)?$")
+_LINKEDIN_SLUG_RE = re.compile(r"[a-zA-Z0-9\-_/]+")
+_EMPLOYEES_MARKER = "employees"
+_EMPLOYEES_COUNT_RE = re.compile(r"(\d{1,6})\s*\+?\s*$")
+
+
+def _meta_attrs(tag_body: str) -> dict:
+    return {
+        name.lower(): double or single
+        for name, double, single in _META_ATTR_RE.findall(tag_body)
+    }
+
+
+def _size_bucket(count: int) -> str:
+    if count < 10:
+        return "1-9"
+    if count < 50:
+        return "10-49"
+    if count < 200:
+        return "50-199"
+    if count < 1000:
+        return "200-999"
+    return "1000+"
+
+
+def _extract_description(html: str, end: int) -> Optional[str]:
+    og_description = None
+    for match in _META_TAG_RE.finditer(html, 0, end):
+        attrs = _meta_attrs(match.group(1))
+        content = attrs.get("content")
+        if content is None:
+            continue
+        if attrs.get("name", "").lower() == "description":
+            return unescape(content).strip()
+        if og_description is None and attrs.get("property", "").lower() == "og:description":
+            og_description = unescape(content).strip()
+    return og_description
+
+
+def _find_linkedin(html: str, lower: str) -> Optional[str]:
+    index = lower.find(_LINKEDIN_MARKER)
+    while index != -1:
+        start = index + len(_LINKEDIN_MARKER)
+        slug = _LINKEDIN_SLUG_RE.match(html, start)
+        if slug and _LINKEDIN_PREFIX_RE.search(lower, max(0, index - 12), index):
+            value = slug.group(0).strip("/").split("/")[0]
+            if value:
+                return value
+        index = lower.find(_LINKEDIN_MARKER, start)
     return None
 
 
-def _extract_meta_description(html: str) -> Optional[str]:
-    patterns = [
-        r'<meta[^>]+name=["\']description["\'][^>]*content=["\'](.*?)["\']',
-        r'<meta[^>]+property=["\']og:description["\'][^>]*content=["\'](.*?)["\']',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, html, re.IGNORECASE | re.DOTALL)
+def _find_employee_count(lower: str) -> Optional[int]:
+    index = lower.find(_EMPLOYEES_MARKER)
+    while index != -1:
+        match = _EMPLOYEES_COUNT_RE.search(lower, max(0, index - 32), index)
         if match:
-            return unescape(match.group(1)).strip()
+            return int(match.group(1))
+        index = lower.find(_EMPLOYEES_MARKER, index + len(_EMPLOYEES_MARKER))
     return None
 
 
-def _extract_linkedin(html: str) -> dict:
-    match = re.search(
-        r"https?://(www\.)?linkedin\.com/company/([a-zA-Z0-9\-_/]+)",
-        html,
-        re.IGNORECASE,
-    )
-    if not match:
-        return {"linkedin_company": None, "linkedin_url": None}
-    slug = match.group(2).strip("/").split("/")[0]
-    url = f"https://www.linkedin.com/company/{slug}"
-    return {"linkedin_company": slug, "linkedin_url": url}
-
-
-def _estimate_company_size(html: str) -> Optional[str]:
-    match = re.search(r"(\d{1,6})\s*\+?\s*employees", html, re.IGNORECASE)
-    if match:
-        count = int(match.group(1))
-        if count < 10:
-            return "1-9"
-        if count < 50:
-            return "10-49"
-        if count < 200:
-            return "50-199"
-        if count < 1000:
-            return "200-999"
-        return "1000+"
-    return None
+def _extract_page_fields(html: str) -> dict:
+    """
+    Extract title, description, LinkedIn slug and size from a page.
+
+    The page is lowercased once; title and meta tags are only read up to
+    </head>, and the body fields are located with plain substring search
+    before a small anchored regex confirms them, so no pattern has to be
+    tried at every offset of a 200KB document.
+    """
+    lower = html.lower()
+    if len(lower) != len(html):
+        # Some non-ASCII characters change length when lowercased; keep offsets aligned.
+        lower = html.encode("ascii", errors="replace").decode("ascii").lower()
+    head_end = lower.find("</head>")
+    if head_end == -1:
+        head_end = len(html)
+
+    title_match = _TITLE_RE.search(html, 0, head_end)
+    linkedin = _find_linkedin(html, lower)
+    employee_count = _find_employee_count(lower)
+    return {
+        "title": unescape(title_match.group(1)).strip() if title_match else None,
+        "description": _extract_description(html, head_end),
+        "linkedin_company": linkedin,
+        "linkedin_url": f"https://www.linkedin.com/company/{linkedin}" if linkedin else None,
+        "size": _size_bucket(employee_count) if employee_count is not None else None,
+    }
+
+
+def _get_industry_classifier() -> IndustryClassifier:
+    global _industry_classifier
+    if _industry_classifier is None:
+        entries = list(_INDUSTRY_KEYWORDS)
+        taxonomy_path = os.getenv("ENRICHMENT_TAXONOMY_PATH")
+        if taxonomy_path:
+            entries.extend(load_taxonomy(taxonomy_path))
+        _industry_classifier = IndustryClassifier(entries)
+    return _industry_classifier
 
 
 def _infer_industry(text: str) -> str:
-    text = text.lower()
-    for keyword, industry in _INDUSTRY_KEYWORDS:
-        if keyword in text:
-            return industry
-    return "Unknown"
+    return _get_industry_classifier().classify(text)
 
 
-def _fetch_html(url: str) -> Optional[str]:
-    request = urllib.request.Request(
-        url,
-        headers={"User-Agent": "solo-ai-automation/1.0"},
-    )
-    try:
-        with urllib.request.urlopen(request, timeout=5) as response:
-            if response.status >= 400:
-                return None
-            return response.read(200_000).decode("utf-8", errors="ignore")
-    except (OSError, ValueError, socket.timeout):
-        return None
+def _fetch_timeout() -> float:
+    return float(os.getenv("ENRICHMENT_FETCH_TIMEOUT_SECONDS", "5"))
 
 
-def _enrich_from_root_url(root_url: str) -> dict:
-    html = _fetch_html(root_url)
+def _get_http_client() -> httpx.Client:
+    """Shared keep-alive client for synchronous fetches."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            headers=_HEADERS,
+            follow_redirects=True,
+            timeout=_fetch_timeout(),
+        )
+    return _http_client
+
+
+def _status_failure(status_code: int):
+    return _UNAVAILABLE if status_code >= 500 or status_code == 429 else None
+
+
+def _fetch_failure(exc: Exception):
+    if isinstance(exc, (asyncio.TimeoutError, httpx.TimeoutException)):
+        return _UNAVAILABLE
+    if isinstance(exc, httpx.TransportError) and not isinstance(exc, httpx.ConnectError):
+        return _UNAVAILABLE
+    return None
+
+
+def _decode_capped(body: bytearray) -> str:
+    return bytes(body[:_MAX_HTML_BYTES]).decode("utf-8", errors="ignore")
+
+
+def _fetch_html(url: str):
+    """Page HTML, None on a definitive failure, or _UNAVAILABLE on a transient one."""
+    body = bytearray()
+    try:
+        with _get_http_client().stream("GET", url) as response:
+            if response.status_code >= 400:
+                return _status_failure(response.status_code)
+            for chunk in response.iter_bytes():
+                body.extend(chunk)
+                if len(body) >= _MAX_HTML_BYTES:
+                    break
+    except _FETCH_ERRORS as exc:
+        return _fetch_failure(exc)
+    return _decode_capped(body)
+
+
+def _enrich_from_html(html: Optional[str]) -> dict:
     if not html:
         return {"source": "basic", "description": None, "industry": "Unknown", "size": "Unknown"}
 
-    title = _extract_title(html)
-    description = _extract_meta_description(html) or title
-    size = _estimate_company_size(html) or "Unknown"
+    fields = _extract_page_fields(html)
+    title = fields["title"]
+    description = fields["description"] or title
+    size = fields["size"] or "Unknown"
     industry = _infer_industry(f"{title or ''} {description or ''}")
-    linkedin_data = _extract_linkedin(html)
 
     return {
         "source": "scrape",
@@ -152,10 +251,20 @@ def _enrich_from_root_url(root_url: str) -> dict:
         "industry": industry,
         "size": size,
         "company_size": size,
-        **linkedin_data,
+        "linkedin_company": fields["linkedin_company"],
+        "linkedin_url": fields["linkedin_url"],
     }
 
 
+def _enrich_and_cache(root_url: str, html) -> dict:
+    """Enrich from a fetch result; transient failures are not cached."""
+    if html is _UNAVAILABLE:
+        return _enrich_from_html(None)
+    enrichment = _enrich_from_html(html)
+    _set_cached(root_url, enrichment)
+    return enrichment
+
+
 def enrich_company(website: Optional[str]) -> dict:
     """Best-effort enrichment using website metadata."""
     if not website:
@@ -166,6 +275,115 @@ def enrich_company(website: Optional[str]) -> dict:
     cached = _get_cached(root_url)
     if cached:
         return {"domain": domain, **cached}
-    enrichment = _enrich_from_root_url(root_url)
-    _set_cached(root_url, enrichment)
+    enrichment = _enrich_and_cache(root_url, _fetch_html(root_url))
     return {"domain": domain, **enrichment}
+
+
+class _AsyncFetcher:
+    """Concurrent page fetches with per-host caps and a shared deadline."""
+
+    def __init__(self, client: httpx.AsyncClient, per_host_limit: int, deadline: float):
+        self.client = client
+        self.per_host_limit = per_host_limit
+        self.deadline = deadline
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+
+    def _remaining(self) -> float:
+        return self.deadline - asyncio.get_running_loop().time()
+
+    async def fetch(self, url: str):
+        """Same contract as _fetch_html; skipped by the deadline counts as _UNAVAILABLE."""
+        host = _normalize_domain(url)
+        semaphore = self._host_limits.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+        async with semaphore:
+            remaining = self._remaining()
+            if remaining <= 0:
+                return _UNAVAILABLE
+            try:
+                return await asyncio.wait_for(self._read(url, remaining), timeout=remaining)
+            except (asyncio.TimeoutError, *_FETCH_ERRORS) as exc:
+                return _fetch_failure(exc)
+
+    async def _read(self, url: str, timeout: float):
+        body = bytearray()
+        async with self.client.stream("GET", url, timeout=timeout) as response:
+            if response.status_code >= 400:
+                return _status_failure(response.status_code)
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) >= _MAX_HTML_BYTES:
+                    break
+        return _decode_capped(body)
+
+
+async def enrich_companies(
+    websites: list[Optional[str]],
+    client: Optional[httpx.AsyncClient] = None,
+    per_host_limit: Optional[int] = None,
+    deadline_seconds: Optional[float] = None,
+) -> list[dict]:
+    """
+    Enrich many websites concurrently. Results line up with the input list.
+
+    Each root URL is fetched at most once per call, cache hits skip the
+    network, and every fetch shares one deadline so a batch never takes
+    longer than ENRICHMENT_DEADLINE_SECONDS. Sites the deadline cuts off,
+    timeouts and 5xx responses come back "basic" without being cached.
+    """
+    per_host_limit = per_host_limit or int(os.getenv("ENRICHMENT_PER_HOST_LIMIT", "2"))
+    deadline_seconds = (
+        deadline_seconds
+        if deadline_seconds is not None
+        else float(os.getenv("ENRICHMENT_DEADLINE_SECONDS", "10"))
+    )
+
+    roots: dict[str, Optional[dict]] = {}
+    for website in websites:
+        if website:
+            root_url = _normalize_root_url(website)
+            if root_url not in roots:
+                roots[root_url] = _get_cached(root_url)
+    missing = [root_url for root_url, cached in roots.items() if not cached]
+
+    if missing:
+        owns_client = client is None
+        if owns_client:
+            client = httpx.AsyncClient(
+                headers=_HEADERS,
+                follow_redirects=True,
+                timeout=_fetch_timeout(),
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("ENRICHMENT_MAX_CONNECTIONS", "20")),
+                ),
+            )
+        try:
+            fetcher = _AsyncFetcher(
+                client,
+                per_host_limit=per_host_limit,
+                deadline=asyncio.get_running_loop().time() + deadline_seconds,
+            )
+            pages = await asyncio.gather(*(fetcher.fetch(root_url) for root_url in missing))
+        finally:
+            if owns_client:
+                await client.aclose()
+        for root_url, html in zip(missing, pages):
+            roots[root_url] = _enrich_and_cache(root_url, html)
+
+    results = []
+    for website in websites:
+        if not website:
+            results.append({})
+            continue
+        results.append(
+            {"domain": _normalize_domain(website), **roots[_normalize_root_url(website)]}
+        )
+    return results
+
+
+async def enrich_company_async(
+    website: Optional[str],
+    client: Optional[httpx.AsyncClient] = None,
+) -> dict:
+    """Async counterpart of enrich_company."""
+    results = await enrich_companies([website], client=client)
+    return results[0]
@@ -0,0 +1,196 @@
+"""
+Enrichment cache backends.
+Bounded in-memory LRU in front of an optional SQLite file shared by every
+process on the host.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    """LRU cache with per-entry expiry, capped at max_entries."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[tuple[float, dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, data: dict, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Persistent cache tier backed by a local SQLite file."""
+
+    def __init__(self, path: str, table: str = "enrichment_cache"):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[tuple[float, dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT data, expires_at FROM {self.table} WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return row[1], json.loads(row[0])
+
+    def set(self, key: str, data: dict, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, data, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(data), expires_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+
+class EnrichmentCache:
+    """
+    Two-tier enrichment cache.
+
+    Usage:
+        cache = EnrichmentCache(max_entries=1024, path="/var/cache/enrichment.db")
+        cache.set(root_url, enrichment)
+        cache.set(dead_url, fallback, negative=True)  # short TTL
+        cache.get(root_url)
+
+    Successful lookups live for ttl_seconds; failed fetches are cached as
+    negative entries for negative_ttl_seconds so dead domains are not
+    re-fetched on every lead. Persistent hits are promoted into memory.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        path: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        negative_ttl_seconds: Optional[float] = None,
+    ):
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else float(os.getenv("ENRICHMENT_CACHE_TTL_SECONDS", "86400"))
+        )
+        self.negative_ttl_seconds = (
+            negative_ttl_seconds
+            if negative_ttl_seconds is not None
+            else float(os.getenv("ENRICHMENT_NEGATIVE_TTL_SECONDS", "3600"))
+        )
+        self.memory = MemoryCache(
+            max_entries
+            if max_entries is not None
+            else int(os.getenv("ENRICHMENT_CACHE_MAX_ENTRIES", "1024"))
+        )
+        path = path if path is not None else os.getenv("ENRICHMENT_CACHE_PATH")
+        self.persistent: Optional[SQLiteCache] = None
+        if path:
+            try:
+                self.persistent = SQLiteCache(path)
+            except sqlite3.Error as exc:
+                logger.warning("Enrichment cache file unavailable (%s); memory only", exc)
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            return entry[1]
+        if self.persistent is None:
+            return None
+        try:
+            entry = self.persistent.get(key)
+        except sqlite3.Error as exc:
+            logger.warning("Enrichment cache read failed: %s", exc)
+            return None
+        if entry is None:
+            return None
+        self.memory.set(key, entry[1], entry[0])
+        return entry[1]
+
+    def set(self, key: str, data: dict, negative: bool = False) -> None:
+        ttl = self.negative_ttl_seconds if negative else self.ttl_seconds
+        expires_at = time.time() + ttl
+        self.memory.set(key, data, expires_at)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, data, expires_at)
+            except sqlite3.Error as exc:
+                logger.warning("Enrichment cache write failed: %s", exc)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+
+# Singleton instance
+_cache: Optional[EnrichmentCache] = None
+
+
+def get_enrichment_cache() -> EnrichmentCache:
+    """Get the global enrichment cache instance."""
+    global _cache
+    if _cache is None:
+        _cache = EnrichmentCache()
+    return _cache
@@ -0,0 +1,92 @@
+"""
+Recent idempotency keys seen by this API process.
+Lets webhook retries short-circuit to "duplicate" without a database lookup.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Optional
+
+from lib.enrichment_cache import MemoryCache
+
+
+class RecentKeyCache:
+    """
+    Bounded LRU of idempotency_key -> run_id.
+
+    Usage:
+        recent = get_recent_keys()
+        run_id = recent.get(idempotency_key)
+        if run_id is None:
+            result = intake_lead(...)  # authoritative check
+            recent.add(idempotency_key, result["run_id"])
+
+    Only keys already committed to the database are added, so a hit is always
+    a true duplicate; a miss (evicted, expired or seen by another process)
+    just falls through to the database. A ttl_seconds or max_entries of 0
+    disables the cache.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_entries = (
+            max_entries
+            if max_entries is not None
+            else int(os.getenv("INTAKE_RECENT_KEYS_MAX", "10000"))
+        )
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else float(os.getenv("INTAKE_RECENT_KEYS_TTL_SECONDS", "3600"))
+        )
+        self._entries = MemoryCache(self.max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the run_id for a recently seen key, or None on a miss."""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1].get("run_id")
+
+    def add(self, key: str, run_id: Optional[str]) -> None:
+        if not self.enabled or not run_id:
+            return
+        self._entries.set(key, {"run_id": run_id}, time.time() + self.ttl_seconds)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+# Singleton instance
+_recent_keys: Optional[RecentKeyCache] = None
+
+
+def get_recent_keys() -> RecentKeyCache:
+    """Get the global recent idempotency key cache."""
+    global _recent_keys
+    if _recent_keys is None:
+        _recent_keys = RecentKeyCache()
+    return _recent_keys
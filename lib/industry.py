@@ -0,0 +1,103 @@
+"""
+Keyword-based industry classification.
+Token index with word-boundary matching and weighted scoring.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections import defaultdict
+from typing import Iterable, Union
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+KeywordEntry = Union[tuple[str, str], tuple[str, str, float]]
+
+
+def _tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _same_word(token: str, keyword_token: str) -> bool:
+    return token == keyword_token or (token.endswith("s") and token[:-1] == keyword_token)
+
+
+class IndustryClassifier:
+    """
+    Classify free text into an industry by weighted keyword hits.
+
+    Usage:
+        classifier = IndustryClassifier([("fintech", "Financial Services", 2.0),
+                                         ("real estate", "Real Estate")])
+        classifier.classify("Fintech platform for real estate agents")
+
+    Keywords match whole tokens only (so "ai" no longer fires on
+    "maintain"); multi-word keywords match consecutive tokens and a trailing
+    "s" on any token is tolerated. Each keyword counts once per text, the
+    highest-scoring industry wins and ties go to the industry listed first.
+    Cost is O(tokens) regardless of taxonomy size.
+    """
+
+    def __init__(self, entries: Iterable[KeywordEntry]):
+        # first token -> [(remaining tokens, keyword, industry, weight)]
+        self._index: dict[str, list[tuple[tuple[str, ...], str, str, float]]] = defaultdict(list)
+        self._order: dict[str, int] = {}
+        for entry in entries:
+            keyword, industry = entry[0], entry[1]
+            weight = float(entry[2]) if len(entry) > 2 else 1.0
+            tokens = _tokenize(keyword)
+            if not tokens:
+                continue
+            self._order.setdefault(industry, len(self._order))
+            self._index[tokens[0]].append((tuple(tokens[1:]), keyword, industry, weight))
+
+    def __len__(self) -> int:
+        return sum(len(candidates) for candidates in self._index.values())
+
+    def _candidates(self, token: str):
+        candidates = self._index.get(token)
+        if candidates is None and token.endswith("s"):
+            candidates = self._index.get(token[:-1])
+        return candidates or ()
+
+    def scores(self, text: str) -> dict[str, float]:
+        tokens = _tokenize(text)
+        matched: set[str] = set()
+        scores: dict[str, float] = defaultdict(float)
+        for position, token in enumerate(tokens):
+            for rest, keyword, industry, weight in self._candidates(token):
+                if keyword in matched:
+                    continue
+                following = tokens[position + 1:position + 1 + len(rest)]
+                if len(following) != len(rest) or not all(map(_same_word, following, rest)):
+                    continue
+                matched.add(keyword)
+                scores[industry] += weight
+        return dict(scores)
+
+    def classify(self, text: str, default: str = "Unknown") -> str:
+        scores = self.scores(text)
+        if not scores:
+            return default
+        return max(scores, key=lambda industry: (scores[industry], -self._order[industry]))
+
+
+def load_taxonomy(path: str) -> list[tuple[str, str, float]]:
+    """
+    Load keyword entries from a JSON taxonomy file.
+
+    Accepted shape, one key per industry:
+        {"Financial Services": {"fintech": 2, "bank": 1},
+         "Healthcare": ["clinic", "medical"]}
+    A list gives every keyword weight 1.
+    """
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    entries: list[tuple[str, str, float]] = []
+    for industry, keywords in data.items():
+        if isinstance(keywords, dict):
+            entries.extend((keyword, industry, float(weight)) for keyword, weight in keywords.items())
+        else:
+            entries.extend((keyword, industry, 1.0) for keyword in keywords)
+    return entries
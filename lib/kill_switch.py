@@ -63,6 +63,8 @@ class KillSwitch:
         max_consecutive_api_failures: int = 2,
         token_spike_multiplier: float = 2.0,
         expected_tokens: int = 1000,
+        budget_ledger=None,
+        client_id: Optional[str] = None,
     ):
         self.max_tokens = max_tokens
         self.max_cost_usd = max_cost_usd
@@ -71,6 +73,8 @@ class KillSwitch:
         self.max_consecutive_api_failures = max_consecutive_api_failures
         self.token_spike_multiplier = token_spike_multiplier
         self.expected_tokens = expected_tokens
+        self.budget_ledger = budget_ledger
+        self.client_id = client_id
         
         self.state = KillSwitchState()
         self._alert_callbacks: list[Callable[[str], None]] = []
@@ -112,6 +116,7 @@ class KillSwitch:
             self._check_timeout,
             self._check_step_loops,
             self._check_api_failures,
+            self._check_budget,
         ]
         
         for check in conditions:
@@ -155,6 +160,13 @@ class KillSwitch:
             return True, f"api_failure_cascade ({self.state.api_failures} consecutive failures)"
         return False, ""
     
+    def _check_budget(self) -> tuple[bool, str]:
+        """Check the shared monthly budget (global and per-client)."""
+        if self.budget_ledger is None or self.budget_ledger.allows(self.client_id):
+            return False, ""
+        global_total, client_total = self.budget_ledger.totals(self.client_id)
+        return True, f"budget_exceeded (global ${global_total:.2f}, client ${client_total:.2f})"
+    
     def _trigger_kill(self, reason: str):
         """Trigger the kill switch."""
         self.state.is_killed = True
@@ -192,7 +204,7 @@ class KillSwitchTriggered(Exception):
         super().__init__(f"Kill switch triggered: {reason}")
 
 
-def create_default_kill_switch() -> KillSwitch:
+def create_default_kill_switch(client_id: Optional[str] = None, budget_ledger=None) -> KillSwitch:
     """Create a kill switch with default settings from environment."""
     import os
     
@@ -201,4 +213,6 @@ def create_default_kill_switch() -> KillSwitch:
         max_cost_usd=float(os.getenv("MAX_COST_PER_RUN_USD", "0.50")),
         max_time_seconds=int(os.getenv("MAX_EXECUTION_TIME_SECONDS", "300")),
         max_retries_per_step=int(os.getenv("MAX_RETRIES_PER_STEP", "2")),
+        budget_ledger=budget_ledger,
+        client_id=client_id,
     )
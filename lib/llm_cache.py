@@ -0,0 +1,164 @@
+"""
+LLM response cache.
+Raw completions keyed by model, temperature and a normalized prompt (or a
+normalized set of lead fields), in the same memory + SQLite tiers as the
+enrichment cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Optional
+
+from lib.enrichment_cache import MemoryCache, SQLiteCache
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting-only differences share an entry."""
+    return " ".join(prompt.split())
+
+
+def fingerprint(text: Optional[str]) -> str:
+    """Case/punctuation-insensitive fingerprint of free text (e.g. a form message)."""
+    words = _NON_WORD_RE.sub(" ", (text or "").lower()).split()
+    return hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()[:16]
+
+
+class LLMResponseCache:
+    """
+    Cache of raw LLM responses.
+
+    Usage:
+        cache = get_llm_cache()
+        key = cache.key(model.name, model.temperature, prompt)
+        content = cache.get(key)
+        if content is None:
+            content, tokens_in, tokens_out = call_llm(prompt)
+            ...parse...
+            cache.set(key, content)
+
+    Callers store a response only after it parses, and still run cached
+    responses through their parser. Passing fields= keys the entry on those
+    normalized values instead of the prompt (only when LLM_CACHE_FIELD_KEYS
+    is true), so near-identical submissions share an entry. A ttl_seconds of
+    0 disables the cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        path: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        field_keys: Optional[bool] = None,
+    ):
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+        )
+        self.field_keys = (
+            field_keys
+            if field_keys is not None
+            else os.getenv("LLM_CACHE_FIELD_KEYS", "false").lower() == "true"
+        )
+        self.memory = MemoryCache(
+            max_entries
+            if max_entries is not None
+            else int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+        )
+        path = path if path is not None else os.getenv("LLM_CACHE_PATH")
+        self.persistent: Optional[SQLiteCache] = None
+        if path and self.enabled:
+            try:
+                self.persistent = SQLiteCache(path, table="llm_response_cache")
+            except sqlite3.Error as exc:
+                logger.warning("LLM cache file unavailable (%s); memory only", exc)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def key(
+        self,
+        model: str,
+        temperature: float,
+        prompt: str,
+        fields: Optional[dict] = None,
+    ) -> str:
+        if fields is not None and self.field_keys:
+            basis = {"fields": fields}
+        else:
+            basis = {"prompt": normalize_prompt(prompt)}
+        basis.update(model=model, temperature=temperature)
+        raw = json.dumps(basis, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        entry = self.memory.get(key)
+        if entry is None and self.persistent is not None:
+            try:
+                entry = self.persistent.get(key)
+            except sqlite3.Error as exc:
+                logger.warning("LLM cache read failed: %s", exc)
+                entry = None
+            if entry is not None:
+                self.memory.set(key, entry[1], entry[0])
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1].get("content")
+
+    def set(self, key: str, content: str) -> None:
+        if not self.enabled:
+            return
+        data = {"content": content}
+        expires_at = time.time() + self.ttl_seconds
+        self.memory.set(key, data, expires_at)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, data, expires_at)
+            except sqlite3.Error as exc:
+                logger.warning("LLM cache write failed: %s", exc)
+
+    def discard(self, key: str) -> None:
+        """Drop an entry whose response no longer parses."""
+        self.memory.delete(key)
+        if self.persistent is not None:
+            try:
+                self.persistent.delete(key)
+            except sqlite3.Error as exc:
+                logger.warning("LLM cache delete failed: %s", exc)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Singleton instance
+_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get the global LLM response cache instance."""
+    global _cache
+    if _cache is None:
+        _cache = LLMResponseCache()
+    return _cache
@@ -0,0 +1,226 @@
+"""
+Streaming LLM calls with incremental JSON validation.
+Aborts a completion as soon as its output can no longer be a JSON object, so
+the caller's retry starts immediately, and reports top-level fields as they
+arrive.
+"""
+
+from __future__ import annotations
+
+import inspect
+import json
+import os
+from typing import Callable, Iterable, Optional
+
+_WHITESPACE = frozenset(" \t\r\n")
+# Characters that may appear outside strings in JSON (numbers, literals, punctuation)
+_BARE_CHARS = frozenset("0123456789+-.eEtrufalsn,:")
+_CLOSERS = {"}": "{", "]": "["}
+
+
+def streaming_enabled() -> bool:
+    return os.getenv("LLM_STREAMING", "true").lower() == "true"
+
+
+class InvalidJSONStream(ValueError):
+    """Streamed output is structurally invalid; partial holds what was received."""
+
+    def __init__(self, message: str, partial: str = ""):
+        super().__init__(message)
+        self.partial = partial
+
+
+class StreamingJSONValidator:
+    """
+    Incremental checker for a single JSON object, optionally in a ``` fence.
+
+    Usage:
+        validator = StreamingJSONValidator()
+        for chunk in chunks:
+            validator.feed(chunk)       # raises InvalidJSONStream early
+            if "qualification_score" in validator.fields:
+                ...
+
+    fields holds each top-level key whose value has been fully received.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields: dict = {}
+        self.complete = False
+        self._pos = 0
+        self._started = False
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = -1
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> list[str]:
+        """Consume a chunk; return the top-level keys completed by it."""
+        self.text += chunk
+        if not self._started and not self._skip_preamble():
+            return []
+        completed: list[str] = []
+        text = self.text
+        while self._pos < len(text):
+            char = text[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1 and self._value_start is None:
+                        self._key = json.loads(text[self._string_start:self._pos + 1])
+            elif self.complete:
+                if char not in _WHITESPACE and char != "`":
+                    self._fail("trailing data after JSON object")
+            elif char in _WHITESPACE:
+                pass
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif char in "{[":
+                self._stack.append(char)
+            elif char in _CLOSERS:
+                if not self._stack or self._stack[-1] != _CLOSERS[char]:
+                    self._fail(f"unexpected '{char}'")
+                if len(self._stack) == 1:
+                    self._close_value(completed)
+                self._stack.pop()
+                self.complete = not self._stack
+            elif char == ":" and len(self._stack) == 1:
+                if self._key is None or self._value_start is not None:
+                    self._fail("unexpected ':'")
+                self._value_start = self._pos + 1
+            elif char == "," and len(self._stack) == 1:
+                self._close_value(completed)
+            elif char not in _BARE_CHARS:
+                self._fail(f"unexpected '{char}'")
+            self._pos += 1
+        return completed
+
+    def _skip_preamble(self) -> bool:
+        """Skip whitespace and an optional ``` fence line; True once at '{'."""
+        stripped = self.text.lstrip()
+        if not stripped:
+            return False
+        offset = len(self.text) - len(stripped)
+        if stripped.startswith("`"):
+            if len(stripped) < 3:
+                return False
+            if not stripped.startswith("```"):
+                self._fail("response does not start with a JSON object")
+            newline = stripped.find("\n")
+            if newline < 0:
+                return False
+            rest = stripped[newline + 1:]
+            if not rest.lstrip():
+                return False
+            offset += newline + 1 + len(rest) - len(rest.lstrip())
+            stripped = rest.lstrip()
+        if stripped[0] != "{":
+            self._fail("response does not start with a JSON object")
+        self._started = True
+        self._pos = offset
+        return True
+
+    def _close_value(self, completed: list[str]) -> None:
+        if self._value_start is None:
+            if self._key is not None:
+                self._fail(f"missing value for '{self._key}'")
+            return
+        raw = self.text[self._value_start:self._pos]
+        try:
+            self.fields[self._key] = json.loads(raw)
+        except ValueError:
+            self._fail(f"invalid value for '{self._key}'")
+        completed.append(self._key)
+        self._key = None
+        self._value_start = None
+
+    def _fail(self, reason: str) -> None:
+        raise InvalidJSONStream(f"Invalid JSON stream: {reason}", self.text)
+
+
+def _stream_kwargs(request: dict) -> dict:
+    return {**request, "stream": True, "stream_options": {"include_usage": True}}
+
+
+class _StreamState:
+    def __init__(self, watch: Iterable[str], on_fields: Optional[Callable[[dict], None]]):
+        self.validator = StreamingJSONValidator()
+        self.watch = tuple(watch)
+        self.on_fields = on_fields
+        self.notified = not (on_fields and self.watch)
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    def consume(self, chunk) -> None:
+        usage = getattr(chunk, "usage", None)
+        if usage:
+            self.tokens_in = usage.prompt_tokens or 0
+            self.tokens_out = usage.completion_tokens or 0
+        if not chunk.choices:
+            return
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            return
+        self.validator.feed(delta)
+        if not self.notified and all(key in self.validator.fields for key in self.watch):
+            self.notified = True
+            self.on_fields(dict(self.validator.fields))
+
+    def result(self) -> tuple[str, int, int]:
+        return self.validator.text, self.tokens_in, self.tokens_out
+
+
+def stream_completion(
+    client,
+    request: dict,
+    watch: Iterable[str] = (),
+    on_fields: Optional[Callable[[dict], None]] = None,
+) -> tuple[str, int, int]:
+    """
+    Stream a chat completion and return (content, tokens_in, tokens_out).
+
+    Raises InvalidJSONStream (a ValueError) and closes the stream as soon as
+    the output is structurally invalid. on_fields is called once, with every
+    field parsed so far, when all watch keys have arrived.
+    """
+    state = _StreamState(watch, on_fields)
+    stream = client.chat.completions.create(**_stream_kwargs(request))
+    try:
+        for chunk in stream:
+            state.consume(chunk)
+    except InvalidJSONStream:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+        raise
+    return state.result()
+
+
+async def astream_completion(
+    client,
+    request: dict,
+    watch: Iterable[str] = (),
+    on_fields: Optional[Callable[[dict], None]] = None,
+) -> tuple[str, int, int]:
+    """Same as stream_completion, for an AsyncOpenAI-compatible client."""
+    state = _StreamState(watch, on_fields)
+    stream = await client.chat.completions.create(**_stream_kwargs(request))
+    try:
+        async for chunk in stream:
+            state.consume(chunk)
+    except InvalidJSONStream:
+        close = getattr(stream, "close", None)
+        if close:
+            closed = close()
+            if inspect.isawaitable(closed):
+                await closed
+        raise
+    return state.result()
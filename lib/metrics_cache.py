@@ -0,0 +1,151 @@
+"""
+Short-TTL cache for command-center metrics.
+Concurrent requests for the same key share one load (single-flight).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class MetricsCache:
+    """
+    In-process TTL cache keyed by (view, client_id).
+
+    Usage:
+        cache = get_metrics_cache()
+        data = cache.get_or_load(("admin_metrics", client_id), lambda: load(db))
+
+        # After a write that changes counts
+        cache.invalidate()
+
+    A ttl_seconds of 0 disables caching.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else float(os.getenv("METRICS_CACHE_TTL_SECONDS", "10"))
+        )
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self._async_key_locks: dict[Hashable, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+        # Bumped by a full invalidate(); per-key counters by a client's invalidate(client_id)
+        self._generation = 0
+        self._key_generations: dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, key: Hashable) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return True, entry[1]
+        return False, None
+
+    def _generation_of(self, key: Hashable) -> tuple[int, int]:
+        with self._lock:
+            return self._generation, self._key_generations.get(key, 0)
+
+    def _store(self, key: Hashable, generation: tuple[int, int], value: Any) -> None:
+        with self._lock:
+            # Skip the store if an invalidation of this key raced with the load.
+            if generation == (self._generation, self._key_generations.get(key, 0)):
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop expired entries and the idle locks and counters of keys without one. Holds _lock."""
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _value) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        for locks in (self._key_locks, self._async_key_locks):
+            for key in [key for key, lock in locks.items() if key not in self._entries and not lock.locked()]:
+                del locks[key]
+        live = {*self._entries, *self._key_locks, *self._async_key_locks}
+        for key in [key for key in self._key_generations if key not in live]:
+            del self._key_generations[key]
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        if self.ttl_seconds <= 0:
+            return loader()
+
+        found, value = self._fresh(key)
+        if found:
+            self.hits += 1
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another request may have loaded it while we waited.
+            found, value = self._fresh(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            generation = self._generation_of(key)
+            value = loader()
+            self._store(key, generation, value)
+            return value
+
+    async def get_or_load_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of get_or_load for routes running on the event loop."""
+        if self.ttl_seconds <= 0:
+            return await loader()
+
+        found, value = self._fresh(key)
+        if found:
+            self.hits += 1
+            return value
+
+        with self._lock:
+            key_lock = self._async_key_locks.setdefault(key, asyncio.Lock())
+        async with key_lock:
+            found, value = self._fresh(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            generation = self._generation_of(key)
+            value = await loader()
+            self._store(key, generation, value)
+            return value
+
+    def invalidate(self, client_id: Optional[str] = None) -> None:
+        """
+        Drop cached entries for a client (plus client-independent ones),
+        or everything when client_id is None. Loads in flight for the
+        dropped keys are not stored; other clients' loads are unaffected.
+        """
+        with self._lock:
+            if client_id is None:
+                self._generation += 1
+                self._entries.clear()
+                return
+            # Keys with a lock may have a load in flight even without an entry
+            for key in {*self._entries, *self._key_locks, *self._async_key_locks}:
+                if not isinstance(key, tuple) or len(key) < 2 or key[1] in (client_id, None):
+                    self._entries.pop(key, None)
+                    self._key_generations[key] = self._key_generations.get(key, 0) + 1
+
+
+# Singleton instance
+_cache: Optional[MetricsCache] = None
+
+
+def get_metrics_cache() -> MetricsCache:
+    """Get the global metrics cache instance."""
+    global _cache
+    if _cache is None:
+        _cache = MetricsCache()
+    return _cache
+
+
+def invalidate_metrics(client_id: Optional[str] = None) -> None:
+    get_metrics_cache().invalidate(client_id)
@@ -0,0 +1,281 @@
+"""
+Per-call model selection.
+Routes each LLM step to a model from MODEL_PRICING using the lead's
+pre-score, queue depth, the client's remaining budget and recent latency.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from lib.cost_tracker import MODEL_PRICING
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_WEIGHT = 0.3
+
+
+def model_routing_enabled() -> bool:
+    return os.getenv("MODEL_ROUTER_ENABLED", "true").lower() == "true"
+
+
+@dataclass
+class RoutingDecision:
+    stage: str
+    model: str
+    reason: str  # default, borderline_prescore, clear_prescore, queue_deep, slow_model, low_budget, review_escalation
+    signals: dict = field(default_factory=dict)
+
+    def as_step(self) -> dict:
+        return {
+            "step": "model_route",
+            "stage": self.stage,
+            "model": self.model,
+            "reason": self.reason,
+            **self.signals,
+        }
+
+
+class LatencyTracker:
+    """Exponentially weighted LLM call latency per model, for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seconds: dict[str, float] = {}
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            current = self._seconds.get(model)
+            self._seconds[model] = (
+                seconds if current is None else current + _LATENCY_WEIGHT * (seconds - current)
+            )
+
+    def recent(self, model: str) -> Optional[float]:
+        with self._lock:
+            return self._seconds.get(model)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {model: round(seconds, 3) for model, seconds in self._seconds.items()}
+
+
+class ModelRouter:
+    """
+    Choose the model for each qualification and draft call.
+
+    Usage:
+        router = get_model_router()
+        route = router.route_qualification(
+            REASONING_MODEL.name,
+            prescore_score=prescore.score,
+            queue_depth=router.queue_depth(db),
+            budget_remaining_usd=ledger.remaining(client_id),
+        )
+        result = qualify_lead(..., model=model_config(route.model, REASONING_MODEL))
+        escalation = router.escalate(route, result.label)
+
+    Under normal load the step's configured model is used, except that leads
+    whose pre-score is clearly outside the review band go to the cheapest
+    model. A deep queue, a slow default model or a nearly spent client budget
+    shift every call to the cheapest (or fastest) model; leads those cheaper
+    models label "review" are re-run on the most expensive model.
+    """
+
+    def __init__(
+        self,
+        models: Optional[list[str]] = None,
+        queue_deep: Optional[int] = None,
+        low_budget_usd: Optional[float] = None,
+        latency_slo_seconds: Optional[float] = None,
+        review_band: Optional[tuple[int, int]] = None,
+        queue_depth_ttl_seconds: Optional[float] = None,
+        latency: Optional[LatencyTracker] = None,
+    ):
+        if models is None:
+            models = os.getenv("MODEL_ROUTER_MODELS", "gpt-4o-mini,gpt-4o").split(",")
+        self.models = []
+        for name in (name.strip() for name in models):
+            if _openai_callable(name):
+                self.models.append(name)
+            elif name:
+                logger.warning("Model router ignoring %s: not an OpenAI model in MODEL_PRICING", name)
+        self.queue_deep = (
+            queue_deep
+            if queue_deep is not None
+            else int(os.getenv("MODEL_ROUTER_QUEUE_DEEP", "50"))
+        )
+        self.low_budget_usd = (
+            low_budget_usd
+            if low_budget_usd is not None
+            else float(os.getenv("MODEL_ROUTER_LOW_BUDGET_USD", "5"))
+        )
+        self.latency_slo_seconds = (
+            latency_slo_seconds
+            if latency_slo_seconds is not None
+            else float(os.getenv("MODEL_ROUTER_LATENCY_SLO_SECONDS", "20"))
+        )
+        self.review_band = (
+            review_band
+            if review_band is not None
+            else (
+                int(os.getenv("MODEL_ROUTER_REVIEW_MIN", "40")),
+                int(os.getenv("MODEL_ROUTER_REVIEW_MAX", "69")),
+            )
+        )
+        self.queue_depth_ttl_seconds = (
+            queue_depth_ttl_seconds
+            if queue_depth_ttl_seconds is not None
+            else float(os.getenv("MODEL_ROUTER_QUEUE_TTL_SECONDS", "5"))
+        )
+        self.latency = latency or get_latency_tracker()
+        self._lock = threading.Lock()
+        self._queue_depth: Optional[int] = None
+        self._queue_depth_at = float("-inf")
+
+    def queue_depth(self, db) -> Optional[int]:
+        """Queued jobs, re-read at most every queue_depth_ttl_seconds; None if unavailable."""
+        with self._lock:
+            if time.monotonic() - self._queue_depth_at < self.queue_depth_ttl_seconds:
+                return self._queue_depth
+            from lib import db as db_lib
+
+            try:
+                self._queue_depth = db_lib.get_queue_depth(db)
+            except Exception as exc:
+                logger.warning("Queue depth unavailable for model routing: %s", exc)
+                self._queue_depth = None
+            self._queue_depth_at = time.monotonic()
+            return self._queue_depth
+
+    def route_qualification(
+        self,
+        default_model: str,
+        prescore_score: Optional[int] = None,
+        queue_depth: Optional[int] = None,
+        budget_remaining_usd: Optional[float] = None,
+    ) -> RoutingDecision:
+        signals = self._signals(default_model, queue_depth, budget_remaining_usd)
+        signals["prescore"] = prescore_score
+        pressure = self._pressure(default_model, queue_depth, budget_remaining_usd)
+        if pressure:
+            return RoutingDecision("qualification", self._pressure_model(default_model, pressure), pressure, signals)
+        if prescore_score is not None:
+            low, high = self.review_band
+            if low <= prescore_score <= high:
+                return RoutingDecision("qualification", default_model, "borderline_prescore", signals)
+            return RoutingDecision("qualification", self.cheapest(default_model), "clear_prescore", signals)
+        return RoutingDecision("qualification", default_model, "default", signals)
+
+    def route_draft(
+        self,
+        default_model: str,
+        queue_depth: Optional[int] = None,
+        budget_remaining_usd: Optional[float] = None,
+    ) -> RoutingDecision:
+        signals = self._signals(default_model, queue_depth, budget_remaining_usd)
+        pressure = self._pressure(default_model, queue_depth, budget_remaining_usd)
+        if pressure:
+            return RoutingDecision("email_draft", self._pressure_model(default_model, pressure), pressure, signals)
+        return RoutingDecision("email_draft", default_model, "default", signals)
+
+    def escalate(self, route: RoutingDecision, label: str) -> Optional[RoutingDecision]:
+        """Re-run a "review" result from a cheaper model on the most expensive one."""
+        strongest = self.strongest(route.model)
+        if label != "review" or route.reason == "low_budget" or route.model == strongest:
+            return None
+        return RoutingDecision(
+            "qualification",
+            strongest,
+            "review_escalation",
+            {"escalated_from": route.model},
+        )
+
+    def cheapest(self, default_model: str) -> str:
+        return min(self._candidates(default_model), key=_price)
+
+    def strongest(self, default_model: str) -> str:
+        return max(self._candidates(default_model), key=_price)
+
+    def fastest(self, default_model: str) -> str:
+        """Lowest recent latency among models no pricier than default_model."""
+        ceiling = _price(default_model)
+        timed = []
+        for name in self._candidates(default_model):
+            latency = self.latency.recent(name)
+            if latency is not None and _price(name) <= ceiling:
+                timed.append((latency, _price(name), name))
+        if not timed:
+            return self.cheapest(default_model)
+        return min(timed)[2]
+
+    def _candidates(self, default_model: str) -> list[str]:
+        return list(dict.fromkeys(self.models + [default_model]))
+
+    def _pressure(
+        self,
+        default_model: str,
+        queue_depth: Optional[int],
+        budget_remaining_usd: Optional[float],
+    ) -> Optional[str]:
+        if budget_remaining_usd is not None and budget_remaining_usd < self.low_budget_usd:
+            return "low_budget"
+        if queue_depth is not None and queue_depth >= self.queue_deep:
+            return "queue_deep"
+        latency = self.latency.recent(default_model)
+        if latency is not None and latency > self.latency_slo_seconds:
+            return "slow_model"
+        return None
+
+    def _pressure_model(self, default_model: str, pressure: str) -> str:
+        if pressure == "slow_model":
+            return self.fastest(default_model)
+        return self.cheapest(default_model)
+
+    def _signals(
+        self,
+        default_model: str,
+        queue_depth: Optional[int],
+        budget_remaining_usd: Optional[float],
+    ) -> dict:
+        latency = self.latency.recent(default_model)
+        return {
+            "queue_depth": queue_depth,
+            "budget_remaining_usd": None if budget_remaining_usd is None else round(budget_remaining_usd, 4),
+            "latency_seconds": None if latency is None else round(latency, 3),
+        }
+
+
+def _openai_callable(model: str) -> bool:
+    # Every LLM step goes through the OpenAI client, so other providers' models are not routable
+    return model in MODEL_PRICING and model != "default" and not model.startswith("claude")
+
+
+def _price(model: str) -> float:
+    pricing = MODEL_PRICING.get(model, MODEL_PRICING["default"])
+    return pricing.input_per_million + pricing.output_per_million
+
+
+# Singleton instances
+_latency: Optional[LatencyTracker] = None
+_router: Optional[ModelRouter] = None
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Get the global per-model latency tracker."""
+    global _latency
+    if _latency is None:
+        _latency = LatencyTracker()
+    return _latency
+
+
+def get_model_router() -> ModelRouter:
+    """Get the global model router."""
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
@@ -0,0 +1,220 @@
+"""
+Intake prefilter for junk email domains.
+Blocked and disposable domains are compiled once into reversed-label tries,
+so a lookup is O(labels) and also catches subdomains.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Common throwaway-inbox providers. Extend via the config file.
+DISPOSABLE_DOMAINS = (
+    "10minutemail.com",
+    "discard.email",
+    "dispostable.com",
+    "getnada.com",
+    "guerrillamail.com",
+    "mailinator.com",
+    "maildrop.cc",
+    "mintemail.com",
+    "sharklasers.com",
+    "temp-mail.org",
+    "tempmail.com",
+    "throwawaymail.com",
+    "trashmail.com",
+    "yopmail.com",
+)
+
+_END = ""
+
+
+class DomainTrie:
+    """
+    Set of domains matched by suffix.
+
+    Usage:
+        trie = DomainTrie(["example.com"])
+        trie.match("mail.example.com")  # "example.com"
+        trie.match("notexample.com")    # None
+    """
+
+    def __init__(self, domains: Iterable[str] = ()):
+        self._root: dict = {}
+        self._size = 0
+        for domain in domains:
+            self.add(domain)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, domain: str) -> None:
+        labels = _labels(domain)
+        if not labels:
+            return
+        node = self._root
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        if _END not in node:
+            node[_END] = ".".join(labels)
+            self._size += 1
+
+    def match(self, domain: str) -> Optional[str]:
+        """Return the listed domain that domain equals or is a subdomain of."""
+        node = self._root
+        for label in reversed(_labels(domain)):
+            node = node.get(label)
+            if node is None:
+                return None
+            if _END in node:
+                return node[_END]
+        return None
+
+
+def _labels(domain: str) -> list[str]:
+    return [label for label in domain.strip().strip(".").lower().split(".") if label]
+
+
+def _domain_of(email: str) -> str:
+    return email.rsplit("@", 1)[-1].strip().lower()
+
+
+class DomainPrefilter:
+    """
+    Decide whether an intake email should be rejected before any DB write.
+
+    Usage:
+        prefilter = get_prefilter()
+        reason = prefilter.check("lead@sub.mailinator.com", client_id)
+        if reason:
+            return {"status": "filtered", "reason": reason}
+
+    Sources:
+        PREFILTER_BLOCKED_DOMAINS  comma-separated blocked domains
+        PREFILTER_CONFIG_PATH      optional JSON file, re-read when it changes:
+            {"blocked": ["spam.com"],
+             "disposable": ["burner.io"],
+             "clients": {"<client_id>": {"block": ["rival.com"],
+                                         "allow": ["mailinator.com"]}}}
+        PREFILTER_BLOCK_DISPOSABLE set to false to accept disposable domains
+
+    A client "allow" entry overrides every block list for that client.
+    """
+
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        block_disposable: Optional[bool] = None,
+        reload_seconds: Optional[float] = None,
+    ):
+        self.config_path = (
+            config_path if config_path is not None else os.getenv("PREFILTER_CONFIG_PATH")
+        )
+        self.block_disposable = (
+            block_disposable
+            if block_disposable is not None
+            else os.getenv("PREFILTER_BLOCK_DISPOSABLE", "true").lower() == "true"
+        )
+        self.reload_seconds = (
+            reload_seconds
+            if reload_seconds is not None
+            else float(os.getenv("PREFILTER_RELOAD_SECONDS", "30"))
+        )
+        self._lock = threading.Lock()
+        self._env_value: Optional[str] = None
+        self._config_mtime: Optional[float] = None
+        self._next_stat = 0.0
+        self.blocked = DomainTrie()
+        self.disposable = DomainTrie()
+        self.client_blocked: dict[str, DomainTrie] = {}
+        self.client_allowed: dict[str, DomainTrie] = {}
+        self.reload()
+
+    def reload(self) -> None:
+        """Rebuild every trie from the environment and config file."""
+        env_value = os.getenv("PREFILTER_BLOCKED_DOMAINS", "")
+        config, mtime = self._read_config()
+
+        blocked = DomainTrie(env_value.split(","))
+        for domain in config.get("blocked") or []:
+            blocked.add(domain)
+        disposable = DomainTrie(DISPOSABLE_DOMAINS)
+        for domain in config.get("disposable") or []:
+            disposable.add(domain)
+
+        client_blocked: dict[str, DomainTrie] = {}
+        client_allowed: dict[str, DomainTrie] = {}
+        for client_id, overrides in (config.get("clients") or {}).items():
+            client_blocked[client_id] = DomainTrie(overrides.get("block") or [])
+            client_allowed[client_id] = DomainTrie(overrides.get("allow") or [])
+
+        with self._lock:
+            self.blocked = blocked
+            self.disposable = disposable
+            self.client_blocked = client_blocked
+            self.client_allowed = client_allowed
+            self._env_value = env_value
+            self._config_mtime = mtime
+            self._next_stat = time.monotonic() + self.reload_seconds
+
+    def _read_config(self) -> tuple[dict, Optional[float]]:
+        if not self.config_path:
+            return {}, None
+        try:
+            mtime = os.path.getmtime(self.config_path)
+            with open(self.config_path, encoding="utf-8") as handle:
+                return json.load(handle), mtime
+        except (OSError, ValueError) as exc:
+            logger.warning("Prefilter config %s unusable: %s", self.config_path, exc)
+            return {}, None
+
+    def _maybe_reload(self) -> None:
+        if os.getenv("PREFILTER_BLOCKED_DOMAINS", "") != self._env_value:
+            self.reload()
+            return
+        if not self.config_path or time.monotonic() < self._next_stat:
+            return
+        try:
+            mtime = os.path.getmtime(self.config_path)
+        except OSError:
+            mtime = None
+        if mtime != self._config_mtime:
+            self.reload()
+        else:
+            self._next_stat = time.monotonic() + self.reload_seconds
+
+    def check(self, email: str, client_id: Optional[str] = None) -> Optional[str]:
+        """Return a rejection reason ("blocked_domain", "disposable_domain") or None."""
+        self._maybe_reload()
+        domain = _domain_of(email)
+        if client_id:
+            allowed = self.client_allowed.get(client_id)
+            if allowed is not None and allowed.match(domain):
+                return None
+            client_blocked = self.client_blocked.get(client_id)
+            if client_blocked is not None and client_blocked.match(domain):
+                return "blocked_domain"
+        if self.blocked.match(domain):
+            return "blocked_domain"
+        if self.block_disposable and self.disposable.match(domain):
+            return "disposable_domain"
+        return None
+
+
+# Singleton instance
+_prefilter: Optional[DomainPrefilter] = None
+
+
+def get_prefilter() -> DomainPrefilter:
+    """Get the global intake prefilter."""
+    global _prefilter
+    if _prefilter is None:
+        _prefilter = DomainPrefilter()
+    return _prefilter
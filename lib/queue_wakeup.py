@@ -0,0 +1,117 @@
+"""
+Queue wakeup for the worker.
+LISTENs for jobs_queue notifications when DATABASE_URL is set and falls back
+to adaptive exponential backoff polling otherwise.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "jobs_queue"
+
+
+class QueueWakeup:
+    """
+    Decide how long an idle worker sleeps before its next claim.
+
+    Usage:
+        wakeup = QueueWakeup()
+        wakeup.start()
+        while True:
+            if claim_jobs(...):
+                wakeup.reset()
+            else:
+                wakeup.wait()
+
+    Empty polls double the sleep from min_seconds up to max_seconds. While a
+    LISTEN connection is healthy the cap is raised to listen_max_seconds, since
+    inserts wake the worker directly and polling only catches delayed retries.
+    """
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        min_seconds: Optional[float] = None,
+        max_seconds: Optional[float] = None,
+        listen_max_seconds: Optional[float] = None,
+    ):
+        self.dsn = dsn if dsn is not None else os.getenv("DATABASE_URL")
+        self.min_seconds = (
+            min_seconds
+            if min_seconds is not None
+            else float(os.getenv("WORKER_POLL_MIN_SECONDS", "0.1"))
+        )
+        self.max_seconds = (
+            max_seconds
+            if max_seconds is not None
+            else float(os.getenv("WORKER_POLL_SECONDS", "2"))
+        )
+        self.listen_max_seconds = (
+            listen_max_seconds
+            if listen_max_seconds is not None
+            else float(os.getenv("WORKER_LISTEN_POLL_SECONDS", "30"))
+        )
+        self._event = threading.Event()
+        self._listening = threading.Event()
+        self._delay = self.min_seconds
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def listening(self) -> bool:
+        return self._listening.is_set()
+
+    def start(self) -> None:
+        """Start the LISTEN thread if a database URL is configured."""
+        if not self.dsn or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._listen, name="queue-listen", daemon=True)
+        self._thread.start()
+
+    def notify(self) -> None:
+        """Wake a waiting worker immediately."""
+        self._event.set()
+
+    def reset(self) -> None:
+        """Call after a successful claim so the next idle wait starts short."""
+        self._delay = self.min_seconds
+
+    def wait(self) -> bool:
+        """Sleep until notified or the backoff delay elapses. Returns True if notified."""
+        cap = self.listen_max_seconds if self.listening else self.max_seconds
+        delay = min(self._delay, cap)
+        woke = self._event.wait(delay)
+        self._event.clear()
+        if woke:
+            self._delay = self.min_seconds
+        else:
+            self._delay = min(max(self._delay, self.min_seconds) * 2, cap)
+        return woke
+
+    def _listen(self) -> None:
+        try:
+            import psycopg
+        except ImportError:
+            logger.warning("psycopg is not installed; queue wakeup falls back to polling")
+            return
+
+        while True:
+            try:
+                with psycopg.connect(self.dsn, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    self._listening.set()
+                    # Poll once in case jobs arrived while we were disconnected.
+                    self._event.set()
+                    logger.info("Listening for %s notifications", CHANNEL)
+                    for _ in conn.notifies():
+                        self._event.set()
+            except Exception as exc:
+                logger.warning("Queue LISTEN connection lost: %s", exc)
+            self._listening.clear()
+            time.sleep(self.max_seconds)
@@ -0,0 +1,136 @@
+"""
+Provider-side structured output.
+Turns the agents' validation schemas into OpenAI json_schema response
+formats, falls back to plain prompting for models that reject them, and
+counts parse retries per model.
+"""
+
+from __future__ import annotations
+
+import copy
+import os
+import threading
+from typing import Awaitable, Callable, Optional
+
+# Keywords strict json_schema mode does not accept; the agents' parsers still enforce them.
+_UNSUPPORTED_KEYWORDS = ("minimum", "maximum", "maxLength", "minLength", "maxItems", "minItems")
+
+_unsupported_models: set[str] = set()
+
+
+def strict_schema(schema: dict) -> dict:
+    """
+    Convert a validation schema into one accepted by strict mode: every
+    property required (optional ones become nullable), no additional
+    properties, and no range/length keywords.
+    """
+    schema = copy.deepcopy(schema)
+    for keyword in _UNSUPPORTED_KEYWORDS:
+        schema.pop(keyword, None)
+    if schema.get("type") == "object":
+        properties = schema.get("properties", {})
+        required = set(schema.get("required", []))
+        for name, prop in list(properties.items()):
+            prop = strict_schema(prop)
+            if name not in required:
+                prop["type"] = [prop["type"], "null"]
+            properties[name] = prop
+        schema["required"] = list(properties)
+        schema["additionalProperties"] = False
+    elif schema.get("type") == "array" and "items" in schema:
+        schema["items"] = strict_schema(schema["items"])
+    return schema
+
+
+def structured_output_enabled(model: str) -> bool:
+    return (
+        os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() == "true"
+        and model not in _unsupported_models
+    )
+
+
+def response_format(name: str, schema: dict) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": strict_schema(schema)},
+    }
+
+
+def with_response_format(request: dict, name: str, schema: dict) -> dict:
+    """Add a json_schema response_format to chat completion kwargs when the model allows it."""
+    if structured_output_enabled(request["model"]):
+        return {**request, "response_format": response_format(name, schema)}
+    return request
+
+
+def _rejected_response_format(request: dict, exc: Exception) -> bool:
+    if "response_format" not in request or "response_format" not in str(exc):
+        return False
+    _unsupported_models.add(request["model"])
+    return True
+
+
+def _without_response_format(request: dict) -> dict:
+    return {key: value for key, value in request.items() if key != "response_format"}
+
+
+def call_with_schema_fallback(call: Callable[[dict], object], request: dict):
+    """Run call(request); if the provider rejects response_format, remember the model and retry without it."""
+    try:
+        return call(request)
+    except Exception as exc:
+        if not _rejected_response_format(request, exc):
+            raise
+    return call(_without_response_format(request))
+
+
+async def acall_with_schema_fallback(call: Callable[[dict], Awaitable], request: dict):
+    """Async variant of call_with_schema_fallback."""
+    try:
+        return await call(request)
+    except Exception as exc:
+        if not _rejected_response_format(request, exc):
+            raise
+    return await call(_without_response_format(request))
+
+
+class RetryCounter:
+    """
+    Per-model parse-retry counts for this process.
+
+    Usage:
+        get_retry_counter().record(model.name, retries=attempt, failed=False)
+        get_retry_counter().snapshot()
+        # {"gpt-4o": {"calls": 10, "retries": 1, "failures": 0}}
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: dict[str, dict[str, int]] = {}
+
+    def record(self, model: str, retries: int, failed: bool = False) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(model, {"calls": 0, "retries": 0, "failures": 0})
+            counts["calls"] += 1
+            counts["retries"] += retries
+            counts["failures"] += int(failed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {model: dict(counts) for model, counts in self._counts.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+# Singleton instance
+_retry_counter: Optional[RetryCounter] = None
+
+
+def get_retry_counter() -> RetryCounter:
+    """Get the global per-model retry counter."""
+    global _retry_counter
+    if _retry_counter is None:
+        _retry_counter = RetryCounter()
+    return _retry_counter
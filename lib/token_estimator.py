@@ -0,0 +1,103 @@
+"""
+Token and cost estimation before an LLM call.
+Uses tiktoken when it is installed, otherwise a chars-per-token ratio per
+model that is calibrated from the usage the provider reports back.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+from typing import Optional
+
+from lib.cost_tracker import MODEL_PRICING
+
+DEFAULT_CHARS_PER_TOKEN = 4.0
+# Per-message framing tokens in the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+_CALIBRATION_WEIGHT = 0.2
+
+
+class TokenEstimator:
+    """
+    Predict prompt tokens and worst-case cost for a chat completion.
+
+    Usage:
+        estimator = get_token_estimator()
+        cost = estimator.estimate_cost("gpt-4o", messages, max_output_tokens=2000)
+        ...call...
+        estimator.observe("gpt-4o", messages, usage.prompt_tokens)
+    """
+
+    def __init__(self, use_tokenizer: Optional[bool] = None):
+        self.use_tokenizer = (
+            use_tokenizer
+            if use_tokenizer is not None
+            else os.getenv("TOKEN_ESTIMATOR_TOKENIZER", "true").lower() == "true"
+        )
+        self._lock = threading.Lock()
+        self._chars_per_token: dict[str, float] = {}
+        self._encodings: dict[str, object] = {}
+
+    def _encoding(self, model: str):
+        if not self.use_tokenizer:
+            return None
+        if model not in self._encodings:
+            try:
+                import tiktoken
+            except ImportError:
+                self.use_tokenizer = False
+                return None
+            try:
+                self._encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encodings[model] = tiktoken.get_encoding("o200k_base")
+        return self._encodings[model]
+
+    def chars_per_token(self, model: str) -> float:
+        return self._chars_per_token.get(model, DEFAULT_CHARS_PER_TOKEN)
+
+    def count(self, text: str, model: str) -> int:
+        encoding = self._encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text))
+        return math.ceil(len(text) / self.chars_per_token(model))
+
+    def count_messages(self, messages: list[dict], model: str) -> int:
+        return sum(
+            self.count(message.get("content") or "", model) + MESSAGE_OVERHEAD_TOKENS
+            for message in messages
+        ) + 3
+
+    def estimate_cost(self, model: str, messages: list[dict], max_output_tokens: int) -> float:
+        """Prompt cost plus the cost of a full max_output_tokens completion."""
+        pricing = MODEL_PRICING.get(model, MODEL_PRICING["default"])
+        return pricing.calculate_cost(self.count_messages(messages, model), max_output_tokens)
+
+    def observe(self, model: str, messages: list[dict], prompt_tokens: int) -> None:
+        """Calibrate the chars-per-token ratio from provider-reported usage."""
+        if prompt_tokens <= 0 or self._encoding(model) is not None:
+            return
+        overhead = len(messages) * MESSAGE_OVERHEAD_TOKENS + 3
+        chars = sum(len(message.get("content") or "") for message in messages)
+        if prompt_tokens <= overhead or not chars:
+            return
+        ratio = chars / (prompt_tokens - overhead)
+        with self._lock:
+            current = self._chars_per_token.get(model)
+            self._chars_per_token[model] = (
+                ratio if current is None else current + _CALIBRATION_WEIGHT * (ratio - current)
+            )
+
+
+# Singleton instance
+_estimator: Optional[TokenEstimator] = None
+
+
+def get_token_estimator() -> TokenEstimator:
+    """Get the global token estimator."""
+    global _estimator
+    if _estimator is None:
+        _estimator = TokenEstimator()
+    return _estimator
@@ -0,0 +1,135 @@
+"""
+Micro-benchmark: anchored page extractor vs the previous regex extractors.
+Usage:
+  python scripts/bench_enrichment.py [saved_pages_dir] [--repeat N]
+
+Without a directory a synthetic corpus is generated. Saved pages are any
+*.html files (e.g. `curl -s https://example.com > pages/example.html`).
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from html import unescape
+from typing import Optional
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from lib.enrichment import _MAX_HTML_BYTES, _extract_page_fields, _size_bucket
+
+
+# Previous implementation: five independent scans per page.
+def _legacy_title(html: str) -> Optional[str]:
+    match = re.search(r"<title[^>]*>(.*?)</title>", html, re.IGNORECASE | re.DOTALL)
+    return unescape(match.group(1)).strip() if match else None
+
+
+def _legacy_description(html: str) -> Optional[str]:
+    patterns = [
+        r'<meta[^>]+name=["\']description["\'][^>]*content=["\'](.*?)["\']',
+        r'<meta[^>]+property=["\']og:description["\'][^>]*content=["\'](.*?)["\']',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, html, re.IGNORECASE | re.DOTALL)
+        if match:
+            return unescape(match.group(1)).strip()
+    return None
+
+
+def _legacy_linkedin(html: str) -> Optional[str]:
+    match = re.search(
+        r"https?://(www\.)?linkedin\.com/company/([a-zA-Z0-9\-_/]+)",
+        html,
+        re.IGNORECASE,
+    )
+    return match.group(2).strip("/").split("/")[0] if match else None
+
+
+def _legacy_size(html: str) -> Optional[str]:
+    match = re.search(r"(\d{1,6})\s*\+?\s*employees", html, re.IGNORECASE)
+    return _size_bucket(int(match.group(1))) if match else None
+
+
+def legacy_extract(html: str) -> dict:
+    return {
+        "title": _legacy_title(html),
+        "description": _legacy_description(html),
+        "linkedin_company": _legacy_linkedin(html),
+        "size": _legacy_size(html),
+    }
+
+
+def synthetic_corpus() -> list[str]:
+    filler = "<div class='row'><p>We help teams ship faster with reliable tooling.</p></div>\n"
+    head = (
+        "<html><head><title>Acme Logistics</title>"
+        '<meta name="description" content="Freight software for modern shippers">'
+        "</head><body>"
+    )
+    footer = (
+        '<footer><a href="https://www.linkedin.com/company/acme-logistics/">LinkedIn</a>'
+        "<span>250+ employees</span></footer></body></html>"
+    )
+    pages = []
+    for repeats in (10, 200, 2000):
+        body = filler * repeats
+        pages.append(head + body + footer)  # fields split between head and footer
+        pages.append(head + footer + body)  # everything near the top
+        pages.append("<html><head></head><body>" + body + "</body></html>")  # nothing to find
+    return [page[:_MAX_HTML_BYTES] for page in pages]
+
+
+def load_corpus(directory: Optional[str]) -> list[str]:
+    if not directory:
+        return synthetic_corpus()
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, encoding="utf-8", errors="ignore") as handle:
+            pages.append(handle.read(_MAX_HTML_BYTES))
+    return pages
+
+
+def bench(fn, pages: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            fn(page)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.directory)
+    if not pages:
+        print("No *.html files found")
+        return 1
+
+    mismatches = 0
+    for page in pages:
+        old = legacy_extract(page)
+        new = _extract_page_fields(page)
+        if any(old[key] != new[key] for key in old):
+            mismatches += 1
+
+    legacy_seconds = bench(legacy_extract, pages, args.repeat)
+    anchored_seconds = bench(_extract_page_fields, pages, args.repeat)
+    total_kb = sum(len(page) for page in pages) / 1024
+    print(f"pages: {len(pages)} ({total_kb:.0f} KB), repeat: {args.repeat}")
+    print(f"legacy (5 scans): {legacy_seconds * 1000:.1f} ms")
+    print(f"anchored:         {anchored_seconds * 1000:.1f} ms")
+    print(f"speedup:          {legacy_seconds / anchored_seconds:.2f}x")
+    print(f"field mismatches: {mismatches}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,6 +4,7 @@ from fastapi.testclient import TestClient
 
 from api.main import app
 from lib import db as db_lib
+from lib import db_async
 
 
 def _set_env():
@@ -11,15 +12,19 @@ def _set_env():
     os.environ["DEFAULT_CLIENT_ID"] = "00000000-0000-0000-0000-000000000001"
 
 
+async def _value(value):
+    return value
+
+
 def test_admin_metrics(monkeypatch):
     _set_env()
     client = TestClient(app)
 
-    monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
-    monkeypatch.setattr(db_lib, "get_queue_counts", lambda *_: {"queued": 1})
-    monkeypatch.setattr(db_lib, "get_outbox_counts", lambda *_: {"queued": 2})
-    monkeypatch.setattr(db_lib, "get_run_counts", lambda *_: {"success": 3})
-    monkeypatch.setattr(db_lib, "list_recent_runs", lambda *_args, **_kwargs: [])
+    monkeypatch.setattr(db_async, "get_async_supabase_client", lambda: _value(object()))
+    monkeypatch.setattr(db_async, "get_queue_counts", lambda *_: _value({"queued": 1}))
+    monkeypatch.setattr(db_async, "get_outbox_counts", lambda *_: _value({"queued": 2}))
+    monkeypatch.setattr(db_async, "get_run_counts", lambda *_: _value({"success": 3}))
+    monkeypatch.setattr(db_async, "list_recent_runs", lambda *_args, **_kwargs: _value([]))
 
     response = client.get(
         "/admin/metrics",
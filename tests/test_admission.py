@@ -0,0 +1,71 @@
+from lib.admission import AdmissionOption, admit, truncate_enrichment
+from lib.token_estimator import TokenEstimator
+
+
+def _messages(chars):
+    return [{"role": "system", "content": "x" * 40}, {"role": "user", "content": "y" * chars}]
+
+
+def _options():
+    return [
+        AdmissionOption("gpt-4o", _messages(8000), 2000),
+        AdmissionOption("gpt-4o-mini", _messages(8000), 2000),
+        AdmissionOption("gpt-4o", _messages(400), 2000, truncated=True),
+    ]
+
+
+def test_estimator_calibrates_chars_per_token():
+    estimator = TokenEstimator(use_tokenizer=False)
+    messages = _messages(4000)
+    assert estimator.count_messages(messages, "gpt-4o") == 10 + 1000 + 8 + 3
+
+    # Provider reports 3 chars per token
+    for _ in range(50):
+        estimator.observe("gpt-4o", messages, 4040 // 3 + 11)
+    assert round(estimator.chars_per_token("gpt-4o"), 1) == 3.0
+    assert estimator.chars_per_token("gpt-4o-mini") == 4.0
+
+
+def test_admit_allows_preferred_option_within_limits():
+    decision = admit(_options(), spent_usd=0.0, max_cost_usd=0.50, estimator=TokenEstimator(use_tokenizer=False))
+    assert decision.action == "allow"
+    assert decision.option.model == "gpt-4o"
+
+
+def test_admit_downgrades_when_run_allowance_is_short():
+    estimator = TokenEstimator(use_tokenizer=False)
+    full = estimator.estimate_cost("gpt-4o", _messages(8000), 2000)
+    decision = admit(_options(), spent_usd=0.50 - full / 2, max_cost_usd=0.50, estimator=estimator)
+    assert decision.action == "downgrade"
+    assert decision.option.model == "gpt-4o-mini"
+    assert decision.as_step("qualification")["model"] == "gpt-4o-mini"
+
+
+def test_admit_truncates_before_refusing():
+    estimator = TokenEstimator(use_tokenizer=False)
+    options = [_options()[0], _options()[2]]
+    trimmed = estimator.estimate_cost("gpt-4o", _messages(400), 2000)
+    decision = admit(options, budget_remaining_usd=trimmed, estimator=estimator)
+    assert decision.action == "truncate"
+    assert decision.option.truncated
+
+
+def test_admit_refuses_when_monthly_budget_is_spent():
+    decision = admit(_options(), max_cost_usd=0.50, budget_remaining_usd=0.0, estimator=TokenEstimator(use_tokenizer=False))
+    assert decision.action == "refuse"
+    assert not decision.admitted
+    assert decision.limit_usd == 0.0
+
+
+def test_truncate_enrichment_drops_urls_and_shortens_text():
+    data = {
+        "description": "a" * 500,
+        "logo_url": "https://example.com/logo.png",
+        "technologies": ["a", "b", "c", "d"],
+        "employees": 40,
+    }
+    trimmed = truncate_enrichment(data, max_chars=20)
+    assert "logo_url" not in trimmed
+    assert trimmed["description"] == "a" * 20 + "..."
+    assert trimmed["technologies"] == ["a", "b", "c"]
+    assert trimmed["employees"] == 40
@@ -0,0 +1,68 @@
+from lib.budget_ledger import BudgetLedger, MemoryLedgerStore, SQLiteLedgerStore
+from lib.cost_tracker import CostTracker
+from lib.kill_switch import KillSwitch
+
+
+class _CountingStore(MemoryLedgerStore):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def add(self, period, client_id, amount_usd):
+        self.calls += 1
+        return super().add(period, client_id, amount_usd)
+
+
+def test_processes_sharing_a_store_see_combined_spend(tmp_path):
+    path = str(tmp_path / "ledger.db")
+    worker_a = BudgetLedger(SQLiteLedgerStore(path), global_limit_usd=1.0, client_limit_usd=0, reservation_usd=0.1, sync_seconds=0)
+    worker_b = BudgetLedger(SQLiteLedgerStore(path), global_limit_usd=1.0, client_limit_usd=0, reservation_usd=0.1, sync_seconds=0)
+
+    for _ in range(6):
+        worker_a.charge("c1", 0.1)
+        worker_b.charge("c2", 0.05)
+    assert worker_a.allows("c1")
+
+    worker_b.charge("c2", 0.2)
+    assert not worker_a.allows("c1")
+    assert not worker_b.allows()
+
+
+def test_reservations_avoid_round_trips_and_are_released():
+    store = _CountingStore()
+    ledger = BudgetLedger(store, global_limit_usd=10, client_limit_usd=0.5, reservation_usd=0.25, sync_seconds=60)
+
+    for _ in range(10):
+        ledger.charge("c1", 0.02)
+    assert store.calls == 1
+    assert ledger.totals("c1") == (0.25, 0.25)
+
+    ledger.charge("c1", 0.4)
+    assert store.calls == 2
+    assert not ledger.allows("c1")
+    assert ledger.allows("c2")
+
+    ledger.release()
+    global_total, client_total = store.add(ledger._period, "c1", 0)
+    assert round(client_total, 4) == 0.6 and round(global_total, 4) == 0.6
+
+
+def test_cost_tracker_charges_ledger_and_kill_switch_enforces_it():
+    ledger = BudgetLedger(MemoryLedgerStore(), global_limit_usd=5.0, client_limit_usd=0, reservation_usd=0.25, sync_seconds=0)
+    tracker = CostTracker(budget_limit_usd=5.0, ledger=ledger)
+    kill_switch = KillSwitch(budget_ledger=ledger, client_id="c1")
+    assert not kill_switch.should_kill()
+
+    tracker.record_usage("lead-qualifier", "c2", "gpt-4o", 1_000_000, 0)
+    assert kill_switch.should_kill()
+    assert kill_switch.state.kill_reason.startswith("budget_exceeded")
+
+
+def test_refreshing_totals_is_read_only():
+    store = _CountingStore()
+    ledger = BudgetLedger(store, global_limit_usd=10, client_limit_usd=0, reservation_usd=0.25, sync_seconds=0)
+    ledger.charge("c1", 0.1)
+
+    for _ in range(5):
+        assert ledger.remaining("c1") == 9.75
+    assert store.calls == 1
@@ -0,0 +1,79 @@
+import json
+from datetime import datetime
+
+from lib import db as db_lib
+from lib.cost_buffer import CostEventBuffer
+from lib.cost_tracker import CostTracker
+
+
+class _FlakyInsert:
+    def __init__(self):
+        self.down = False
+        self.batches: list[list[dict]] = []
+
+    def __call__(self, _db, rows):
+        if self.down:
+            raise ConnectionError("supabase unavailable")
+        self.batches.append(list(rows))
+        return rows
+
+
+def _row(n):
+    return db_lib.cost_event_row("c1", "llm", 0.01 * n, created_at=f"2026-03-0{n}T00:00:00")
+
+
+def test_flushes_multi_row_batches_on_size(monkeypatch, tmp_path):
+    insert = _FlakyInsert()
+    monkeypatch.setattr(db_lib, "record_cost_events", insert)
+    buffer = CostEventBuffer(object(), max_events=2, spool_path=str(tmp_path / "spool.jsonl"), start=False)
+
+    buffer.add(_row(1))
+    assert insert.batches == []
+    buffer.add(_row(2))
+    buffer.add(_row(3))
+    assert [len(batch) for batch in insert.batches] == [2]
+    assert buffer.pending() == 1
+
+    buffer.close()
+    assert [len(batch) for batch in insert.batches] == [2, 1]
+    assert set(insert.batches[0][0]) == set(insert.batches[1][0])
+
+
+def test_failed_flush_spools_to_disk_and_retries_first(monkeypatch, tmp_path):
+    insert = _FlakyInsert()
+    monkeypatch.setattr(db_lib, "record_cost_events", insert)
+    spool = tmp_path / "spool.jsonl"
+    buffer = CostEventBuffer(object(), max_events=10, spool_path=str(spool), spool_max_events=2, start=False)
+
+    insert.down = True
+    for n in (1, 2, 3):
+        buffer.add(_row(n))
+    assert buffer.flush() == 0
+    spooled = [json.loads(line) for line in spool.read_text().splitlines()]
+    assert [row["created_at"][:10] for row in spooled] == ["2026-03-02", "2026-03-03"]
+
+    insert.down = False
+    buffer.add(_row(4))
+    assert buffer.flush() == 3
+    assert [row["created_at"][9] for row in insert.batches[0]] == ["2", "3", "4"]
+    assert not spool.exists()
+
+
+def test_tracker_buffers_instead_of_inserting_inline(monkeypatch, tmp_path):
+    monkeypatch.setenv("COST_SPOOL_PATH", str(tmp_path / "spool.jsonl"))
+    monkeypatch.setenv("COST_BUFFER_FLUSH_SECONDS", "60")
+    insert = _FlakyInsert()
+    monkeypatch.setattr(db_lib, "record_cost_events", insert)
+    monkeypatch.setattr(
+        db_lib, "record_cost_event", lambda *_args, **_kwargs: (_ for _ in ()).throw(AssertionError("inline insert"))
+    )
+    tracker = CostTracker(db_client=object(), budget_limit_usd=100)
+    tracker.record_usage("lead-qualifier", "c1", "gpt-4o", 1000, 500, run_id="run-1")
+    tracker.record_event("email", "c1", 0.001, automation_name="lead-qualifier")
+    assert insert.batches == []
+
+    tracker.close()
+    rows = insert.batches[0]
+    assert [row["category"] for row in rows] == ["llm", "email"]
+    assert rows[0]["run_id"] == "run-1" and rows[1]["run_id"] is None
+    assert datetime.fromisoformat(rows[0]["created_at"])
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from lib import cost_tracker
+from lib.cost_tracker import CostTracker
+
+
+class _Clock(datetime):
+    now_value = datetime(2026, 3, 30, 12, 0, 0)
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now_value
+
+
+def _at(monkeypatch, value):
+    _Clock.now_value = value
+    monkeypatch.setattr(cost_tracker, "datetime", _Clock)
+
+
+def test_rollups_match_recorded_usage(monkeypatch):
+    tracker = CostTracker(budget_limit_usd=100)
+    _at(monkeypatch, datetime(2026, 3, 30, 9, 0))
+    tracker.record_usage("lead-qualifier", "c1", "gpt-4o", 1_000_000, 0)
+    tracker.record_usage("lead-qualifier", "c2", "gpt-4o-mini", 1_000_000, 0)
+    tracker.record_event("enrichment", "c1", 0.25, automation_name="lead-qualifier")
+    _at(monkeypatch, datetime(2026, 3, 31, 9, 0))
+    tracker.record_usage("outreach", "c1", "gpt-4o", 0, 1_000_000)
+
+    daily = tracker.get_daily_summary(datetime(2026, 3, 30))
+    assert daily.run_count == 2
+    assert round(daily.total_cost_usd, 4) == 5.40
+
+    client = tracker.get_client_summary("c1")
+    assert client.run_count == 2 and client.total_tokens_in == 1_000_000
+    assert round(client.total_cost_usd, 4) == 20.25
+    assert tracker.get_automation_summary("outreach").run_count == 1
+    assert round(tracker.get_monthly_total(), 4) == 20.40
+
+    _at(monkeypatch, datetime(2026, 4, 1, 0, 5))
+    assert tracker.get_monthly_total() == 0.0
+    tracker.record_usage("lead-qualifier", "c1", "gpt-4o", 1_000_000, 0)
+    assert round(tracker.get_monthly_total(), 4) == 5.0
+
+
+def test_raw_records_and_rollup_days_are_bounded(monkeypatch):
+    tracker = CostTracker(budget_limit_usd=100, max_records=3, retention_days=2)
+    for day in range(1, 6):
+        _at(monkeypatch, datetime(2026, 3, day, 12, 0))
+        tracker.record_usage("lead-qualifier", "c1", "gpt-4o", 1000, 0)
+
+    assert len(tracker._records) == 3
+    assert sorted(d.day for d in tracker._daily) == [3, 4, 5]
+    assert tracker.get_client_summary("c1", days=30).run_count == 3
+    assert round(tracker.get_monthly_total(), 4) == 0.025
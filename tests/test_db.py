@@ -0,0 +1,132 @@
+import asyncio
+import threading
+
+from lib import db as db_lib
+
+
+def test_supabase_client_is_shared(monkeypatch):
+    created = []
+
+    def _create():
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(db_lib, "_create_supabase_client", _create)
+    db_lib.reset_supabase_client()
+    try:
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(db_lib.get_supabase_client()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(created) == 1
+        assert all(result is created[0] for result in results)
+    finally:
+        db_lib.reset_supabase_client()
+
+
+class _FakeRpc:
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return self
+
+    def execute(self):
+        return self
+
+
+def test_run_counts_single_round_trip():
+    db = _FakeRpc([{"status": "success", "count": 4}, {"status": "queued", "count": 2}])
+    counts = db_lib.get_run_counts(db, "c1")
+    assert db.calls == [("status_counts", {"target_table": "runs", "target_client_id": "c1"})]
+    assert counts == {"pending": 0, "success": 4, "failed": 0, "killed": 0, "skipped": 0}
+
+
+class _FakeTable:
+    def __init__(self, rows):
+        self.data = rows
+
+    def table(self, _name):
+        return self
+
+    def update(self, _payload):
+        return self
+
+    def eq(self, *_args):
+        return self
+
+    def execute(self):
+        return self
+
+
+def test_settling_a_job_only_invalidates_its_clients_metrics(monkeypatch):
+    from lib import metrics_cache
+
+    cache = metrics_cache.MetricsCache(ttl_seconds=60)
+    monkeypatch.setattr(metrics_cache, "_cache", cache)
+    loads = []
+    for client_id in ("c1", "c2"):
+        cache.get_or_load(("admin_metrics", client_id), lambda: loads.append(1))
+
+    db_lib.mark_job_done(_FakeTable([{"id": "job-1", "client_id": "c1"}]), "job-1", "done")
+    cache.get_or_load(("admin_metrics", "c1"), lambda: loads.append(1))
+    cache.get_or_load(("admin_metrics", "c2"), lambda: loads.append(1))
+    assert len(loads) == 3
+
+
+def test_async_supabase_client_is_created_once_per_loop(monkeypatch):
+    from lib import db_async
+
+    created = []
+
+    async def _create():
+        await asyncio.sleep(0.01)
+        created.append(object())
+        return created[-1]
+
+    async def _run():
+        return await asyncio.gather(*(db_async.get_async_supabase_client() for _ in range(8)))
+
+    monkeypatch.setattr(db_async, "_create_async_supabase_client", _create)
+    db_async.reset_async_supabase_client()
+    try:
+        results = asyncio.run(_run())
+        assert len(created) == 1
+        assert all(result is created[0] for result in results)
+    finally:
+        db_async.reset_async_supabase_client()
+
+
+def test_async_supabase_client_for_a_new_loop_closes_the_old_one(monkeypatch):
+    from types import SimpleNamespace
+
+    from lib import db_async
+
+    closed = []
+
+    class _Session:
+        async def aclose(self):
+            closed.append(self)
+
+    created = []
+
+    async def _create():
+        created.append(SimpleNamespace(postgrest=SimpleNamespace(session=_Session())))
+        return created[-1]
+
+    monkeypatch.setattr(db_async, "_create_async_supabase_client", _create)
+    db_async.reset_async_supabase_client()
+    try:
+        first = asyncio.run(db_async.get_async_supabase_client())
+        second = asyncio.run(db_async.get_async_supabase_client())
+        assert first is not second
+        assert closed == [first.postgrest.session]
+    finally:
+        db_async.reset_async_supabase_client()
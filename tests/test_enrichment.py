@@ -0,0 +1,155 @@
+import asyncio
+
+import httpx
+
+from lib import enrichment
+from lib import enrichment_cache
+from lib.enrichment_cache import EnrichmentCache, MemoryCache
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", {"v": 1}, expires_at=9e12)
+    cache.set("b", {"v": 2}, expires_at=9e12)
+    cache.get("a")
+    cache.set("c", {"v": 3}, expires_at=9e12)
+    assert cache.get("b") is None
+    assert cache.get("a") == (9e12, {"v": 1})
+    assert len(cache) == 2
+
+
+def test_persistent_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "enrichment.db")
+    EnrichmentCache(path=path, ttl_seconds=60).set("https://acme.com", {"source": "scrape"})
+    fresh = EnrichmentCache(path=path, ttl_seconds=60)
+    assert fresh.get("https://acme.com") == {"source": "scrape"}
+
+
+def test_failed_fetch_is_negatively_cached(monkeypatch):
+    fetches = []
+
+    def _fetch(url):
+        fetches.append(url)
+        return None
+
+    monkeypatch.setattr(
+        enrichment_cache,
+        "_cache",
+        EnrichmentCache(path="", ttl_seconds=60, negative_ttl_seconds=60),
+    )
+    monkeypatch.setattr(enrichment, "_fetch_html", _fetch)
+    first = enrichment.enrich_company("https://dead.example")
+    second = enrichment.enrich_company("dead.example/about")
+    assert fetches == ["https://dead.example"]
+    assert first == second
+    assert first["source"] == "basic"
+
+
+def test_negative_entries_expire_sooner():
+    cache = EnrichmentCache(path="", ttl_seconds=600, negative_ttl_seconds=0)
+    cache.set("https://dead.example", {"source": "basic"}, negative=True)
+    assert cache.get("https://dead.example") is None
+
+
+def _fresh_cache(monkeypatch):
+    monkeypatch.setattr(enrichment_cache, "_cache", EnrichmentCache(path="", ttl_seconds=60))
+
+
+def test_enrich_companies_dedupes_and_preserves_order(monkeypatch):
+    _fresh_cache(monkeypatch)
+    requested = []
+
+    def _handler(request):
+        requested.append(str(request.url))
+        html = f"<html><head><title>{request.url.host}</title></head></html>"
+        return httpx.Response(200, text=html)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+            return await enrichment.enrich_companies(
+                ["acme.com", None, "https://beta.io/pricing", "https://acme.com/about"],
+                client=client,
+            )
+
+    results = asyncio.run(_run())
+    assert sorted(requested) == ["https://acme.com", "https://beta.io"]
+    assert [r.get("title") for r in results] == ["acme.com", None, "beta.io", "acme.com"]
+    assert results[1] == {}
+
+
+def test_async_fetch_caps_body_size(monkeypatch):
+    _fresh_cache(monkeypatch)
+    big = "<title>Big</title>" + "x" * 500_000
+
+    async def _run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, text=big))
+        async with httpx.AsyncClient(transport=transport) as client:
+            fetcher = enrichment._AsyncFetcher(
+                client,
+                per_host_limit=1,
+                deadline=asyncio.get_running_loop().time() + 5,
+            )
+            return await fetcher.fetch("https://big.example")
+
+    html = asyncio.run(_run())
+    assert len(html) == enrichment._MAX_HTML_BYTES
+
+
+def test_async_fetch_failure_returns_basic(monkeypatch):
+    _fresh_cache(monkeypatch)
+
+    def _handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+            return await enrichment.enrich_company_async("dead.example", client=client)
+
+    result = asyncio.run(_run())
+    assert result["domain"] == "dead.example"
+    assert result["source"] == "basic"
+
+
+def test_deadline_skips_and_server_errors_are_not_cached(monkeypatch):
+    _fresh_cache(monkeypatch)
+    requested = []
+
+    def _handler(request):
+        requested.append(request.url.host)
+        return httpx.Response(503)
+
+    async def _run(websites, deadline_seconds):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+            return await enrichment.enrich_companies(
+                websites, client=client, deadline_seconds=deadline_seconds
+            )
+
+    skipped = asyncio.run(_run(["late.example"], 0))
+    failed = asyncio.run(_run(["down.example"], 5))
+    assert skipped[0]["source"] == failed[0]["source"] == "basic"
+    assert requested == ["down.example"]
+    assert enrichment._get_cached("https://late.example") is None
+    assert enrichment._get_cached("https://down.example") is None
+
+
+def test_extract_page_fields():
+    html = (
+        "<html><head><title>Acme &amp; Co</title>"
+        "<meta property='og:description' content='Fallback'>"
+        "<meta content=\"Freight software\" name=\"Description\">"
+        "</head><body><a href='https://www.LinkedIn.com/company/acme-co/about'>in</a>"
+        "<p>Team of 120+ Employees</p></body></html>"
+    )
+    fields = enrichment._extract_page_fields(html)
+    assert fields["title"] == "Acme & Co"
+    assert fields["description"] == "Freight software"
+    assert fields["linkedin_company"] == "acme-co"
+    assert fields["size"] == "50-199"
+
+
+def test_extract_page_fields_og_fallback_and_missing():
+    fields = enrichment._extract_page_fields("<meta property='og:description' content='Only og'>")
+    assert fields["description"] == "Only og"
+    assert fields["title"] is None
+    assert fields["linkedin_url"] is None
+    assert fields["size"] is None
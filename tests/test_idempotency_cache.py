@@ -0,0 +1,40 @@
+import time
+
+from lib.idempotency_cache import RecentKeyCache
+
+
+def test_recent_keys_hit_after_add_and_count_lookups():
+    cache = RecentKeyCache(max_entries=10, ttl_seconds=60)
+
+    assert cache.get("k1") is None
+    cache.add("k1", "run-1")
+    assert cache.get("k1") == "run-1"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["size"] == 1
+
+
+def test_recent_keys_bounded_and_expiring():
+    cache = RecentKeyCache(max_entries=2, ttl_seconds=60)
+    cache.add("k1", "run-1")
+    cache.add("k2", "run-2")
+    cache.get("k1")
+    cache.add("k3", "run-3")
+
+    assert cache.get("k2") is None  # least recently used
+    assert cache.get("k1") == "run-1"
+
+    short = RecentKeyCache(max_entries=2, ttl_seconds=0.01)
+    short.add("k1", "run-1")
+    time.sleep(0.02)
+    assert short.get("k1") is None
+
+
+def test_recent_keys_disabled():
+    cache = RecentKeyCache(max_entries=0, ttl_seconds=60)
+    cache.add("k1", "run-1")
+    assert cache.get("k1") is None
+    assert cache.stats()["misses"] == 0
@@ -0,0 +1,36 @@
+import json
+
+from lib import enrichment
+from lib.industry import IndustryClassifier, load_taxonomy
+
+
+def test_word_boundaries_and_plurals():
+    assert enrichment._infer_industry("We maintain retail displays") == "Retail"
+    assert enrichment._infer_industry("Payments for clinics") == "Financial Services"
+    assert enrichment._infer_industry("Modern healthcare clinics") == "Healthcare"
+    assert enrichment._infer_industry("Nothing relevant here") == "Unknown"
+
+
+def test_weighted_scoring_and_phrases():
+    classifier = IndustryClassifier(
+        [
+            ("software", "Software"),
+            ("real estate", "Real Estate", 2.0),
+            ("estate", "Legal"),
+        ]
+    )
+    assert classifier.classify("Software for real estate teams") == "Real Estate"
+    assert classifier.scores("real estate real estate") == {"Real Estate": 2.0, "Legal": 1.0}
+
+
+def test_ties_go_to_first_listed_industry():
+    classifier = IndustryClassifier([("ai", "Software"), ("agency", "Agency")])
+    assert classifier.classify("AI agency") == "Software"
+
+
+def test_load_taxonomy(tmp_path):
+    path = tmp_path / "taxonomy.json"
+    path.write_text(json.dumps({"Legal": {"law firm": 3}, "Education": ["school", "tutoring"]}))
+    classifier = IndustryClassifier(load_taxonomy(str(path)))
+    assert len(classifier) == 3
+    assert classifier.classify("Tutoring for law firms") == "Legal"
@@ -1,9 +1,13 @@
 import os
+import json
 
+import pytest
 from fastapi.testclient import TestClient
 
 from api.main import app
 from lib import db as db_lib
+from lib import db_async
+from lib.idempotency_cache import get_recent_keys
 
 
 def _set_env():
@@ -11,14 +15,29 @@ def _set_env():
     os.environ["DEFAULT_CLIENT_ID"] = "00000000-0000-0000-0000-000000000001"
 
 
+@pytest.fixture(autouse=True)
+def _clear_recent_keys():
+    get_recent_keys().clear()
+    yield
+    get_recent_keys().clear()
+
+
+async def _value(value):
+    return value
+
+
 def test_intake_valid_payload(monkeypatch):
     _set_env()
     client = TestClient(app)
 
-    monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
-    monkeypatch.setattr(db_lib, "get_run_by_idempotency", lambda *_: None)
-    monkeypatch.setattr(db_lib, "create_run", lambda *_args, **_kwargs: {"id": "run-1"})
-    monkeypatch.setattr(db_lib, "enqueue_job", lambda *_args, **_kwargs: {"id": "job-1"})
+    monkeypatch.setattr(db_async, "get_async_supabase_client", lambda: _value(object()))
+    calls = []
+
+    async def fake_intake(*_args, **kwargs):
+        calls.append(kwargs)
+        return {"status": "queued", "run_id": "run-1", "job_id": "job-1"}
+
+    monkeypatch.setattr(db_async, "intake_lead", fake_intake)
 
     payload = {
         "name": "Test User",
@@ -36,15 +55,19 @@ def test_intake_valid_payload(monkeypatch):
     assert data["status"] == "queued"
     assert data["run_id"] == "run-1"
     assert data["job_id"] == "job-1"
+    assert len(calls) == 1
+    assert calls[0]["job_payload"]["email"] == "test@example.com"
 
 
 def test_intake_duplicate_detection(monkeypatch):
     _set_env()
     client = TestClient(app)
 
-    monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
+    monkeypatch.setattr(db_async, "get_async_supabase_client", lambda: _value(object()))
     monkeypatch.setattr(
-        db_lib, "get_run_by_idempotency", lambda *_: {"id": "run-dup"}
+        db_async,
+        "intake_lead",
+        lambda *_args, **_kwargs: _value({"status": "duplicate", "run_id": "run-dup"}),
     )
 
     payload = {
@@ -63,6 +86,34 @@ def test_intake_duplicate_detection(monkeypatch):
     assert data["run_id"] == "run-dup"
 
 
+def test_intake_replay_skips_database(monkeypatch):
+    _set_env()
+    client = TestClient(app)
+    calls = []
+
+    async def fake_intake(*_args, **kwargs):
+        calls.append(kwargs)
+        return {"status": "queued", "run_id": "run-1", "job_id": "job-1"}
+
+    monkeypatch.setattr(db_async, "get_async_supabase_client", lambda: _value(object()))
+    monkeypatch.setattr(db_async, "intake_lead", fake_intake)
+
+    payload = {
+        "name": "Test User",
+        "email": "test@example.com",
+        "timestamp": "2026-01-18T00:00:00Z",
+    }
+    headers = {"X-API-Key": "test-api-key"}
+    first = client.post("/webhook/lead", json=payload, headers=headers).json()
+    replay = client.post("/webhook/lead", json=payload, headers=headers).json()
+
+    assert first["status"] == "queued"
+    assert replay["status"] == "duplicate"
+    assert replay["run_id"] == "run-1"
+    assert len(calls) == 1
+    assert get_recent_keys().stats()["hits"] == 1
+
+
 def test_intake_blocked_domain(monkeypatch):
     _set_env()
     os.environ["PREFILTER_BLOCKED_DOMAINS"] = "blocked.com"
@@ -81,3 +132,73 @@ def test_intake_blocked_domain(monkeypatch):
     data = response.json()
     assert data["status"] == "filtered"
     assert data["reason"] == "blocked_domain"
+
+
+def test_intake_bulk_batches_round_trips(monkeypatch):
+    _set_env()
+    os.environ["PREFILTER_BLOCKED_DOMAINS"] = "blocked.com"
+    client = TestClient(app)
+    calls = {"intake": 0}
+    existing_key = db_lib.compute_idempotency_key("old@example.com", "2026-01-18T00:00:00Z", None)
+
+    async def fake_intake_leads(_db, _client_id, items):
+        calls["intake"] += 1
+        results = []
+        for i, item in enumerate(items):
+            if item["idempotency_key"] == existing_key:
+                results.append({"status": "duplicate", "run_id": "run-old"})
+            else:
+                results.append({"status": "queued", "run_id": f"run-{i}", "job_id": f"job-{i}"})
+            results[-1]["idempotency_key"] = item["idempotency_key"]
+        return results
+
+    monkeypatch.setattr(db_async, "get_async_supabase_client", lambda: _value(object()))
+    monkeypatch.setattr(db_async, "intake_leads", fake_intake_leads)
+
+    same = {"name": "A", "email": "a@example.com", "timestamp": "2026-01-18T00:00:00Z"}
+    leads = [
+        same,
+        {"name": "B", "email": "b@example.com"},
+        same,
+        {"name": "Old", "email": "old@example.com", "timestamp": "2026-01-18T00:00:00Z"},
+        {"name": "Spam", "email": "x@blocked.com"},
+        {"name": "Bad", "email": "not-an-email"},
+    ]
+    body = "\n".join(json.dumps(lead) for lead in leads)
+    response = client.post(
+        "/webhook/leads/bulk",
+        content=body,
+        headers={"X-API-Key": "test-api-key", "Content-Type": "application/x-ndjson"},
+    )
+    os.environ.pop("PREFILTER_BLOCKED_DOMAINS")
+
+    assert response.status_code == 202
+    items = response.json()["items"]
+    assert [item["status"] for item in items] == [
+        "queued", "queued", "duplicate", "duplicate", "filtered", "invalid",
+    ]
+    assert items[0]["run_id"] == "run-0" and items[0]["job_id"] == "job-0"
+    assert items[2]["run_id"] == "run-0"
+    assert items[3]["run_id"] == "run-old"
+    assert calls == {"intake": 1}
+
+
+def test_intake_bulk_failure_does_not_cache_keys(monkeypatch):
+    _set_env()
+    client = TestClient(app)
+
+    async def failing_intake_leads(_db, _client_id, _items):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(db_async, "get_async_supabase_client", lambda: _value(object()))
+    monkeypatch.setattr(db_async, "intake_leads", failing_intake_leads)
+
+    body = json.dumps([{"name": "A", "email": "a@example.com", "timestamp": "2026-01-18T00:00:00Z"}])
+    with pytest.raises(RuntimeError):
+        client.post(
+            "/webhook/leads/bulk",
+            content=body,
+            headers={"X-API-Key": "test-api-key", "Content-Type": "application/json"},
+        )
+    key = db_lib.compute_idempotency_key("a@example.com", "2026-01-18T00:00:00Z", None)
+    assert get_recent_keys().get(key) is None
@@ -0,0 +1,77 @@
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+from lib import llm_cache
+from lib.llm_cache import LLMResponseCache
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+AGENT_ROOT = os.path.join(ROOT_DIR, "automations", "lead-qualifier")
+if AGENT_ROOT not in sys.path:
+    sys.path.append(AGENT_ROOT)
+
+from agent.qualifier import qualify_lead  # noqa: E402
+
+
+class _FakeLLM:
+    def __init__(self, content):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._content = content
+
+    def _create(self, **_kwargs):
+        self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self._content))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=50),
+        )
+
+
+def test_key_normalizes_whitespace_and_separates_models():
+    cache = LLMResponseCache(max_entries=10, path="", ttl_seconds=60)
+    key = cache.key("gpt-4o", 0.3, "Score  this\n lead")
+    assert key == cache.key("gpt-4o", 0.3, "Score this lead")
+    assert key != cache.key("gpt-4o-mini", 0.3, "Score this lead")
+    assert key != cache.key("gpt-4o", 0.7, "Score this lead")
+
+    fields = {"domain": "acme.io", "message": llm_cache.fingerprint("Need help!")}
+    assert cache.key("gpt-4o", 0.3, "a", fields=fields) != cache.key("gpt-4o", 0.3, "b", fields=fields)
+    cache.field_keys = True
+    assert cache.key("gpt-4o", 0.3, "a", fields=fields) == cache.key("gpt-4o", 0.3, "b", fields=fields)
+
+
+def test_persistent_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "llm.db")
+    first = LLMResponseCache(max_entries=10, path=path, ttl_seconds=60)
+    first.set("k", '{"ok": true}')
+
+    second = LLMResponseCache(max_entries=10, path=path, ttl_seconds=60)
+    assert second.get("k") == '{"ok": true}'
+    second.discard("k")
+    assert LLMResponseCache(max_entries=10, path=path, ttl_seconds=60).get("k") is None
+
+
+def test_qualify_lead_served_from_cache_with_zero_tokens(monkeypatch):
+    monkeypatch.setenv("LLM_STREAMING", "false")
+    monkeypatch.setattr(
+        llm_cache, "_cache", LLMResponseCache(max_entries=10, path="", ttl_seconds=60)
+    )
+    content = json.dumps({
+        "qualification_score": 75,
+        "qualification_label": "qualified",
+        "key_reason": "Clear intent",
+        "personalization_points": ["CRM migration"],
+    })
+    client = _FakeLLM(content)
+    kwargs = dict(name="Dana", email="dana@acme.io", company="Acme", message="Need help", llm_client=client)
+
+    first = qualify_lead(**kwargs)
+    second = qualify_lead(**kwargs)
+
+    assert client.calls == 1
+    assert first.tokens_in == 100 and not first.cache_hit
+    assert second.cache_hit
+    assert second.tokens_used == 0
+    assert second.label == "qualified"
+    assert second.model_name == first.model_name
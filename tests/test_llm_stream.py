@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from lib import llm_cache
+from lib.llm_cache import LLMResponseCache
+from lib.llm_stream import (
+    InvalidJSONStream,
+    StreamingJSONValidator,
+    astream_completion,
+    stream_completion,
+)
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+AGENT_ROOT = os.path.join(ROOT_DIR, "automations", "lead-qualifier")
+if AGENT_ROOT not in sys.path:
+    sys.path.append(AGENT_ROOT)
+
+from agent.qualifier import qualify_lead  # noqa: E402
+
+
+def _chunk(content=None, usage=None):
+    choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class _FakeStream:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.sent += 1
+            yield _chunk(piece)
+        yield _chunk(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30))
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeStreamingLLM:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.streams = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        assert kwargs["stream"] is True
+        stream = _FakeStream(self.responses.pop(0))
+        self.streams.append(stream)
+        return stream
+
+
+def _pieces(text, size=5):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_validator_reports_fields_as_they_complete():
+    validator = StreamingJSONValidator()
+    completed = []
+    for piece in _pieces('```json\n{"score": 82, "label": "qualified", "points": ["a, b", {"x": "}"}]}\n```', 3):
+        completed += validator.feed(piece)
+    assert completed == ["score", "label", "points"]
+    assert validator.fields["points"] == ["a, b", {"x": "}"}]
+    assert validator.complete
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Sure! Here is the JSON",
+        '{"score": 82]',
+        '{"score": oops}',
+        '{"score": 1} trailing',
+    ],
+)
+def test_validator_rejects_structural_errors(text):
+    validator = StreamingJSONValidator()
+    with pytest.raises(InvalidJSONStream):
+        for piece in _pieces(text, 4):
+            validator.feed(piece)
+
+
+def test_stream_aborts_on_prose_and_closes_stream():
+    client = _FakeStreamingLLM(_pieces("Here is my analysis of the lead. " * 20))
+    with pytest.raises(InvalidJSONStream):
+        stream_completion(client, {"model": "gpt-4o", "messages": []})
+    assert client.streams[0].closed
+    assert client.streams[0].sent == 1
+
+
+def test_async_stream_returns_content_and_usage():
+    class _AsyncStream(_FakeStream):
+        async def __aiter__(self):
+            for chunk in super().__iter__():
+                yield chunk
+
+    class _AsyncLLM:
+        def __init__(self):
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+        async def _create(self, **_kwargs):
+            return _AsyncStream(_pieces('{"email_subject": "Hi", "email_body": "Hello"}'))
+
+    content, tokens_in, tokens_out = asyncio.run(astream_completion(_AsyncLLM(), {}))
+    assert json.loads(content)["email_subject"] == "Hi"
+    assert (tokens_in, tokens_out) == (120, 30)
+
+
+def test_qualify_lead_retries_after_early_abort_and_reports_decision(monkeypatch):
+    monkeypatch.setenv("LLM_STREAMING", "true")
+    monkeypatch.setattr(llm_cache, "_cache", LLMResponseCache(max_entries=10, path="", ttl_seconds=0))
+    valid = json.dumps({
+        "qualification_score": 72,
+        "qualification_label": "qualified",
+        "key_reason": "Budget and timeline",
+        "personalization_points": ["Hiring ops lead"],
+    })
+    client = _FakeStreamingLLM(_pieces("I think this lead is promising because " * 10), _pieces(valid))
+    decisions = []
+
+    result = qualify_lead(
+        name="Dana",
+        email="dana@acme.io",
+        company="Acme",
+        llm_client=client,
+        on_decision=lambda score, label: decisions.append((score, label, client.streams[-1].sent)),
+    )
+
+    assert result.label == "qualified" and result.tokens_in == 120
+    assert client.streams[0].closed and client.streams[0].sent == 1
+    score, label, sent = decisions[0]
+    assert (score, label) == (72, "qualified")
+    assert sent < len(_pieces(valid))
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+from lib.metrics_cache import MetricsCache
+
+
+def test_cache_hits_until_invalidated():
+    cache = MetricsCache(ttl_seconds=60)
+    loads = []
+
+    def _load():
+        loads.append(1)
+        return {"queued": len(loads)}
+
+    assert cache.get_or_load(("admin_metrics", "c1"), _load) == {"queued": 1}
+    assert cache.get_or_load(("admin_metrics", "c1"), _load) == {"queued": 1}
+    cache.invalidate("c2")
+    assert cache.get_or_load(("admin_metrics", "c1"), _load) == {"queued": 1}
+    cache.invalidate("c1")
+    assert cache.get_or_load(("admin_metrics", "c1"), _load) == {"queued": 2}
+
+
+def test_concurrent_misses_share_one_load():
+    cache = MetricsCache(ttl_seconds=60)
+    loads = []
+
+    def _load():
+        loads.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load(("k", None), _load)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert results == ["value"] * 5
+
+
+def test_zero_ttl_disables_cache():
+    cache = MetricsCache(ttl_seconds=0)
+    loads = []
+    cache.get_or_load(("k", None), lambda: loads.append(1))
+    cache.get_or_load(("k", None), lambda: loads.append(1))
+    assert len(loads) == 2
+
+
+def test_async_concurrent_misses_share_one_load():
+    cache = MetricsCache(ttl_seconds=60)
+    loads = []
+
+    async def _load():
+        loads.append(1)
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def _run():
+        return await asyncio.gather(
+            *(cache.get_or_load_async(("k", None), _load) for _ in range(5))
+        )
+
+    assert asyncio.run(_run()) == ["value"] * 5
+    assert len(loads) == 1
+
+
+def test_invalidation_only_discards_that_clients_in_flight_loads():
+    cache = MetricsCache(ttl_seconds=60)
+
+    def _load_during(client_id):
+        def _load():
+            cache.invalidate(client_id)
+            return "value"
+
+        return _load
+
+    cache.get_or_load(("admin_metrics", "c1"), _load_during("c2"))
+    cache.get_or_load(("admin_metrics", "c2"), _load_during("c2"))
+    assert cache.get_or_load(("admin_metrics", "c1"), lambda: "reloaded") == "value"
+    assert cache.get_or_load(("admin_metrics", "c2"), lambda: "reloaded") == "reloaded"
+
+
+def test_expired_keys_release_their_locks():
+    cache = MetricsCache(ttl_seconds=0.01)
+    for index in range(20):
+        cache.get_or_load(("admin_metrics", f"c{index}"), lambda: "value")
+    time.sleep(0.02)
+    cache.get_or_load(("admin_metrics", "fresh"), lambda: "value")
+    assert set(cache._key_locks) == {("admin_metrics", "fresh")}
+    assert set(cache._entries) == {("admin_metrics", "fresh")}
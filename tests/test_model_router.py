@@ -0,0 +1,84 @@
+from lib import db as db_lib
+from lib.model_router import LatencyTracker, ModelRouter
+
+
+def _router(**kwargs):
+    defaults = {
+        "models": ["gpt-4o-mini", "gpt-4o"],
+        "queue_deep": 50,
+        "low_budget_usd": 5.0,
+        "latency_slo_seconds": 20.0,
+        "review_band": (40, 69),
+        "queue_depth_ttl_seconds": 60.0,
+        "latency": LatencyTracker(),
+    }
+    defaults.update(kwargs)
+    return ModelRouter(**defaults)
+
+
+def test_prescore_picks_model_when_there_is_no_pressure():
+    router = _router()
+    borderline = router.route_qualification("gpt-4o", prescore_score=55, queue_depth=3, budget_remaining_usd=100)
+    assert (borderline.model, borderline.reason) == ("gpt-4o", "borderline_prescore")
+
+    clear = router.route_qualification("gpt-4o", prescore_score=85, queue_depth=3, budget_remaining_usd=100)
+    assert (clear.model, clear.reason) == ("gpt-4o-mini", "clear_prescore")
+    assert clear.as_step()["queue_depth"] == 3
+
+
+def test_deep_queue_and_low_budget_shift_to_cheapest_model():
+    router = _router()
+    deep = router.route_qualification("gpt-4o", prescore_score=55, queue_depth=80)
+    assert (deep.model, deep.reason) == ("gpt-4o-mini", "queue_deep")
+
+    broke = router.route_qualification("gpt-4o", prescore_score=55, budget_remaining_usd=1.0)
+    assert (broke.model, broke.reason) == ("gpt-4o-mini", "low_budget")
+    assert router.escalate(broke, "review") is None
+
+    draft = router.route_draft("gpt-4o-mini", queue_depth=80)
+    assert draft.model == "gpt-4o-mini"
+
+
+def test_slow_default_model_routes_to_fastest_cheaper_model():
+    latency = LatencyTracker()
+    latency.record("gpt-4o", 30.0)
+    latency.record("gpt-3.5-turbo", 2.0)
+    latency.record("gpt-4o-mini", 4.0)
+    router = _router(models=["gpt-4o-mini", "gpt-3.5-turbo", "gpt-4o"], latency=latency)
+
+    decision = router.route_qualification("gpt-4o", prescore_score=55)
+    assert (decision.model, decision.reason) == ("gpt-3.5-turbo", "slow_model")
+
+
+def test_only_review_results_from_cheaper_models_escalate():
+    router = _router()
+    cheap = router.route_qualification("gpt-4o", prescore_score=55, queue_depth=80)
+
+    escalation = router.escalate(cheap, "review")
+    assert escalation.model == "gpt-4o"
+    assert escalation.as_step()["escalated_from"] == "gpt-4o-mini"
+    assert router.escalate(cheap, "qualified") is None
+
+    strong = router.route_qualification("gpt-4o", prescore_score=55)
+    assert router.escalate(strong, "review") is None
+
+
+def test_queue_depth_is_cached_and_tolerates_errors(monkeypatch):
+    calls = []
+    monkeypatch.setattr(db_lib, "get_queue_depth", lambda _db: calls.append(1) or 12)
+    router = _router()
+    assert router.queue_depth(object()) == 12
+    assert router.queue_depth(object()) == 12
+    assert len(calls) == 1
+
+    def _fail(_db):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(db_lib, "get_queue_depth", _fail)
+    assert _router(queue_depth_ttl_seconds=0).queue_depth(object()) is None
+
+
+def test_only_openai_models_are_routable(caplog):
+    router = _router(models=["gpt-4o-mini", "claude-3-haiku", "unknown-model", "gpt-4o"])
+    assert router.models == ["gpt-4o-mini", "gpt-4o"]
+    assert "claude-3-haiku" in caplog.text
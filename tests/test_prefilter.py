@@ -0,0 +1,50 @@
+import json
+import os
+
+from lib.prefilter import DomainPrefilter, DomainTrie
+
+
+def test_trie_matches_domain_and_subdomains_only():
+    trie = DomainTrie(["blocked.com", "Spam.Example.org."])
+
+    assert trie.match("blocked.com") == "blocked.com"
+    assert trie.match("mail.eu.blocked.com") == "blocked.com"
+    assert trie.match("spam.example.org") == "spam.example.org"
+    assert trie.match("notblocked.com") is None
+    assert trie.match("example.org") is None
+    assert len(trie) == 2
+
+
+def test_prefilter_env_and_disposable(monkeypatch):
+    monkeypatch.setenv("PREFILTER_BLOCKED_DOMAINS", "blocked.com, other.io")
+    prefilter = DomainPrefilter(config_path="", block_disposable=True)
+
+    assert prefilter.check("a@sub.blocked.com") == "blocked_domain"
+    assert prefilter.check("a@mailinator.com") == "disposable_domain"
+    assert prefilter.check("a@example.com") is None
+
+    monkeypatch.setenv("PREFILTER_BLOCKED_DOMAINS", "example.com")
+    assert prefilter.check("a@example.com") == "blocked_domain"
+    assert prefilter.check("a@blocked.com") is None
+
+
+def test_prefilter_client_overrides_and_reload(tmp_path, monkeypatch):
+    monkeypatch.delenv("PREFILTER_BLOCKED_DOMAINS", raising=False)
+    path = tmp_path / "prefilter.json"
+    path.write_text(json.dumps({
+        "blocked": ["spam.com"],
+        "clients": {"c1": {"block": ["rival.com"], "allow": ["mailinator.com"]}},
+    }))
+    prefilter = DomainPrefilter(config_path=str(path), block_disposable=True, reload_seconds=0)
+
+    assert prefilter.check("a@rival.com", "c1") == "blocked_domain"
+    assert prefilter.check("a@rival.com", "c2") is None
+    assert prefilter.check("a@mailinator.com", "c1") is None
+    assert prefilter.check("a@mailinator.com", "c2") == "disposable_domain"
+    assert prefilter.check("a@x.spam.com") == "blocked_domain"
+
+    path.write_text(json.dumps({"blocked": ["new.com"]}))
+    mtime = os.path.getmtime(path) + 5
+    os.utime(path, (mtime, mtime))
+    assert prefilter.check("a@spam.com") is None
+    assert prefilter.check("a@new.com") == "blocked_domain"
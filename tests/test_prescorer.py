@@ -0,0 +1,77 @@
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+AGENT_ROOT = os.path.join(ROOT_DIR, "automations", "lead-qualifier")
+if AGENT_ROOT not in sys.path:
+    sys.path.append(AGENT_ROOT)
+
+from agent.prescorer import PrescoreConfig, prescore_lead  # noqa: E402
+
+
+def test_obvious_junk_is_disqualified():
+    result = prescore_lead(email="someone@gmail.com", name="Jo", message="")
+    assert result.label == "disqualified"
+    assert {"free_mail", "no_company", "empty_message"} <= set(result.signals)
+
+    result = prescore_lead(
+        email="asdf@acme.io",
+        name="asdf",
+        company="Acme",
+        website="acme.io",
+        message="Looking for automation help with our CRM",
+    )
+    assert result.label == "disqualified"
+    assert "test_lead" in result.signals
+
+
+def test_short_messages_are_not_false_negatives():
+    quote = prescore_lead(email="jo@gmail.com", name="Jo", message="Need a quote")
+    assert {"short_message", "intent_keywords"} <= set(quote.signals)
+    assert quote.label is None
+
+    # short_message is the only thing between this lead and the threshold
+    terse = prescore_lead(email="jo@gmail.com", name="Jo", website="jo-bakery.com", message="Hi there")
+    assert terse.score < 15
+    assert terse.label is None
+
+
+def test_strong_lead_is_qualified_and_ambiguous_goes_to_llm():
+    strong = prescore_lead(
+        email="ceo@acme.io",
+        name="Dana Smith",
+        company="Acme",
+        website="https://www.acme.io",
+        message="We need help to automate invoicing. " * 8 + "Can you send pricing?",
+        enrichment_data={"industry": "Financial Services", "company_size": "200-999"},
+    )
+    assert strong.label == "qualified"
+    assert strong.score == 100
+
+    ambiguous = prescore_lead(
+        email="dana@gmail.com",
+        name="Dana Smith",
+        company="Acme",
+        message="Can we talk about automation for our team?",
+    )
+    assert ambiguous.label is None
+    assert not ambiguous.decided
+
+
+def test_client_overrides(monkeypatch):
+    monkeypatch.setenv("PRESCORE_QUALIFY_AT", "95")
+    config = PrescoreConfig.from_env({"enabled": False})
+    result = prescore_lead(email="someone@gmail.com", config=config)
+    assert result.label is None
+
+    config = PrescoreConfig.from_env(
+        {"disqualify_below": 40, "free_mail_domains": ["web.de"], "weights": {"no_website": 0}}
+    )
+    result = prescore_lead(
+        email="dana@web.de",
+        company="Acme",
+        message="Can we talk about automation for our team?",
+        config=config,
+    )
+    assert "free_mail" in result.signals
+    assert result.score == 50
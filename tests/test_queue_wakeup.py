@@ -0,0 +1,24 @@
+import threading
+
+from lib.queue_wakeup import QueueWakeup
+
+
+def test_backoff_doubles_up_to_cap():
+    wakeup = QueueWakeup(dsn="", min_seconds=0.001, max_seconds=0.004)
+    delays = []
+    for _ in range(4):
+        delays.append(min(wakeup._delay, wakeup.max_seconds))
+        assert wakeup.wait() is False
+    assert delays == [0.001, 0.002, 0.004, 0.004]
+
+    wakeup.reset()
+    assert wakeup._delay == 0.001
+
+
+def test_notify_wakes_waiter_and_resets_backoff():
+    wakeup = QueueWakeup(dsn="", min_seconds=5, max_seconds=10)
+    wakeup._delay = 10
+    timer = threading.Timer(0.01, wakeup.notify)
+    timer.start()
+    assert wakeup.wait() is True
+    assert wakeup._delay == 5
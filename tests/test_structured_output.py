@@ -0,0 +1,97 @@
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from lib import llm_cache, structured_output
+from lib.llm_cache import LLMResponseCache
+from lib.structured_output import (
+    RetryCounter,
+    call_with_schema_fallback,
+    strict_schema,
+    with_response_format,
+)
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+AGENT_ROOT = os.path.join(ROOT_DIR, "automations", "lead-qualifier")
+if AGENT_ROOT not in sys.path:
+    sys.path.append(AGENT_ROOT)
+
+from agent.config import QUALIFICATION_OUTPUT_SCHEMA  # noqa: E402
+from agent.qualifier import qualify_lead  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _reset(monkeypatch):
+    monkeypatch.setattr(structured_output, "_unsupported_models", set())
+    monkeypatch.setattr(structured_output, "_retry_counter", RetryCounter())
+    monkeypatch.setenv("LLM_STRUCTURED_OUTPUT", "true")
+    monkeypatch.setenv("LLM_STREAMING", "false")
+
+
+def test_strict_schema_requires_everything_and_drops_range_keywords():
+    schema = strict_schema(QUALIFICATION_OUTPUT_SCHEMA)
+    assert set(schema["required"]) == set(QUALIFICATION_OUTPUT_SCHEMA["properties"])
+    assert schema["additionalProperties"] is False
+    assert schema["properties"]["qualification_score"] == {"type": "integer"}
+    assert schema["properties"]["timing_score"] == {"type": ["integer", "null"]}
+    assert schema["properties"]["personalization_points"]["items"] == {"type": "string"}
+    assert "minimum" in QUALIFICATION_OUTPUT_SCHEMA["properties"]["qualification_score"]
+
+
+def test_response_format_can_be_disabled(monkeypatch):
+    request = {"model": "gpt-4o", "messages": []}
+    assert with_response_format(request, "x", QUALIFICATION_OUTPUT_SCHEMA)["response_format"]["type"] == "json_schema"
+    monkeypatch.setenv("LLM_STRUCTURED_OUTPUT", "false")
+    assert "response_format" not in with_response_format(request, "x", QUALIFICATION_OUTPUT_SCHEMA)
+
+
+def test_rejected_response_format_falls_back_and_is_remembered():
+    seen = []
+
+    def _call(request):
+        seen.append("response_format" in request)
+        if "response_format" in request:
+            raise RuntimeError("Invalid parameter: 'response_format' of type 'json_schema' is not supported")
+        return "ok"
+
+    request = with_response_format({"model": "legacy-model"}, "x", QUALIFICATION_OUTPUT_SCHEMA)
+    assert call_with_schema_fallback(_call, request) == "ok"
+    assert seen == [True, False]
+    assert "response_format" not in with_response_format({"model": "legacy-model"}, "x", QUALIFICATION_OUTPUT_SCHEMA)
+
+    with pytest.raises(RuntimeError):
+        call_with_schema_fallback(lambda _request: (_ for _ in ()).throw(RuntimeError("timeout")), {"model": "m"})
+
+
+def test_qualify_lead_sends_schema_and_counts_retries(monkeypatch):
+    monkeypatch.setattr(llm_cache, "_cache", LLMResponseCache(max_entries=10, path="", ttl_seconds=0))
+    valid = json.dumps({
+        "qualification_score": 55,
+        "qualification_label": "review",
+        "key_reason": "Unclear budget",
+        "personalization_points": [],
+        "company_fit_score": None,
+        "intent_score": 20,
+        "engagement_score": None,
+        "timing_score": None,
+    })
+    responses = ["not json", valid]
+    requests = []
+
+    def _create(**kwargs):
+        requests.append(kwargs)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=responses.pop(0)))],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5),
+        )
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+    result = qualify_lead(name="Dana", email="dana@acme.io", llm_client=client)
+
+    assert requests[0]["response_format"]["json_schema"]["name"] == "lead_qualification"
+    assert result.retries == 1 and result.company_fit_score == 0
+    counts = structured_output.get_retry_counter().snapshot()
+    assert counts[result.model_name] == {"calls": 1, "retries": 1, "failures": 0}
@@ -1,10 +1,20 @@
 import os
 from types import SimpleNamespace
 
+import pytest
+
+from lib import cost_tracker
 from lib import db as db_lib
+from lib import model_router
 from worker import main as worker
 
 
+@pytest.fixture(autouse=True)
+def _memory_cost_tracker(monkeypatch):
+    # Keep fake DB clients from being attached to the shared tracker
+    monkeypatch.setattr(cost_tracker, "_tracker", cost_tracker.CostTracker())
+
+
 def _set_env():
     os.environ["DEFAULT_CLIENT_ID"] = "00000000-0000-0000-0000-000000000001"
     os.environ["EMAIL_COOLDOWN_DAYS"] = "7"
@@ -22,7 +32,7 @@ def test_job_claiming(monkeypatch):
         lambda *_: {"id": "job-1", "attempts": 0, "payload": {"email": "a@b.com"}, "client_id": "c1"},
     )
     monkeypatch.setattr(worker, "process_job", lambda *_: None)
-    monkeypatch.setattr(db_lib, "mark_job_done", lambda *_: calls.update(done=True))
+    monkeypatch.setattr(db_lib, "mark_job_done", lambda *_args, **_kwargs: calls.update(done=True))
 
     ran = worker.run_once()
     assert ran is True
@@ -33,7 +43,8 @@ def test_lead_qualification_flow(monkeypatch):
     _set_env()
 
     monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
-    monkeypatch.setattr(db_lib, "upsert_lead", lambda *_: None)
+    monkeypatch.setenv("PRESCORE_ENABLED", "false")
+    monkeypatch.setattr(db_lib, "upsert_lead", lambda *_args, **_kwargs: None)
     monkeypatch.setattr(db_lib, "get_automation_status", lambda *_: {"status": "active"})
     monkeypatch.setattr(db_lib, "is_email_suppressed", lambda *_: False)
     monkeypatch.setattr(db_lib, "email_sent_recently", lambda *_: False)
@@ -82,6 +93,143 @@ def test_lead_qualification_flow(monkeypatch):
     assert result["email_status"] == "queued"
 
 
+def test_prescore_disqualifies_without_llm(monkeypatch):
+    _set_env()
+    recorded = {}
+
+    monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
+    monkeypatch.setattr(db_lib, "upsert_lead", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(db_lib, "get_automation_status", lambda *_: {"status": "active"})
+    monkeypatch.setattr(db_lib, "is_email_suppressed", lambda *_: False)
+    monkeypatch.setattr(db_lib, "email_sent_recently", lambda *_: False)
+    monkeypatch.setattr(
+        db_lib, "update_run_details", lambda *_args, **kwargs: recorded.update(kwargs)
+    )
+    monkeypatch.setattr(db_lib, "update_lead_qualification", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(worker, "enrich_company", lambda *_: {})
+
+    def _no_llm(**_kwargs):
+        raise AssertionError("qualify_lead should not be called")
+
+    monkeypatch.setattr(worker, "qualify_lead", _no_llm)
+
+    result = worker.process_payload(
+        client_id="c1",
+        payload={"name": "Jo", "email": "jo@gmail.com", "message": ""},
+        run_id="run-1",
+        idempotency_key="idem-1",
+    )
+    assert result["status"] == "disqualified"
+    steps = {step["step"]: step for step in recorded["steps"]}
+    assert steps["prescore"]["status"] == "decided"
+    assert steps["qualification"]["source"] == "prescore"
+    assert recorded["llm_tokens_in"] == 0
+
+
+def test_admission_refuses_llm_call_over_run_allowance(monkeypatch):
+    _set_env()
+    recorded = {}
+
+    monkeypatch.setenv("MAX_COST_PER_RUN_USD", "0.0001")
+    monkeypatch.setenv("PRESCORE_ENABLED", "false")
+    monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
+    monkeypatch.setattr(db_lib, "upsert_lead", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(db_lib, "get_automation_status", lambda *_: {"status": "active"})
+    monkeypatch.setattr(db_lib, "is_email_suppressed", lambda *_: False)
+    monkeypatch.setattr(db_lib, "email_sent_recently", lambda *_: False)
+    monkeypatch.setattr(
+        db_lib, "update_run_details", lambda *_args, **kwargs: recorded.update(kwargs)
+    )
+    monkeypatch.setattr(worker, "enrich_company", lambda *_: {"description": "x" * 400})
+
+    def _no_llm(**_kwargs):
+        raise AssertionError("qualify_lead should not be called")
+
+    monkeypatch.setattr(worker, "qualify_lead", _no_llm)
+
+    result = worker.process_payload(
+        client_id="c1",
+        payload={"name": "Test User", "email": "test@example.com", "company": "Acme", "message": "Hello"},
+        run_id="run-1",
+        idempotency_key="idem-1",
+    )
+    assert result["status"] == "killed"
+    assert "admission_refused" in result["reason"]
+    admission = [step for step in recorded["steps"] if step["step"] == "admission"]
+    assert admission[0]["status"] == "refuse"
+
+
+def test_deep_queue_routes_to_cheap_model_and_escalates_review(monkeypatch):
+    _set_env()
+    recorded = {}
+    models = []
+
+    monkeypatch.setenv("PRESCORE_ENABLED", "false")
+    monkeypatch.setattr(
+        model_router,
+        "_router",
+        model_router.ModelRouter(
+            models=["gpt-4o-mini", "gpt-4o"], queue_deep=10, latency=model_router.LatencyTracker()
+        ),
+    )
+    monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
+    monkeypatch.setattr(db_lib, "get_queue_depth", lambda _db: 25)
+    monkeypatch.setattr(db_lib, "upsert_lead", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(db_lib, "get_automation_status", lambda *_: {"status": "active"})
+    monkeypatch.setattr(db_lib, "is_email_suppressed", lambda *_: False)
+    monkeypatch.setattr(db_lib, "email_sent_recently", lambda *_: False)
+    monkeypatch.setattr(
+        db_lib, "update_run_details", lambda *_args, **kwargs: recorded.update(kwargs)
+    )
+    monkeypatch.setattr(db_lib, "update_lead_qualification", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(db_lib, "queue_email", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(db_lib, "update_lead_status", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(worker, "enrich_company", lambda *_: {})
+
+    def _qualify(**kwargs):
+        model = kwargs["model"].name
+        models.append(model)
+        return SimpleNamespace(
+            score=60 if model == "gpt-4o-mini" else 75,
+            label="review" if model == "gpt-4o-mini" else "qualified",
+            key_reason="Fit",
+            personalization_points=[],
+            tokens_used=100,
+            tokens_in=60,
+            tokens_out=40,
+            model_name=model,
+        )
+
+    monkeypatch.setattr(worker, "qualify_lead", _qualify)
+    monkeypatch.setattr(
+        worker,
+        "draft_email",
+        lambda **kwargs: SimpleNamespace(
+            subject="Hello", body="Hi", tokens_used=80, tokens_in=40, tokens_out=40,
+            model_name=kwargs["model"].name,
+        ),
+    )
+
+    result = worker.process_payload(
+        client_id="c1",
+        payload={"name": "Test User", "email": "test@example.com", "company": "Acme", "message": "Hello"},
+        run_id="run-1",
+        idempotency_key="idem-1",
+        approval_mode_override=True,
+    )
+    assert result["status"] == "success"
+    assert models == ["gpt-4o-mini", "gpt-4o"]
+    routes = [step for step in recorded["steps"] if step["step"] == "model_route"]
+    assert [(step["stage"], step["model"], step["reason"]) for step in routes] == [
+        ("qualification", "gpt-4o-mini", "queue_deep"),
+        ("qualification", "gpt-4o", "review_escalation"),
+        ("email_draft", "gpt-4o-mini", "queue_deep"),
+    ]
+    qualification = next(step for step in recorded["steps"] if step["step"] == "qualification")
+    assert qualification["escalated"] is True
+    assert qualification["label"] == "qualified"
+
+
 def test_email_drafting_mock(monkeypatch):
     _set_env()
 
@@ -106,3 +254,239 @@ def test_email_drafting_mock(monkeypatch):
         enrichment_data={},
     )
     assert draft.subject == "Hello"
+
+
+def test_run_loop_concurrent_drain(monkeypatch):
+    _set_env()
+    monkeypatch.setenv("WORKER_CONCURRENCY", "3")
+    monkeypatch.setenv("WORKER_CLAIM_BATCH", "2")
+    monkeypatch.setenv("WORKER_POLL_SECONDS", "0")
+    jobs = [{"id": f"job-{i}", "attempts": 0, "payload": {}} for i in range(5)]
+    done: list[str] = []
+
+    def _claim(_db, _worker_id, _lease, limit):
+        if jobs:
+            batch = jobs[:limit]
+            del jobs[:limit]
+            return batch
+        worker.request_shutdown()
+        return []
+
+    monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
+    monkeypatch.setattr(db_lib, "claim_jobs", _claim)
+    monkeypatch.setattr(worker, "process_job", lambda *_: None)
+    monkeypatch.setattr(db_lib, "mark_job_done", lambda _db, job_id, *_args, **_kwargs: done.append(job_id))
+
+    try:
+        worker.run_loop()
+    finally:
+        worker._shutdown.clear()
+    assert sorted(done) == [f"job-{i}" for i in range(5)]
+
+
+def test_run_loop_claims_only_free_slots(monkeypatch):
+    _set_env()
+    monkeypatch.setenv("WORKER_CONCURRENCY", "2")
+    monkeypatch.setenv("WORKER_CLAIM_BATCH", "5")
+    monkeypatch.setenv("WORKER_POLL_SECONDS", "0")
+    jobs = [{"id": f"job-{i}", "attempts": 0, "payload": {}} for i in range(4)]
+    limits: list[int] = []
+
+    def _claim(_db, _worker_id, _lease, limit):
+        limits.append(limit)
+        if jobs:
+            batch = jobs[:limit]
+            del jobs[:limit]
+            return batch
+        worker.request_shutdown()
+        return []
+
+    monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
+    monkeypatch.setattr(db_lib, "claim_jobs", _claim)
+    monkeypatch.setattr(worker, "process_job", lambda *_: None)
+    monkeypatch.setattr(db_lib, "mark_job_done", lambda *_args, **_kwargs: None)
+
+    try:
+        worker.run_loop()
+    finally:
+        worker._shutdown.clear()
+    assert limits and max(limits) <= 2
+
+
+def test_run_loop_requeues_unstarted_jobs_on_shutdown(monkeypatch):
+    _set_env()
+    monkeypatch.setenv("WORKER_CONCURRENCY", "1")
+    monkeypatch.setenv("WORKER_CLAIM_BATCH", "3")
+    requeued: list[str] = []
+
+    def _process(_job):
+        worker.request_shutdown()
+
+    monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
+    monkeypatch.setattr(
+        db_lib,
+        "claim_jobs",
+        lambda *_: [{"id": f"job-{i}", "attempts": 1, "payload": {}} for i in range(3)],
+    )
+    monkeypatch.setattr(worker, "process_job", _process)
+    monkeypatch.setattr(db_lib, "mark_job_done", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(
+        db_lib,
+        "requeue_job",
+        lambda _db, job_id, **_kwargs: requeued.append(job_id),
+    )
+
+    try:
+        worker.run_loop()
+    finally:
+        worker._shutdown.clear()
+    assert requeued == ["job-1", "job-2"]
+
+
+def test_qualify_batch_submits_then_fans_out_results(monkeypatch, tmp_path):
+    import json
+
+    from lib.batch_llm import FileBatchBackend
+
+    _set_env()
+    qualified: dict[str, dict] = {}
+    runs: dict[str, str] = {}
+    deferred: list[dict] = []
+    attempt_counts: list[int] = []
+    progress: list[dict] = []
+
+    monkeypatch.setenv("LLM_BATCH_ENRICH_CHUNK", "1")
+    monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
+    enriched: list[list] = []
+
+    async def _enrich_companies(websites):
+        enriched.append(websites)
+        return [{"industry": "SaaS"} for _ in websites]
+
+    monkeypatch.setattr(worker, "enrich_companies", _enrich_companies)
+    monkeypatch.setattr(
+        db_lib,
+        "update_lead_qualification",
+        lambda _db, client_id, email, qualification, enrichment=None: qualified.update(
+            {email: qualification}
+        ),
+    )
+    monkeypatch.setattr(
+        db_lib,
+        "update_run_details",
+        lambda _db, run_id, status, **_kwargs: runs.update({run_id: status}),
+    )
+    monkeypatch.setattr(
+        db_lib,
+        "defer_job",
+        lambda _db, job_id, payload, delay_seconds, attempts: deferred.append(payload)
+        or attempt_counts.append(attempts),
+    )
+    monkeypatch.setattr(db_lib, "mark_job_done", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(
+        db_lib,
+        "update_job_payload",
+        lambda _db, job_id, payload: progress.append(json.loads(json.dumps(payload))),
+    )
+
+    def _respond(body):
+        prompt = body["messages"][-1]["content"]
+        score = 85 if "Acme" in prompt else 20
+        return json.dumps(
+            {
+                "qualification_score": score,
+                "qualification_label": "qualified" if score >= 70 else "disqualified",
+                "key_reason": "batch",
+                "personalization_points": [],
+            }
+        )
+
+    backend = FileBatchBackend(str(tmp_path))
+    monkeypatch.setattr(worker, "get_batch_backend", lambda: backend)
+    job = {
+        "id": "job-1",
+        "attempts": 1,
+        "client_id": "c1",
+        "job_type": "lead_qualify_batch",
+        "payload": {
+            "leads": [
+                {"email": "ceo@acme.com", "company": "Acme", "run_id": "run-1"},
+                {"email": "me@nowhere.io", "company": "Nowhere"},
+            ]
+        },
+    }
+
+    worker.handle_job(object(), job, max_attempts=5)
+    assert len(deferred) == 1 and deferred[0]["batch_id"]
+    assert enriched == [[None], [None]]  # one enrichment deadline per chunk
+    assert qualified == {}
+
+    # Still pending until the output file appears
+    job["payload"] = deferred[0]
+    worker.handle_job(object(), job, max_attempts=5)
+    assert len(deferred) == 2
+
+    assert attempt_counts == [0, 0]
+
+    # A batch pending past LLM_BATCH_MAX_WAIT_SECONDS fails instead of polling forever
+    monkeypatch.setenv("LLM_BATCH_MAX_WAIT_SECONDS", "60")
+    stale = {**job, "payload": {**deferred[0], "submitted_at": deferred[0]["submitted_at"] - 120}}
+    with pytest.raises(RuntimeError, match="still"):
+        worker.process_job(stale)
+
+    backend.responder = _respond
+    backend.complete(deferred[0]["batch_id"])
+    result = worker.process_job(job)
+
+    assert result["status"] == "completed"
+    assert qualified["ceo@acme.com"]["label"] == "qualified"
+    assert qualified["me@nowhere.io"]["label"] == "disqualified"
+    assert runs == {"run-1": "success"}
+    assert progress[-1]["recorded"] == ["lead-0", "lead-1"]
+
+    # A retry after a partial fan-out only settles the remaining results
+    qualified.clear()
+    spent = cost_tracker.get_cost_tracker().get_monthly_total()
+    job["payload"] = progress[0]
+    result = worker.process_job(job)
+    assert list(qualified) == ["me@nowhere.io"]
+    assert result["disqualified"] == 1 and result["qualified"] == 0
+    assert cost_tracker.get_cost_tracker().get_monthly_total() > spent
+    spent = cost_tracker.get_cost_tracker().get_monthly_total()
+    job["payload"] = progress[-1]
+    worker.process_job(job)
+    assert cost_tracker.get_cost_tracker().get_monthly_total() == spent
+
+
+def test_qualify_batch_is_gated_on_the_budget_ledger(monkeypatch, tmp_path):
+    from lib.batch_llm import FileBatchBackend
+    from lib.budget_ledger import BudgetLedger, MemoryLedgerStore
+
+    _set_env()
+    submitted: list[list] = []
+
+    async def _enrich_companies(websites):
+        return [{} for _ in websites]
+
+    ledger = BudgetLedger(MemoryLedgerStore(), global_limit_usd=0.025, client_limit_usd=0, sync_seconds=0)
+    monkeypatch.setattr(cost_tracker, "_tracker", cost_tracker.CostTracker(ledger=ledger))
+    monkeypatch.setattr(db_lib, "get_supabase_client", lambda: object())
+    monkeypatch.setattr(worker, "enrich_companies", _enrich_companies)
+    backend = FileBatchBackend(str(tmp_path))
+    original_submit = backend.submit
+    monkeypatch.setattr(backend, "submit", lambda requests: submitted.append(requests) or original_submit(requests))
+    job = {
+        "id": "job-1",
+        "client_id": "c1",
+        "job_type": "lead_qualify_batch",
+        "payload": {"leads": [{"email": f"lead{i}@acme.com", "company": "Acme"} for i in range(3)]},
+    }
+
+    result = worker.process_qualify_batch(job, backend=backend)
+    assert result["status"] == "submitted"
+    assert len(submitted[0]) == len(result["payload"]["items"]) == 1
+
+    ledger.charge("c1", 1.0)
+    result = worker.process_qualify_batch(job, backend=backend)
+    assert result["status"] == "skipped"
+    assert len(submitted) == 1
@@ -3,23 +3,33 @@ Worker process for jobs_queue.
 Only component that calls enrichment + LLM + email.
 """
 
+import asyncio
 import logging
 import os
+import signal
 import sys
+import threading
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import Optional
 
 from dotenv import load_dotenv
 
 from lib import db as db_lib
 from lib.cost_tracker import get_cost_tracker
-from lib.enrichment import enrich_company
+from lib.enrichment import enrich_companies, enrich_company
 from lib.email import send_email
 from lib.kill_switch import create_default_kill_switch, KillSwitchTriggered
 from lib.slack import send_slack_alert
 from lib.agent_router import route_job
 from lib.kpi import collect_kpi_snapshot
+from lib.queue_wakeup import QueueWakeup
 from lib.experiments import evaluate_experiment, review_optimization
+from lib.batch_llm import BATCH_PRICE_MULTIPLIER, PENDING_STATUSES, get_batch_backend
+from lib.admission import AdmissionOption, admission_enabled, admit, truncate_enrichment
+from lib.token_estimator import get_token_estimator
+from lib.model_router import get_latency_tracker, get_model_router, model_routing_enabled
 
 logger = logging.getLogger(__name__)
 
@@ -30,9 +40,111 @@ AGENT_ROOT = os.path.join(ROOT_DIR, "automations", "lead-qualifier")
 if AGENT_ROOT not in sys.path:
     sys.path.append(AGENT_ROOT)
 
-from agent.qualifier import qualify_lead  # noqa: E402
-from agent.email_drafter import draft_email  # noqa: E402
-from agent.config import EMAIL_COOLDOWN_DAYS, APPROVAL_MODE  # noqa: E402
+from agent.qualifier import (  # noqa: E402
+    QualificationResult,
+    build_qualification_prompt,
+    parse_qualification_response,
+    qualification_request,
+    qualify_lead,
+)
+from agent.prescorer import prescore_lead, PrescoreConfig  # noqa: E402
+from agent.email_drafter import build_email_prompt, draft_email, draft_request  # noqa: E402
+from agent.config import (  # noqa: E402
+    APPROVAL_MODE,
+    DRAFTING_MODEL,
+    EMAIL_COOLDOWN_DAYS,
+    REASONING_MODEL,
+    model_config,
+)
+
+# Set on SIGTERM/SIGINT: stop claiming new jobs, let in-flight jobs finish.
+_shutdown = threading.Event()
+_wakeup: Optional[QueueWakeup] = None
+
+
+def _admit_llm_call(
+    stage: str,
+    candidates: list[tuple],
+    build_request,
+    steps: list[dict],
+    spent_usd: float,
+    max_cost_usd: float,
+    tracker,
+    client_id: str,
+) -> tuple:
+    """
+    Pick the first (model, enrichment, truncated) candidate whose projected
+    cost fits the run allowance and the monthly budget; refuse otherwise.
+
+    Returns (model, enrichment, messages) for the admitted candidate.
+    """
+    options = []
+    for model, enrichment, truncated in candidates:
+        request = build_request(model, enrichment)
+        options.append(
+            AdmissionOption(
+                model=request["model"],
+                messages=request["messages"],
+                max_output_tokens=request["max_tokens"],
+                truncated=truncated,
+                context=(model, enrichment),
+            )
+        )
+    decision = admit(
+        options,
+        spent_usd=spent_usd,
+        max_cost_usd=max_cost_usd,
+        budget_remaining_usd=tracker.ledger.remaining(client_id) if tracker.ledger else None,
+    )
+    steps.append(decision.as_step(stage))
+    if not decision.admitted:
+        raise KillSwitchTriggered(f"admission_refused ({decision.reason})")
+    model, enrichment = decision.option.context
+    return model, enrichment, decision.option.messages
+
+
+def _run_qualification(
+    stage: str,
+    models: list,
+    lead: dict,
+    enrichment: Optional[dict],
+    steps: list[dict],
+    spent_usd: float,
+    max_cost_usd: float,
+    tracker,
+    client_id: str,
+) -> QualificationResult:
+    """
+    Qualify with the first of models that admission control lets through
+    (full enrichment before truncated), recording latency and token usage
+    for the router and estimator.
+    """
+    model, qualify_enrichment, messages = models[0], enrichment, None
+    if admission_enabled():
+        candidates = [(candidate, enrichment, False) for candidate in models]
+        if enrichment:
+            trimmed = truncate_enrichment(enrichment)
+            candidates += [(candidate, trimmed, True) for candidate in models]
+        model, qualify_enrichment, messages = _admit_llm_call(
+            stage,
+            candidates,
+            lambda candidate, data: qualification_request(
+                build_qualification_prompt(**lead, enrichment_data=data),
+                candidate,
+            ),
+            steps,
+            spent_usd,
+            max_cost_usd,
+            tracker,
+            client_id,
+        )
+    started = time.monotonic()
+    qualification = qualify_lead(**lead, enrichment_data=qualify_enrichment, model=model)
+    if not getattr(qualification, "cache_hit", False):
+        get_latency_tracker().record(model.name, time.monotonic() - started)
+        if messages:
+            get_token_estimator().observe(model.name, messages, qualification.tokens_in)
+    return qualification
 
 
 def send_approved_emails(limit: int = 10) -> int:
@@ -55,7 +167,7 @@ def send_approved_emails(limit: int = 10) -> int:
         if response.get("error") or (response.get("status_code") or 0) >= 400:
             logger.error("SendGrid error for outbox %s: %s", record.get("id"), response)
             continue
-        db_lib.mark_outbox_sent(db, record.get("id"), "sendgrid", response)
+        db_lib.mark_outbox_sent(db, record.get("id"), "sendgrid", response, client_id=client_id)
         db_lib.record_email_sent(
             db,
             client_id,
@@ -82,8 +194,8 @@ def process_payload(
     approval_mode_override: Optional[bool] = None,
 ) -> dict:
     db = db_lib.get_supabase_client()
-    tracker = get_cost_tracker()
-    kill_switch = create_default_kill_switch()
+    tracker = get_cost_tracker(db)
+    kill_switch = create_default_kill_switch(client_id=client_id, budget_ledger=tracker.ledger)
     if os.getenv("SLACK_WEBHOOK_URL"):
         def _alert_kill_switch(reason: str) -> None:
             send_slack_alert(
@@ -109,22 +221,19 @@ def process_payload(
     website = payload.get("website")
     message = payload.get("message")
     source = payload.get("source")
+    lead = {
+        "name": name,
+        "email": email,
+        "company": company,
+        "website": website,
+        "message": message,
+        "source": source,
+    }
 
     steps.append({"step": "input", "status": "ok"})
 
     # Upsert lead
-    db_lib.upsert_lead(
-        db,
-        client_id=client_id,
-        lead={
-            "email": email,
-            "name": name,
-            "company": company,
-            "website": website,
-            "message": message,
-            "source": source,
-        },
-    )
+    db_lib.upsert_lead(db, client_id=client_id, lead=lead)
     steps.append({"step": "lead_upsert", "status": "ok"})
 
     automation_status = db_lib.get_automation_status(db, client_id, "lead-qualifier")
@@ -174,20 +283,70 @@ def process_payload(
         return {"status": "skipped", "reason": "cooldown"}
 
     try:
+        # Shared monthly budget (all workers + API) before spending anything
+        if kill_switch.should_kill():
+            raise KillSwitchTriggered(kill_switch.state.kill_reason or "kill_switch")
+
         # Enrichment
         enrichment = enrich_company(website)
         steps.append({"step": "enrichment", "status": "ok"})
 
-        # Qualification
-        qualification = qualify_lead(
-            name=name,
+        # Deterministic pre-score: obvious junk / obvious fits skip the LLM
+        client_config = automation_status.get("config") or {}
+        prescore = prescore_lead(
             email=email,
+            name=name,
             company=company,
             website=website,
             message=message,
-            source=source,
             enrichment_data=enrichment,
+            config=PrescoreConfig.from_env(client_config.get("prescore")),
         )
+        steps.append(
+            {
+                "step": "prescore",
+                "status": "decided" if prescore.decided else "passed",
+                "label": prescore.label,
+                "score": prescore.score,
+                "signals": prescore.signals,
+            }
+        )
+
+        # Qualification
+        route = None
+        if prescore.decided:
+            qualification = QualificationResult(
+                score=prescore.score,
+                label=prescore.label,
+                key_reason=prescore.key_reason,
+                personalization_points=[],
+            )
+        else:
+            qualify_model = REASONING_MODEL
+            if model_routing_enabled():
+                router = get_model_router()
+                route = router.route_qualification(
+                    REASONING_MODEL.name,
+                    prescore_score=prescore.score,
+                    queue_depth=router.queue_depth(db),
+                    budget_remaining_usd=tracker.ledger.remaining(client_id) if tracker.ledger else None,
+                )
+                steps.append(route.as_step())
+                qualify_model = model_config(route.model, REASONING_MODEL)
+            models = [qualify_model]
+            if DRAFTING_MODEL.name != qualify_model.name:
+                models.append(DRAFTING_MODEL)
+            qualification = _run_qualification(
+                "qualification",
+                models,
+                lead,
+                enrichment,
+                steps,
+                cost_total,
+                max_cost_per_run,
+                tracker,
+                client_id,
+            )
         tokens_in_total += qualification.tokens_in
         tokens_out_total += qualification.tokens_out
         kill_switch.add_tokens(qualification.tokens_used)
@@ -206,6 +365,46 @@ def process_payload(
             )
         if kill_switch.should_kill():
             raise KillSwitchTriggered(kill_switch.state.kill_reason or "kill_switch")
+
+        # Borderline results from a cheaper model get a second opinion
+        escalation = get_model_router().escalate(route, qualification.label) if route else None
+        if escalation:
+            steps.append(escalation.as_step())
+            try:
+                escalated = _run_qualification(
+                    "qualification_escalation",
+                    [model_config(escalation.model, REASONING_MODEL)],
+                    lead,
+                    enrichment,
+                    steps,
+                    cost_total,
+                    max_cost_per_run,
+                    tracker,
+                    client_id,
+                )
+            except KillSwitchTriggered as exc:
+                # Escalation is optional; keep the first result if it is not affordable
+                logger.info("Skipping review escalation: %s", exc)
+            else:
+                tokens_in_total += escalated.tokens_in
+                tokens_out_total += escalated.tokens_out
+                kill_switch.add_tokens(escalated.tokens_used)
+                if escalated.model_name:
+                    cost_total += tracker.record_usage(
+                        automation="lead-qualifier",
+                        client_id=client_id,
+                        model=escalated.model_name,
+                        tokens_in=escalated.tokens_in,
+                        tokens_out=escalated.tokens_out,
+                        run_id=run_id,
+                    )
+                qualification = escalated
+                if cost_total > max_cost_per_run:
+                    raise KillSwitchTriggered(
+                        f"cost_limit_exceeded (${cost_total:.2f} > ${max_cost_per_run:.2f})"
+                    )
+                if kill_switch.should_kill():
+                    raise KillSwitchTriggered(kill_switch.state.kill_reason or "kill_switch")
     except KillSwitchTriggered as exc:
         if not kill_switch.state.is_killed:
             send_slack_alert(
@@ -233,6 +432,11 @@ def process_payload(
         {
             "step": "qualification",
             "status": "ok",
+            "source": "prescore" if prescore.decided else "llm",
+            "model": qualification.model_name,
+            "escalated": bool(escalation),
+            "cached": getattr(qualification, "cache_hit", False),
+            "retries": getattr(qualification, "retries", 0),
             "label": qualification.label,
             "score": qualification.score,
             "tokens": qualification.tokens_used,
@@ -281,13 +485,52 @@ def process_payload(
 
     try:
         # Draft email
+        draft_model, draft_enrichment, draft_messages = DRAFTING_MODEL, enrichment, None
+        if model_routing_enabled():
+            router = get_model_router()
+            draft_route = router.route_draft(
+                DRAFTING_MODEL.name,
+                queue_depth=router.queue_depth(db),
+                budget_remaining_usd=tracker.ledger.remaining(client_id) if tracker.ledger else None,
+            )
+            steps.append(draft_route.as_step())
+            draft_model = model_config(draft_route.model, DRAFTING_MODEL)
+        if admission_enabled():
+            candidates = [(draft_model, enrichment, False)]
+            if enrichment:
+                candidates.append((draft_model, truncate_enrichment(enrichment), True))
+            draft_model, draft_enrichment, draft_messages = _admit_llm_call(
+                "email_draft",
+                candidates,
+                lambda model, data: draft_request(
+                    build_email_prompt(
+                        name=name,
+                        company=company,
+                        message=message,
+                        qualification=qualification,
+                        enrichment_data=data,
+                    ),
+                    model,
+                ),
+                steps,
+                cost_total,
+                max_cost_per_run,
+                tracker,
+                client_id,
+            )
+        started = time.monotonic()
         draft = draft_email(
             name=name,
             company=company,
             message=message,
             qualification=qualification,
-            enrichment_data=enrichment,
+            enrichment_data=draft_enrichment,
+            model=draft_model,
         )
+        if not getattr(draft, "cache_hit", False):
+            get_latency_tracker().record(draft_model.name, time.monotonic() - started)
+            if draft_messages:
+                get_token_estimator().observe(draft_model.name, draft_messages, draft.tokens_in)
         tokens_in_total += draft.tokens_in
         tokens_out_total += draft.tokens_out
         kill_switch.add_tokens(draft.tokens_used)
@@ -329,7 +572,16 @@ def process_payload(
                 error_message=str(exc),
             )
         return {"status": "killed", "reason": str(exc)}
-    steps.append({"step": "email_draft", "status": "ok", "tokens": draft.tokens_used})
+    steps.append(
+        {
+            "step": "email_draft",
+            "status": "ok",
+            "model": draft.model_name,
+            "cached": getattr(draft, "cache_hit", False),
+            "retries": getattr(draft, "retries", 0),
+            "tokens": draft.tokens_used,
+        }
+    )
 
     # Send or queue
     approval_mode = approval_mode_override if approval_mode_override is not None else APPROVAL_MODE
@@ -386,6 +638,222 @@ def process_payload(
     }
 
 
+async def _enrich_in_chunks(websites: list[Optional[str]], chunk_size: int) -> list[dict]:
+    """enrich_companies over bounded chunks, each with its own deadline."""
+    enriched: list[dict] = []
+    for start in range(0, len(websites), chunk_size):
+        enriched.extend(await enrich_companies(websites[start:start + chunk_size]))
+    return enriched
+
+
+def _batch_items(db, client_id: str, payload: dict) -> list[dict]:
+    """Leads for a batch: payload["leads"] if given, otherwise unscored leads in the DB."""
+    leads = payload.get("leads")
+    if leads is None:
+        limit = int(payload.get("limit") or os.getenv("LLM_BATCH_MAX_LEADS", "500"))
+        leads = []
+        for row in db_lib.list_unscored_leads(db, client_id, limit=limit):
+            raw = row.get("raw_form_data") or {}
+            leads.append({**raw, **{k: v for k, v in row.items() if v is not None}})
+    # Fetch missing enrichment concurrently, a chunk per deadline, so large batches
+    # are not starved by one shared deadline
+    missing = [index for index, lead in enumerate(leads) if not lead.get("enrichment_json")]
+    chunk_size = max(1, int(os.getenv("LLM_BATCH_ENRICH_CHUNK", "50")))
+    fetched = (
+        asyncio.run(_enrich_in_chunks([leads[index].get("website") for index in missing], chunk_size))
+        if missing
+        else []
+    )
+    enrichments = dict(zip(missing, fetched))
+    items = []
+    for index, lead in enumerate(leads):
+        email = db_lib.normalize_email(lead.get("email", ""))
+        if not email:
+            continue
+        enrichment = lead.get("enrichment_json") or enrichments.get(index)
+        items.append(
+            {
+                "custom_id": f"lead-{index}",
+                "email": email,
+                "name": lead.get("name"),
+                "company": lead.get("company"),
+                "website": lead.get("website"),
+                "message": lead.get("message"),
+                "source": lead.get("source"),
+                "run_id": lead.get("run_id"),
+                "enrichment": enrichment,
+            }
+        )
+    return items
+
+
+def process_qualify_batch(job: dict, backend=None) -> dict:
+    """
+    Qualify many leads through the provider's batch endpoint.
+
+    The first run submits the requests and returns defer_seconds so the job
+    is re-queued to poll; once the batch completes, each result is written
+    back with update_lead_qualification / update_run_details. A batch still
+    pending LLM_BATCH_MAX_WAIT_SECONDS after submission fails the job.
+    Settled custom_ids are saved to payload["recorded"] as the results are
+    written, so a retry after a partial fan-out does not charge them twice.
+    """
+    db = db_lib.get_supabase_client()
+    backend = backend or get_batch_backend()
+    client_id = job.get("client_id")
+    payload = dict(job.get("payload") or {})
+    poll_seconds = int(os.getenv("LLM_BATCH_POLL_SECONDS", "300"))
+    max_wait_seconds = int(os.getenv("LLM_BATCH_MAX_WAIT_SECONDS", "90000"))
+
+    batch_id = payload.get("batch_id")
+    if not batch_id:
+        # Shared monthly budget before committing to the largest spend path
+        tracker = get_cost_tracker(db)
+        kill_switch = create_default_kill_switch(client_id=client_id, budget_ledger=tracker.ledger)
+        if kill_switch.should_kill():
+            logger.warning(
+                "Qualification batch not submitted: %s", kill_switch.state.kill_reason
+            )
+            return {"status": "skipped", "reason": kill_switch.state.kill_reason or "kill_switch"}
+        items = _batch_items(db, client_id, payload)
+        if not items:
+            return {"status": "empty"}
+        remaining = tracker.ledger.remaining(client_id) if tracker.ledger else None
+        estimator = get_token_estimator()
+        requests = []
+        projected = 0.0
+        for item in items:
+            prompt = build_qualification_prompt(
+                name=item["name"],
+                email=item["email"],
+                company=item["company"],
+                website=item["website"],
+                message=item["message"],
+                source=item["source"],
+                enrichment_data=item["enrichment"],
+            )
+            body = qualification_request(prompt)
+            cost = BATCH_PRICE_MULTIPLIER * estimator.estimate_cost(
+                body["model"], body["messages"], body["max_tokens"]
+            )
+            # Leads that do not fit the remaining budget stay unscored for a later batch
+            if remaining is not None and projected + cost > remaining:
+                break
+            projected += cost
+            requests.append({"custom_id": item["custom_id"], "body": body})
+        if not requests:
+            logger.warning("Qualification batch not submitted: budget remaining $%.4f", remaining)
+            return {"status": "skipped", "reason": "budget_exceeded"}
+        if len(requests) < len(items):
+            logger.warning(
+                "Qualification batch trimmed to %d of %d leads to fit the budget",
+                len(requests),
+                len(items),
+            )
+        items = items[:len(requests)]
+        payload.pop("leads", None)
+        payload["batch_id"] = backend.submit(requests)
+        payload["submitted_at"] = time.time()
+        payload["items"] = items
+        logger.info("Submitted qualification batch %s (%d leads)", payload["batch_id"], len(items))
+        return {"status": "submitted", "payload": payload, "defer_seconds": poll_seconds}
+
+    status = backend.status(batch_id)
+    if status in PENDING_STATUSES:
+        waited = time.time() - float(payload.get("submitted_at") or time.time())
+        if waited > max_wait_seconds:
+            raise RuntimeError(
+                f"Qualification batch {batch_id} still {status} after {int(waited)}s"
+            )
+        return {"status": status, "payload": payload, "defer_seconds": poll_seconds}
+    if status != "completed":
+        raise RuntimeError(f"Qualification batch {batch_id} ended with status {status}")
+
+    tracker = get_cost_tracker(db)
+    results = backend.results(batch_id)
+    counts = {"qualified": 0, "review": 0, "disqualified": 0, "failed": 0}
+    recorded = set(payload.get("recorded") or [])
+    if recorded:
+        logger.info("Resuming batch %s: %d results already recorded", batch_id, len(recorded))
+
+    def _settled(custom_id: str) -> None:
+        recorded.add(custom_id)
+        payload["recorded"] = sorted(recorded)
+        if job.get("id"):
+            db_lib.update_job_payload(db, job["id"], payload)
+
+    for item in payload.get("items") or []:
+        if item["custom_id"] in recorded:
+            continue
+        run_id = item.get("run_id")
+        result = results.get(item["custom_id"]) or {"error": "missing_result"}
+        qualification = None
+        error = result.get("error")
+        if not error:
+            try:
+                qualification = parse_qualification_response(
+                    result["content"], result["tokens_in"], result["tokens_out"]
+                )
+            except (KeyError, TypeError, ValueError) as exc:
+                error = str(exc)
+        if qualification is None:
+            counts["failed"] += 1
+            if run_id:
+                db_lib.update_run_details(
+                    db,
+                    run_id=run_id,
+                    status="failed",
+                    steps=[{"step": "qualification", "status": "error", "source": "batch"}],
+                    error_message=str(error),
+                )
+            _settled(item["custom_id"])
+            continue
+
+        cost = tracker.record_usage(
+            automation="lead-qualifier",
+            client_id=client_id,
+            model=qualification.model_name,
+            tokens_in=qualification.tokens_in,
+            tokens_out=qualification.tokens_out,
+            run_id=run_id,
+            price_multiplier=BATCH_PRICE_MULTIPLIER,
+        )
+        db_lib.update_lead_qualification(
+            db,
+            client_id=client_id,
+            email=item["email"],
+            qualification={
+                "score": qualification.score,
+                "label": qualification.label,
+                "key_reason": qualification.key_reason,
+                "personalization_points": qualification.personalization_points,
+            },
+            enrichment=item.get("enrichment"),
+        )
+        if run_id:
+            db_lib.update_run_details(
+                db,
+                run_id=run_id,
+                status="success",
+                steps=[
+                    {
+                        "step": "qualification",
+                        "status": "ok",
+                        "source": "batch",
+                        "batch_id": batch_id,
+                        "tokens": qualification.tokens_used,
+                    }
+                ],
+                llm_tokens_in=qualification.tokens_in,
+                llm_tokens_out=qualification.tokens_out,
+                cost_estimate_usd=cost,
+            )
+        _settled(item["custom_id"])
+        counts[qualification.label] = counts.get(qualification.label, 0) + 1
+    logger.info("Qualification batch %s completed: %s", batch_id, counts)
+    return {"status": "completed", "batch_id": batch_id, **counts}
+
+
 def process_job(job: dict) -> dict:
     job_type = job.get("job_type") or "lead_qualify"
     if job_type == "kpi_snapshot":
@@ -425,6 +893,8 @@ def process_job(job: dict) -> dict:
         if not experiment_id:
             raise ValueError("experiment_id is required for experiment_evaluate jobs")
         return evaluate_experiment(db, experiment_id, results=payload.get("results"))
+    if job_type == "lead_qualify_batch":
+        return process_qualify_batch(job)
     if job_type != "lead_qualify":
         db = db_lib.get_supabase_client()
         return route_job(db, job)
@@ -435,26 +905,30 @@ def process_job(job: dict) -> dict:
     return process_payload(client_id, payload, run_id, idempotency_key)
 
 
-def run_once():
-    db = db_lib.get_supabase_client()
-    worker_id = os.getenv("WORKER_ID", "worker-1")
-    lease_seconds = int(os.getenv("QUEUE_LEASE_SECONDS", "120"))
-    max_attempts = int(os.getenv("QUEUE_MAX_ATTEMPTS", "5"))
-
-    job = db_lib.claim_next_job(db, worker_id, lease_seconds)
-    if not job:
-        return False
-
+def handle_job(db, job: dict, max_attempts: int) -> None:
+    """Process a claimed job and settle its lease (done, requeued or dead)."""
     job_id = job.get("id")
     attempts = job.get("attempts", 0)
     run_id = (job.get("payload") or {}).get("run_id")
 
     try:
-        process_job(job)
-        db_lib.mark_job_done(db, job_id, "done")
+        result = process_job(job)
+        if isinstance(result, dict) and result.get("defer_seconds"):
+            # Claiming counted this run as an attempt; a poll is not a failure
+            db_lib.defer_job(
+                db,
+                job_id,
+                result["payload"],
+                int(result["defer_seconds"]),
+                attempts=max(0, attempts - 1),
+            )
+        else:
+            db_lib.mark_job_done(db, job_id, "done", client_id=job.get("client_id"))
     except Exception as exc:
         if attempts >= max_attempts:
-            db_lib.mark_job_done(db, job_id, "dead", error_message=str(exc))
+            db_lib.mark_job_done(
+                db, job_id, "dead", error_message=str(exc), client_id=job.get("client_id")
+            )
             if run_id:
                 db_lib.update_run_status(db, run_id, "failed", error_message=str(exc))
             send_slack_alert(
@@ -479,20 +953,106 @@ def run_once():
                     "error": str(exc),
                 },
             )
+
+
+def run_once():
+    db = db_lib.get_supabase_client()
+    worker_id = os.getenv("WORKER_ID", "worker-1")
+    lease_seconds = int(os.getenv("QUEUE_LEASE_SECONDS", "120"))
+    max_attempts = int(os.getenv("QUEUE_MAX_ATTEMPTS", "5"))
+
+    job = db_lib.claim_next_job(db, worker_id, lease_seconds)
+    if not job:
+        return False
+
+    handle_job(db, job, max_attempts)
     return True
 
 
+def request_shutdown(*_args) -> None:
+    """Signal handler: stop claiming jobs and drain the ones in flight."""
+    if not _shutdown.is_set():
+        logger.info("Shutdown requested; draining in-flight jobs")
+    _shutdown.set()
+    if _wakeup is not None:
+        _wakeup.notify()
+
+
+def install_signal_handlers() -> None:
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+
+
+def _reap(futures: set[Future]) -> None:
+    for future in futures:
+        exc = future.exception()
+        if exc is not None:
+            logger.error("Worker job settlement failed: %s", exc, exc_info=exc)
+
+
+def _release_jobs(db, jobs: deque[dict]) -> None:
+    """Hand claimed-but-unstarted jobs back to the queue on shutdown."""
+    while jobs:
+        job = jobs.popleft()
+        db_lib.requeue_job(db, job.get("id"), delay_seconds=0, error_message="worker_shutdown")
+
+
 def run_loop():
-    sleep_seconds = int(os.getenv("WORKER_POLL_SECONDS", "2"))
+    """
+    Claim and process jobs until shutdown is requested.
+
+    Jobs are leased via claim_jobs in batches of up to WORKER_CLAIM_BATCH,
+    capped at the free pool slots, and up to WORKER_CONCURRENCY of them are
+    kept in flight. On shutdown no new jobs are
+    claimed, unstarted jobs are requeued and the loop returns once the
+    in-flight jobs have settled. Idle waits go through QueueWakeup, so new
+    inserts wake the loop immediately when LISTEN is available.
+    """
+    global _wakeup
+    concurrency = max(1, int(os.getenv("WORKER_CONCURRENCY", "1")))
+    claim_batch = max(1, int(os.getenv("WORKER_CLAIM_BATCH", str(concurrency))))
+    worker_id = os.getenv("WORKER_ID", "worker-1")
+    lease_seconds = int(os.getenv("QUEUE_LEASE_SECONDS", "120"))
+    max_attempts = int(os.getenv("QUEUE_MAX_ATTEMPTS", "5"))
     outbox_enabled = os.getenv("OUTBOX_SEND_ENABLED", "").lower() in {"1", "true", "yes"}
     outbox_batch = int(os.getenv("OUTBOX_BATCH_SIZE", "10"))
-    while True:
-        ran = run_once()
-        if outbox_enabled:
-            send_approved_emails(limit=outbox_batch)
-        if not ran:
-            time.sleep(sleep_seconds)
+
+    _wakeup = QueueWakeup()
+    _wakeup.start()
+    pending: deque[dict] = deque()
+    in_flight: set[Future] = set()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job") as executor:
+        while not _shutdown.is_set():
+            if len(in_flight) >= concurrency:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                _reap(done)
+                continue
+
+            db = db_lib.get_supabase_client()
+            if not pending:
+                # Never lease more than the free slots: leased jobs are invisible to other workers
+                free_slots = concurrency - len(in_flight)
+                pending.extend(
+                    db_lib.claim_jobs(db, worker_id, lease_seconds, min(claim_batch, free_slots))
+                )
+            claimed = bool(pending)
+            if claimed:
+                _wakeup.reset()
+            while pending and len(in_flight) < concurrency:
+                in_flight.add(executor.submit(handle_job, db, pending.popleft(), max_attempts))
+            if outbox_enabled:
+                send_approved_emails(limit=outbox_batch)
+            if not claimed and not _shutdown.is_set():
+                _wakeup.wait()
+
+        if pending:
+            _release_jobs(db_lib.get_supabase_client(), pending)
+        done, _ = wait(in_flight)
+        _reap(done)
+    get_cost_tracker().flush()
+    logger.info("Worker drained %d in-flight job(s); exiting", len(in_flight))
 
 
 if __name__ == "__main__":
+    install_signal_handlers()
     run_loop()
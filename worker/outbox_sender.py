@@ -37,7 +37,7 @@ def send_approved_once(limit: int = 10) -> int:
         if response.get("error") or (response.get("status_code") or 0) >= 400:
             logger.error("SendGrid error for outbox %s: %s", record.get("id"), response)
             continue
-        db_lib.mark_outbox_sent(db, record.get("id"), "sendgrid", response)
+        db_lib.mark_outbox_sent(db, record.get("id"), "sendgrid", response, client_id=client_id)
         db_lib.record_email_sent(
             db,
             client_id,